@@ -6,9 +6,11 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from database.models import init_db
 from database.seed_data import seed_database
+from backend.services.background_jobs import start_background_jobs
 
 init_db()
 seed_database()
+start_background_jobs()
 
 if 'portal' not in st.session_state:
     st.session_state.portal = None
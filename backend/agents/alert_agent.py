@@ -1,6 +1,8 @@
 from backend.agents.base_agent import BaseAgent
 from datetime import datetime, timedelta
 from database.models import Alert, get_db_session
+from backend.services.event_stream import alert_broker, alert_topic
+from backend.services.alert_service import alert_to_dict, adjust_unread_count
 
 class AlertAgent(BaseAgent):
     def __init__(self):
@@ -12,6 +14,7 @@ class AlertAgent(BaseAgent):
         alert_type = input_data.get('alert_type')
         prediction_data = input_data.get('prediction_data', {})
         health_data = input_data.get('health_data', {})
+        anomaly_data = input_data.get('anomaly_data', [])
         
         alerts_generated = []
         
@@ -70,9 +73,21 @@ class AlertAgent(BaseAgent):
                     'priority': 'high' if battery_health < 25 else 'medium'
                 })
         
+        for anomaly in anomaly_data:
+            component = anomaly['component'].replace('_health', '').title()
+            value = anomaly['value']
+            
+            alerts_generated.append({
+                'type': 'health_anomaly',
+                'title': f'Sudden {component} Degradation',
+                'message': f"{component} health dropped to {value:.0f}% from a recent level of {anomaly['expected']:.0f}%. Get it inspected soon.",
+                'priority': 'critical' if value < 30 else 'high'
+            })
+        
         if user_id and alerts_generated:
             try:
                 db = get_db_session()
+                created = []
                 for alert_data in alerts_generated:
                     alert = Alert(
                         user_id=user_id,
@@ -84,8 +99,15 @@ class AlertAgent(BaseAgent):
                         expires_at=datetime.now() + timedelta(days=7)
                     )
                     db.add(alert)
+                    created.append(alert)
+                    adjust_unread_count(db, user_id, alert_data['priority'], 1)
+                db.flush()
+                events = [alert_to_dict(alert) for alert in created]
                 db.commit()
                 db.close()
+                
+                for event in events:
+                    alert_broker.publish(alert_topic(user_id), event['id'], 'alert', event)
             except Exception as e:
                 return {"success": False, "error": str(e)}
         
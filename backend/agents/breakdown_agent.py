@@ -1,6 +1,7 @@
 from backend.agents.base_agent import BaseAgent
 from datetime import datetime
 from database.models import BreakdownEvent, Vehicle, get_db_session
+from backend.services.garage_load import is_active_breakdown, transfer_garage_load
 
 class BreakdownAgent(BaseAgent):
     def __init__(self):
@@ -79,6 +80,7 @@ class BreakdownAgent(BaseAgent):
                 db.close()
                 return {"success": False, "error": "Breakdown event not found"}
             
+            transfer_garage_load(db, breakdown.garage_id, is_active_breakdown(breakdown.status), garage_id, True)
             breakdown.garage_id = garage_id
             breakdown.status = 'garage_assigned'
             breakdown.garage_assigned_at = datetime.now()
@@ -111,6 +113,10 @@ class BreakdownAgent(BaseAgent):
                 db.close()
                 return {"success": False, "error": "Breakdown event not found"}
             
+            transfer_garage_load(
+                db, breakdown.garage_id, is_active_breakdown(breakdown.status),
+                breakdown.garage_id, is_active_breakdown(new_status)
+            )
             breakdown.status = new_status
             
             if new_status == 'garage_en_route':
@@ -0,0 +1,260 @@
+from backend.agents.base_agent import BaseAgent
+from backend.services.garage_catalog import garage_catalog
+from backend.services.garage_load import ACTIVE_SERVICE_STATUSES, adjust_garage_load
+from backend.services.slot_calendar import slot_calendar
+from database.models import ServiceRequest, ServiceSlot, Vehicle, get_db_session
+from utils.geo import top_k_nearest
+from sqlalchemy import bindparam, case, insert, update
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+import numpy as np
+import time
+
+class CampaignAgent(BaseAgent):
+    def __init__(self):
+        super().__init__("CampaignAgent")
+
+        self.candidates_per_vehicle = 8
+        self.max_repair_passes = 3
+        self.max_commit_attempts = 3
+
+    def execute(self, input_data: dict) -> dict:
+        make = input_data.get('make')
+        if not make:
+            return {"success": False, "error": "Campaign needs at least a make"}
+
+        service_type = input_data.get('service_type', 'Recall Campaign')
+        start_date = input_data.get('start_date') or datetime.now() + timedelta(days=1)
+        if isinstance(start_date, str):
+            start_date = datetime.fromisoformat(start_date)
+        days = input_data.get('days', 30)
+        max_distance_km = input_data.get('max_distance_km', 50)
+        commit = input_data.get('commit', True)
+
+        vehicles = self.select_vehicles(make, input_data.get('model'), input_data.get('year_from'),
+                                        input_data.get('year_to'), service_type)
+        if not vehicles:
+            return {
+                "success": True,
+                "targeted": 0,
+                "booked": 0,
+                "decision": "No matching vehicles without an open campaign booking"
+            }
+
+        located = [v for v in vehicles if v[1] is not None and v[2] is not None]
+        window_start = datetime.combine(start_date.date(), datetime.min.time())
+        window_end = window_start + timedelta(days=days)
+
+        for attempt in range(self.max_commit_attempts):
+            start = time.perf_counter()
+            garages, slots = self.load_capacity(window_start, window_end)
+            assigned, distances = self.solve(located, garages, slots, max_distance_km)
+            bookings = self.fill_slots(located, garages, slots, assigned, distances)
+            solve_ms = round((time.perf_counter() - start) * 1000, 2)
+
+            if not commit or not bookings:
+                break
+            if self.commit_bookings(bookings, service_type, start_date, input_data.get('description')):
+                break
+            # Another booking took seats we planned on; plan again against fresh capacity
+            bookings = None
+        else:
+            return {"success": False, "error": "Slot capacity kept changing during the campaign commit"}
+
+        per_garage = Counter(b['garage_id'] for b in bookings)
+        booked_ids = {b['vehicle_id'] for b in bookings}
+        total_distance = round(sum(b['distance_km'] for b in bookings), 2)
+
+        result = {
+            "success": True,
+            "targeted": len(vehicles),
+            "booked": len(bookings),
+            "committed": bool(commit and bookings),
+            "unassigned": [v[0] for v in vehicles if v[0] not in booked_ids],
+            "garages": {str(g): c for g, c in sorted(per_garage.items())},
+            "first_date": min(b['date'] for b in bookings).isoformat() if bookings else None,
+            "last_date": max(b['date'] for b in bookings).isoformat() if bookings else None,
+            "avg_distance_km": round(total_distance / len(bookings), 2) if bookings else 0,
+            "solve_ms": solve_ms,
+            "attempts": attempt + 1,
+            "decision": f"Booked {len(bookings)} of {len(vehicles)} {make} vehicles across {len(per_garage)} garages"
+        }
+        if input_data.get('include_bookings'):
+            result['bookings'] = [{**b, 'date': b['date'].isoformat()} for b in bookings]
+        return result
+
+    def select_vehicles(self, make: str, model: str = None, year_from: int = None, year_to: int = None,
+                        service_type: str = None) -> list:
+        db = get_db_session()
+        try:
+            query = db.query(Vehicle.id, Vehicle.latitude, Vehicle.longitude).filter(Vehicle.make == make)
+            if model:
+                query = query.filter(Vehicle.model == model)
+            if year_from:
+                query = query.filter(Vehicle.year >= year_from)
+            if year_to:
+                query = query.filter(Vehicle.year <= year_to)
+
+            # Re-running a campaign only books vehicles that are not already booked for it
+            already_booked = db.query(ServiceRequest.vehicle_id).filter(
+                ServiceRequest.service_type == service_type,
+                ServiceRequest.status.in_(ACTIVE_SERVICE_STATUSES)
+            )
+            query = query.filter(~Vehicle.id.in_(already_booked))
+            return [tuple(row) for row in query.order_by(Vehicle.id).all()]
+        finally:
+            db.close()
+
+    def load_capacity(self, window_start: datetime, window_end: datetime) -> tuple:
+        garages = garage_catalog.active()
+        db = get_db_session()
+        try:
+            rows = db.query(
+                ServiceSlot.id, ServiceSlot.garage_id, ServiceSlot.date, ServiceSlot.time_slot,
+                ServiceSlot.max_capacity - ServiceSlot.current_bookings
+            ).filter(
+                ServiceSlot.garage_id.in_([g.id for g in garages]),
+                ServiceSlot.date >= window_start,
+                ServiceSlot.date < window_end,
+                ServiceSlot.is_available == True,
+                ServiceSlot.current_bookings < ServiceSlot.max_capacity
+            ).order_by(ServiceSlot.date, ServiceSlot.time_slot).all()
+        finally:
+            db.close()
+
+        slots = defaultdict(list)
+        for slot_id, garage_id, date, time_slot, free in rows:
+            slots[garage_id].append((slot_id, date, time_slot, free))
+        return [g for g in garages if g.id in slots], slots
+
+    def solve(self, vehicles: list, garages: list, slots: dict, max_distance_km: float) -> tuple:
+        n, m = len(vehicles), len(garages)
+        assigned = np.full(n, -1, dtype=np.int64)
+        distances = np.zeros(n)
+        if not n or not m:
+            return assigned, distances
+
+        k = min(self.candidates_per_vehicle, m)
+        candidates, candidate_distance = top_k_nearest(
+            [v[1] for v in vehicles], [v[2] for v in vehicles],
+            np.array([g.latitude for g in garages], dtype=np.float64),
+            np.array([g.longitude for g in garages], dtype=np.float64), k
+        )
+
+        remaining = np.array([sum(s[3] for s in slots[g.id]) for g in garages], dtype=np.int64)
+        reachable = candidate_distance <= max_distance_km
+
+        # Greedy pass: shortest vehicle-garage pairs first while seats last
+        rows = np.repeat(np.arange(n), k)
+        cols = candidates.ravel()
+        pair_distance = candidate_distance.ravel()
+        for p in np.argsort(pair_distance, kind='stable'):
+            r, g = rows[p], cols[p]
+            if pair_distance[p] > max_distance_km:
+                break
+            if assigned[r] < 0 and remaining[g] > 0:
+                assigned[r] = g
+                distances[r] = pair_distance[p]
+                remaining[g] -= 1
+
+        # Repair pass: an unplaced vehicle takes a seat at a full garage when one of
+        # that garage's vehicles can move to its next-nearest candidate with room
+        for _ in range(self.max_repair_passes):
+            moved = 0
+            for r in np.flatnonzero(assigned < 0):
+                if not remaining.any():
+                    break
+                for g, d in zip(candidates[r][reachable[r]], candidate_distance[r][reachable[r]]):
+                    if remaining[g] > 0:
+                        assigned[r], distances[r] = g, d
+                        remaining[g] -= 1
+                        moved += 1
+                        break
+                    members = np.flatnonzero(assigned == g)
+                    options = reachable[members] & (remaining[candidates[members]] > 0) & (candidates[members] != g)
+                    movable = options.any(axis=1)
+                    if not movable.any():
+                        continue
+                    members, options = members[movable], options[movable]
+                    first = options.argmax(axis=1)
+                    extra = candidate_distance[members, first] - distances[members]
+                    best = int(np.argmin(extra))
+                    u, h = members[best], candidates[members[best], first[best]]
+                    assigned[u], distances[u] = h, candidate_distance[u, first[best]]
+                    remaining[h] -= 1
+                    assigned[r], distances[r] = g, d
+                    moved += 1
+                    break
+            if not moved:
+                break
+
+        return assigned, distances
+
+    def fill_slots(self, vehicles: list, garages: list, slots: dict, assigned, distances) -> list:
+        bookings = []
+        for g, garage in enumerate(garages):
+            # Closest vehicles get the earliest seats at their garage
+            riders = np.flatnonzero(assigned == g)
+            riders = riders[np.argsort(distances[riders], kind='stable')]
+            seats = (s for s in slots[garage.id] for _ in range(s[3]))
+            for r, (slot_id, date, time_slot, _) in zip(riders, seats):
+                bookings.append({
+                    'vehicle_id': vehicles[r][0],
+                    'garage_id': garage.id,
+                    'slot_id': slot_id,
+                    'date': date,
+                    'time_slot': time_slot,
+                    'distance_km': round(float(distances[r]), 2)
+                })
+        return bookings
+
+    def commit_bookings(self, bookings: list, service_type: str, requested_date: datetime,
+                        description: str = None) -> bool:
+        per_slot = Counter(b['slot_id'] for b in bookings)
+        db = get_db_session()
+        try:
+            # One conditional UPDATE per slot; any slot that no longer has the seats aborts the plan
+            seats = ServiceSlot.current_bookings + bindparam('seats')
+            stmt = update(ServiceSlot).where(
+                ServiceSlot.id == bindparam('sid'),
+                ServiceSlot.is_available == True,
+                seats <= ServiceSlot.max_capacity
+            ).values(
+                current_bookings=seats,
+                is_available=case((seats >= ServiceSlot.max_capacity, False), else_=True)
+            )
+            conn = db.connection()
+            for slot_id, count in per_slot.items():
+                if conn.execute(stmt, {'sid': slot_id, 'seats': count}).rowcount != 1:
+                    db.rollback()
+                    return False
+
+            now = datetime.now()
+            db.execute(insert(ServiceRequest), [{
+                'vehicle_id': b['vehicle_id'],
+                'garage_id': b['garage_id'],
+                'service_type': service_type,
+                'description': description,
+                'requested_date': requested_date,
+                'scheduled_date': b['date'],
+                'status': 'open',
+                'priority': 'high',
+                'created_at': now,
+                'updated_at': now
+            } for b in bookings])
+            for garage_id, count in Counter(b['garage_id'] for b in bookings).items():
+                adjust_garage_load(db, garage_id, count)
+
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        for slot_id, count in per_slot.items():
+            if slot_id in slot_calendar:
+                slot_calendar.adjust(slot_id, -count)
+            else:
+                slot_calendar.invalidate()
+        return True
@@ -0,0 +1,228 @@
+from backend.agents.base_agent import BaseAgent
+from backend.services.garage_catalog import garage_catalog
+from backend.services.garage_load import adjust_garage_load, garage_loads
+from database.models import BreakdownEvent, get_db_session
+from utils.geo import top_k_nearest
+from sqlalchemy import bindparam, update
+from collections import Counter
+from datetime import datetime
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+import numpy as np
+import time
+
+UNASSIGNED_COST = 1e6
+
+class DispatchAgent(BaseAgent):
+    def __init__(self):
+        super().__init__("DispatchAgent")
+
+        self.candidates_per_event = 20
+        self.load_weight_km = 5.0
+        self.service_mismatch_km = 10.0
+        self.max_matching_edges = 5000000
+
+    def execute(self, input_data: dict) -> dict:
+        breakdown_ids = input_data.get('breakdown_ids')
+        max_distance_km = input_data.get('max_distance_km', 100)
+        method = input_data.get('method', 'auto')
+        commit = input_data.get('commit', True)
+
+        events = self.load_open_events(breakdown_ids)
+        if not events:
+            return {
+                "success": True,
+                "assignments": [],
+                "unassigned": [],
+                "decision": "No open breakdowns to dispatch"
+            }
+
+        loads = garage_loads.loads()
+        garages = [g for g in garage_catalog.active() if g.capacity - loads.get(g.id, g.current_load) > 0]
+
+        start = time.perf_counter()
+        assigned, distances, method_used = self.solve(events, garages, max_distance_km, method, loads)
+        solve_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        assignments = []
+        unassigned = []
+        for i, event in enumerate(events):
+            if assigned[i] < 0:
+                unassigned.append(event[0])
+                continue
+            garage = garages[assigned[i]]
+            assignments.append({
+                "breakdown_id": event[0],
+                "garage_id": garage.id,
+                "garage_name": garage.name,
+                "distance_km": round(float(distances[i]), 2)
+            })
+
+        committed = 0
+        if commit and assignments:
+            committed = self.commit_assignments(assignments)
+
+        total_distance = round(sum(a['distance_km'] for a in assignments), 2)
+
+        return {
+            "success": True,
+            "assignments": assignments,
+            "unassigned": unassigned,
+            "committed": committed,
+            "method": method_used,
+            "total_distance_km": total_distance,
+            "avg_distance_km": round(total_distance / len(assignments), 2) if assignments else 0,
+            "solve_ms": solve_ms,
+            "decision": f"Dispatched {len(assignments)} of {len(events)} breakdowns to {len({a['garage_id'] for a in assignments})} garages ({method_used})"
+        }
+
+    def load_open_events(self, breakdown_ids: list = None) -> list:
+        db = get_db_session()
+        try:
+            query = db.query(
+                BreakdownEvent.id,
+                BreakdownEvent.vehicle_latitude,
+                BreakdownEvent.vehicle_longitude,
+                BreakdownEvent.breakdown_type
+            ).filter(
+                BreakdownEvent.status == 'reported',
+                BreakdownEvent.garage_id == None,
+                BreakdownEvent.vehicle_latitude != None,
+                BreakdownEvent.vehicle_longitude != None
+            )
+            if breakdown_ids:
+                query = query.filter(BreakdownEvent.id.in_(breakdown_ids))
+            return [tuple(row) for row in query.order_by(BreakdownEvent.reported_at).all()]
+        finally:
+            db.close()
+
+    def solve(self, events: list, garages: list, max_distance_km: float, method: str = 'auto',
+              loads: dict = None) -> tuple:
+        n = len(events)
+        assigned = np.full(n, -1, dtype=np.int64)
+        distances = np.zeros(n)
+        if not garages:
+            return assigned, distances, 'none'
+
+        rows, cols, pair_distance, pair_cost = self.candidate_pairs(events, garages, max_distance_km)
+
+        capacity = np.array([g.capacity for g in garages], dtype=np.float64)
+        loads = loads or {}
+        load = np.array([loads.get(g.id, g.current_load) for g in garages], dtype=np.float64)
+        available = (capacity - load).astype(np.int64)
+
+        pair_index = None
+        method_used = 'matching'
+        if method != 'greedy':
+            pair_index = self.solve_matching(n, rows, cols, pair_cost, capacity, load, available)
+        if pair_index is None:
+            pair_index = self.solve_greedy(n, rows, cols, pair_cost, available)
+            method_used = 'greedy'
+
+        has_pair = pair_index >= 0
+        assigned[has_pair] = cols[pair_index[has_pair]]
+        distances[has_pair] = pair_distance[pair_index[has_pair]]
+        return assigned, distances, method_used
+
+    def candidate_pairs(self, events: list, garages: list, max_distance_km: float) -> tuple:
+        n, m = len(events), len(garages)
+        k = min(self.candidates_per_event, m)
+
+        candidates, candidate_distance = top_k_nearest(
+            [e[1] for e in events], [e[2] for e in events],
+            np.array([g.latitude for g in garages], dtype=np.float64),
+            np.array([g.longitude for g in garages], dtype=np.float64), k
+        )
+
+        types = sorted({(e[3] or '').lower() for e in events})
+        type_index = np.array([types.index((e[3] or '').lower()) for e in events])
+        services = [(g.supported_services or '').lower() for g in garages]
+        mismatch = np.array([
+            [0.0 if not t or t in s else self.service_mismatch_km for s in services]
+            for t in types
+        ])
+
+        rows = np.repeat(np.arange(n), k)
+        cols = candidates.ravel()
+        pair_distance = candidate_distance.ravel()
+        keep = pair_distance <= max_distance_km
+        rows, cols, pair_distance = rows[keep], cols[keep], pair_distance[keep]
+        pair_cost = pair_distance + mismatch[type_index[rows], cols]
+
+        return rows, cols, pair_distance, pair_cost
+
+    def solve_matching(self, n: int, rows, cols, pair_cost, capacity, load, available):
+        demand = np.bincount(cols, minlength=len(capacity))
+        slots = np.minimum(available, demand)
+        slot_offset = np.concatenate([[0], np.cumsum(slots)[:-1]])
+        total_slots = int(slots.sum())
+
+        counts = slots[cols]
+        total_edges = int(counts.sum())
+        if total_edges + n > self.max_matching_edges:
+            return None
+
+        edge_pair = np.repeat(np.arange(len(rows)), counts)
+        within = np.arange(total_edges) - np.repeat(np.cumsum(counts) - counts, counts)
+        edge_garage = cols[edge_pair]
+        # Later slots at a garage cost more, so load spreads before distance grows
+        edge_cost = pair_cost[edge_pair] + self.load_weight_km * (load[edge_garage] + within + 1) / capacity[edge_garage]
+
+        edge_rows = np.concatenate([rows[edge_pair], np.arange(n)])
+        edge_cols = np.concatenate([slot_offset[edge_garage] + within, total_slots + np.arange(n)])
+        edge_costs = np.concatenate([edge_cost, np.full(n, UNASSIGNED_COST)]) + 1.0
+
+        shape = (n, total_slots + n)
+        graph = csr_matrix((edge_costs, (edge_rows, edge_cols)), shape=shape)
+        try:
+            row_ind, col_ind = min_weight_full_bipartite_matching(graph)
+        except ValueError:
+            return None
+
+        edge_ids = csr_matrix((np.concatenate([edge_pair + 1, np.zeros(n, dtype=np.int64)]), (edge_rows, edge_cols)), shape=shape)
+        pair_index = np.full(n, -1, dtype=np.int64)
+        pair_index[row_ind] = np.asarray(edge_ids[row_ind, col_ind]).ravel() - 1
+        return pair_index
+
+    def solve_greedy(self, n: int, rows, cols, pair_cost, available) -> np.ndarray:
+        remaining = available.copy()
+        pair_index = np.full(n, -1, dtype=np.int64)
+        for p in np.argsort(pair_cost, kind='stable'):
+            r = rows[p]
+            g = cols[p]
+            if pair_index[r] < 0 and remaining[g] > 0:
+                pair_index[r] = p
+                remaining[g] -= 1
+        return pair_index
+
+    def commit_assignments(self, assignments: list) -> int:
+        db = get_db_session()
+        try:
+            now = datetime.now()
+            stmt = update(BreakdownEvent).where(
+                BreakdownEvent.id == bindparam('bid'),
+                BreakdownEvent.garage_id == None,
+                BreakdownEvent.status == 'reported'
+            ).values(
+                garage_id=bindparam('new_garage_id'),
+                status='garage_assigned',
+                garage_assigned_at=bindparam('new_assigned_at')
+            )
+            # Each claim is its own statement so its rowcount says whether this batch won the row;
+            # only those rows count towards garage load
+            conn = db.connection()
+            claimed = Counter()
+            for a in assignments:
+                result = conn.execute(stmt, {'bid': a['breakdown_id'], 'new_garage_id': a['garage_id'], 'new_assigned_at': now})
+                if result.rowcount == 1:
+                    claimed[a['garage_id']] += 1
+            for garage_id, count in claimed.items():
+                adjust_garage_load(db, garage_id, count)
+
+            db.commit()
+            return sum(claimed.values())
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
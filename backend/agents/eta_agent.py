@@ -1,5 +1,8 @@
 from backend.agents.base_agent import BaseAgent
-import math
+from backend.routing.eta_matrix import get_eta_matrix
+from backend.routing.road_graph import get_road_graph, get_road_graph_error
+from utils.geo import haversine_km
+import numpy as np
 import random
 
 class ETAEstimationAgent(BaseAgent):
@@ -8,13 +11,22 @@ class ETAEstimationAgent(BaseAgent):
         
         self.avg_city_speed_kmh = 25
         self.avg_highway_speed_kmh = 60
+        self.prep_time_minutes = 5
     
     def execute(self, input_data: dict) -> dict:
-        garage_lat = input_data.get('garage_latitude')
-        garage_lng = input_data.get('garage_longitude')
         vehicle_lat = input_data.get('vehicle_latitude')
         vehicle_lng = input_data.get('vehicle_longitude')
         breakdown_type = input_data.get('breakdown_type', 'General')
+        garages = input_data.get('garages')
+        
+        if garages is not None:
+            result = self.estimate_many(garages, vehicle_lat, vehicle_lng, breakdown_type)
+            if result.get("success") and get_road_graph_error():
+                result["graph_error"] = get_road_graph_error()
+            return result
+        
+        garage_lat = input_data.get('garage_latitude')
+        garage_lng = input_data.get('garage_longitude')
         
         if not all([garage_lat, garage_lng, vehicle_lat, vehicle_lng]):
             return {
@@ -23,9 +35,69 @@ class ETAEstimationAgent(BaseAgent):
             }
         
         distance_km = self.calculate_distance(garage_lat, garage_lng, vehicle_lat, vehicle_lng)
+        arrival_minutes, eta_source = self.estimate_arrivals(
+            [input_data.get('garage_id')], [(garage_lat, garage_lng)], [distance_km], vehicle_lat, vehicle_lng
+        )[0]
+        
+        result = self.build_estimate(distance_km, arrival_minutes, eta_source, breakdown_type)
+        if get_road_graph_error():
+            result["graph_error"] = get_road_graph_error()
+        return result
+    
+    def estimate_many(self, garages: list, vehicle_lat: float, vehicle_lng: float, breakdown_type: str) -> dict:
+        if vehicle_lat is None or vehicle_lng is None:
+            return {"success": False, "error": "Missing location coordinates"}
         
-        arrival_minutes = self.estimate_arrival_time(distance_km)
+        garages = [g for g in garages if g.get('latitude') is not None and g.get('longitude') is not None]
+        points = [(g['latitude'], g['longitude']) for g in garages]
+        distances = [self.calculate_distance(lat, lng, vehicle_lat, vehicle_lng) for lat, lng in points]
+        arrivals = self.estimate_arrivals([g.get('id') for g in garages], points, distances, vehicle_lat, vehicle_lng)
         
+        estimates = []
+        for garage, distance_km, (arrival_minutes, eta_source) in zip(garages, distances, arrivals):
+            estimate = self.build_estimate(distance_km, arrival_minutes, eta_source, breakdown_type)
+            estimate['garage_id'] = garage.get('id')
+            estimates.append(estimate)
+        
+        return {
+            "success": True,
+            "estimates": estimates,
+            "decision": f"Estimated ETAs for {len(estimates)} garages"
+        }
+    
+    def estimate_arrivals(self, garage_ids: list, garage_points: list, distances: list,
+                          vehicle_lat: float, vehicle_lng: float) -> list:
+        seconds = np.full(len(garage_points), np.nan)
+        sources = [None] * len(garage_points)
+        
+        matrix = get_eta_matrix()
+        if matrix is not None:
+            ids = [-1 if garage_id is None else garage_id for garage_id in garage_ids]
+            seconds = matrix.lookup(ids, vehicle_lat, vehicle_lng)
+            for i in np.flatnonzero(np.isfinite(seconds)):
+                sources[i] = "eta_matrix"
+        
+        missing = np.flatnonzero(~np.isfinite(seconds))
+        graph = get_road_graph()
+        if graph is not None and len(missing):
+            road_seconds, exact = graph.travel_seconds_to(
+                vehicle_lat, vehicle_lng,
+                [garage_points[i][0] for i in missing], [garage_points[i][1] for i in missing]
+            )
+            # Landmark upper bounds are not ETAs; those garages keep the heuristic
+            seconds[missing] = road_seconds
+            for i in missing[exact]:
+                sources[i] = "road_graph"
+        
+        results = []
+        for i, distance_km in enumerate(distances):
+            if sources[i] is not None:
+                results.append((int(seconds[i] / 60 + self.prep_time_minutes), sources[i]))
+            else:
+                results.append((self.estimate_arrival_time(distance_km), "heuristic"))
+        return results
+    
+    def build_estimate(self, distance_km: float, arrival_minutes: int, eta_source: str, breakdown_type: str) -> dict:
         repair_minutes = self.estimate_repair_time(breakdown_type)
         
         total_time = arrival_minutes + repair_minutes
@@ -39,6 +111,7 @@ class ETAEstimationAgent(BaseAgent):
             "estimated_repair_minutes": repair_minutes,
             "total_estimated_minutes": total_time,
             "confidence_score": confidence,
+            "eta_source": eta_source,
             "breakdown": {
                 "travel_time": arrival_minutes,
                 "repair_time": repair_minutes,
@@ -53,17 +126,7 @@ class ETAEstimationAgent(BaseAgent):
         }
     
     def calculate_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
-        R = 6371
-        
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lng = math.radians(lng2 - lng1)
-        
-        a = math.sin(delta_lat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lng/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        
-        return round(R * c, 2)
+        return round(haversine_km(lat1, lng1, lat2, lng2), 2)
     
     def estimate_arrival_time(self, distance_km: float) -> int:
         if distance_km <= 5:
@@ -77,9 +140,7 @@ class ETAEstimationAgent(BaseAgent):
         
         traffic_factor = random.uniform(1.0, 1.3)
         
-        prep_time = 5
-        
-        return int(base_time * traffic_factor + prep_time)
+        return int(base_time * traffic_factor + self.prep_time_minutes)
     
     def estimate_repair_time(self, breakdown_type: str) -> int:
         repair_times = {
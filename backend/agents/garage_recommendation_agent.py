@@ -1,6 +1,8 @@
 from backend.agents.base_agent import BaseAgent
-from database.models import Garage, get_db_session
-import math
+from backend.services.garage_spatial_index import garage_index, nearest_garages_db
+from backend.services.garage_catalog import garage_catalog
+from backend.services.garage_load import garage_loads
+from utils.geo import haversine_km
 
 class GarageRecommendationAgent(BaseAgent):
     def __init__(self):
@@ -11,50 +13,32 @@ class GarageRecommendationAgent(BaseAgent):
         vehicle_lng = input_data.get('longitude')
         breakdown_type = input_data.get('breakdown_type', '')
         limit = input_data.get('limit', 5)
+        radius_km = input_data.get('radius_km')
         
         if vehicle_lat is None or vehicle_lng is None:
             vehicle_lat = 28.6139
             vehicle_lng = 77.2090
         
-        db = get_db_session()
-        
         try:
-            garages = db.query(Garage).filter(Garage.is_active == True).all()
-            
-            garage_distances = []
-            for garage in garages:
-                distance = self.calculate_distance(
-                    vehicle_lat, vehicle_lng,
-                    garage.latitude, garage.longitude
-                )
-                
-                score = self.calculate_score(garage, distance, breakdown_type)
-                
-                garage_distances.append({
-                    "id": garage.id,
-                    "name": garage.name,
-                    "address": garage.address,
-                    "city": garage.city,
-                    "latitude": garage.latitude,
-                    "longitude": garage.longitude,
-                    "distance_km": distance,
-                    "rating": garage.rating,
-                    "capacity": garage.capacity,
-                    "current_load": garage.current_load,
-                    "available_capacity": garage.capacity - garage.current_load,
-                    "avg_repair_time_hours": garage.avg_repair_time_hours,
-                    "opening_time": garage.opening_time,
-                    "closing_time": garage.closing_time,
-                    "phone": garage.phone,
-                    "score": score
-                })
+            if radius_km is not None:
+                candidates = self.find_candidates(vehicle_lat, vehicle_lng, radius_km=radius_km)
+                garage_distances = self.score_candidates(candidates, breakdown_type)
+            else:
+                k = max(limit * 4, 20)
+                while True:
+                    candidates = self.find_candidates(vehicle_lat, vehicle_lng, k=k)
+                    garage_distances = self.score_candidates(candidates, breakdown_type)
+                    if len(candidates) < k or len(garage_distances) < limit:
+                        break
+                    garage_distances.sort(key=lambda x: (-x['score'], x['distance_km']))
+                    if self.max_score(candidates[-1][1]) <= garage_distances[limit - 1]['score']:
+                        break
+                    k *= 4
             
             garage_distances.sort(key=lambda x: (-x['score'], x['distance_km']))
             
             recommendations = garage_distances[:limit]
             
-            db.close()
-            
             return {
                 "success": True,
                 "recommendations": recommendations,
@@ -67,21 +51,68 @@ class GarageRecommendationAgent(BaseAgent):
             }
             
         except Exception as e:
-            db.close()
             return {"success": False, "error": str(e)}
     
-    def calculate_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
-        R = 6371
+    def find_candidates(self, lat: float, lng: float, k: int = None, radius_km: float = None) -> list:
+        # The spatial grid already avoids reading garage rows; the bounding-box query covers cold starts
+        if not garage_index.is_built:
+            return nearest_garages_db(lat, lng, k=k, radius_km=radius_km)
         
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lng = math.radians(lng2 - lng1)
+        if radius_km is not None:
+            nearby = garage_index.query_radius(lat, lng, radius_km)
+        else:
+            nearby = garage_index.nearest(lat, lng, k)
         
-        a = math.sin(delta_lat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lng/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+        snapshot = garage_catalog.snapshot()
+        candidates = []
+        for garage_id, distance in nearby:
+            garage = snapshot.by_id.get(garage_id)
+            if garage is not None and garage.is_active:
+                candidates.append((garage, distance))
+        return candidates
+    
+    def score_candidates(self, candidates: list, breakdown_type: str) -> list:
+        garage_distances = []
+        for garage, candidate_distance in candidates:
+            distance = round(float(candidate_distance), 2)
+            
+            score = self.calculate_score(garage, distance, breakdown_type)
+            
+            garage_distances.append({
+                "id": garage.id,
+                "name": garage.name,
+                "address": garage.address,
+                "city": garage.city,
+                "latitude": garage.latitude,
+                "longitude": garage.longitude,
+                "distance_km": distance,
+                "rating": garage.rating,
+                "capacity": garage.capacity,
+                "current_load": garage_loads.get(garage.id, garage.current_load),
+                "available_capacity": garage.capacity - garage_loads.get(garage.id, garage.current_load),
+                "avg_repair_time_hours": garage.avg_repair_time_hours,
+                "opening_time": garage.opening_time,
+                "closing_time": garage.closing_time,
+                "phone": garage.phone,
+                "score": score
+            })
         
-        return round(R * c, 2)
+        return garage_distances
+    
+    def max_score(self, distance: float) -> float:
+        # Best score any garage at or beyond this distance could reach
+        if distance <= 2:
+            distance_score = 30
+        elif distance <= 5:
+            distance_score = 20
+        elif distance <= 10:
+            distance_score = 10
+        else:
+            distance_score = -(distance - 10) * 2
+        return max(0, 100 + distance_score + 25 + 20 + 15 + 25)
+    
+    def calculate_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+        return round(haversine_km(lat1, lng1, lat2, lng2), 2)
     
     def calculate_score(self, garage, distance: float, breakdown_type: str) -> float:
         score = 100
@@ -97,7 +128,8 @@ class GarageRecommendationAgent(BaseAgent):
         
         score += garage.rating * 5
         
-        availability_ratio = (garage.capacity - garage.current_load) / garage.capacity if garage.capacity > 0 else 0
+        current_load = garage_loads.get(garage.id, garage.current_load)
+        availability_ratio = (garage.capacity - current_load) / garage.capacity if garage.capacity > 0 else 0
         score += availability_ratio * 20
         
         if garage.avg_repair_time_hours <= 2:
@@ -1,7 +1,9 @@
 from backend.agents.base_agent import BaseAgent
 from datetime import datetime
 import random
-import math
+from backend.simulation.tracks import generate_tracks
+from backend.services.tracking_service import tracking_store, update_tracking_position
+from utils.geo import haversine_km
 
 class LocationTrackingAgent(BaseAgent):
     def __init__(self):
@@ -14,8 +16,12 @@ class LocationTrackingAgent(BaseAgent):
             return self.track_vehicle(input_data)
         elif action == 'track_garage':
             return self.track_garage_movement(input_data)
+        elif action == 'update_position':
+            return self.update_garage_position(input_data)
         elif action == 'simulate_movement':
             return self.simulate_movement(input_data)
+        elif action == 'simulate_fleet':
+            return self.simulate_fleet(input_data)
         else:
             return self.get_current_location(input_data)
     
@@ -54,7 +60,43 @@ class LocationTrackingAgent(BaseAgent):
             "decision": f"Tracking vehicle #{vehicle_id} - currently stationary"
         }
     
+    def update_garage_position(self, input_data: dict) -> dict:
+        breakdown_id = input_data.get('breakdown_id')
+        result = update_tracking_position(
+            breakdown_id,
+            input_data.get('latitude'),
+            input_data.get('longitude'),
+            input_data.get('timestamp'),
+            input_data.get('speed_kmh')
+        )
+        
+        if not result.get('success'):
+            return result
+        
+        state = result['tracking']
+        return {
+            "success": True,
+            "tracking": state,
+            "decision": f"Garage vehicle {state['remaining_distance_km']} km away, ETA {state['eta_minutes']} min"
+        }
+    
     def track_garage_movement(self, input_data: dict) -> dict:
+        breakdown_id = input_data.get('breakdown_id')
+        state = tracking_store.get_state(breakdown_id) if breakdown_id else None
+        if state is not None:
+            return {
+                "success": True,
+                "current_location": {
+                    "latitude": state['latitude'],
+                    "longitude": state['longitude']
+                },
+                "remaining_distance_km": state['remaining_distance_km'],
+                "estimated_speed_kmh": state['speed_kmh'],
+                "eta_minutes": state['eta_minutes'],
+                "arrived": state['arrived'],
+                "decision": f"Live position for breakdown #{breakdown_id}: {state['remaining_distance_km']} km remaining"
+            }
+        
         garage_lat = input_data.get('garage_latitude')
         garage_lng = input_data.get('garage_longitude')
         vehicle_lat = input_data.get('vehicle_latitude')
@@ -117,15 +159,35 @@ class LocationTrackingAgent(BaseAgent):
             "decision": f"Generated {steps}-step movement path"
         }
     
-    def calculate_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
-        R = 6371
+    def simulate_fleet(self, input_data: dict) -> dict:
+        count = int(input_data.get('count', 100))
+        steps = int(input_data.get('steps', 60))
         
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lng = math.radians(lng2 - lng1)
+        if count < 1 or steps < 2:
+            return {"success": False, "error": "count must be at least 1 and steps at least 2"}
         
-        a = math.sin(delta_lat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lng/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+        tracks = generate_tracks(
+            count,
+            steps,
+            center_lat=input_data.get('center_latitude', 28.6139),
+            center_lng=input_data.get('center_longitude', 77.2090),
+            spread_km=input_data.get('spread_km', 15.0),
+            seed=input_data.get('seed')
+        )
         
-        return round(R * c, 2)
+        result = {
+            "success": True,
+            "count": count,
+            "steps": steps,
+            "avg_trip_km": round(float(tracks['trip_km'].mean()), 2),
+            "decision": f"Generated {count} movement tracks of {steps} steps"
+        }
+        if input_data.get('include_paths'):
+            result["paths"] = [
+                {"latitudes": lats.round(6).tolist(), "longitudes": lngs.round(6).tolist()}
+                for lats, lngs in zip(tracks['lats'], tracks['lngs'])
+            ]
+        return result
+    
+    def calculate_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+        return round(haversine_km(lat1, lng1, lat2, lng2), 2)
@@ -9,6 +9,8 @@ from backend.agents.eta_agent import ETAEstimationAgent
 from backend.agents.pricing_agent import PricingAgent
 from backend.agents.visualization_agent import VisualizationAgent
 from backend.agents.feedback_agent import FeedbackRCAAgent
+from backend.agents.dispatch_agent import DispatchAgent
+from backend.agents.campaign_agent import CampaignAgent
 
 class MasterOrchestrator(BaseAgent):
     def __init__(self):
@@ -24,7 +26,9 @@ class MasterOrchestrator(BaseAgent):
             'eta': ETAEstimationAgent(),
             'pricing': PricingAgent(),
             'visualization': VisualizationAgent(),
-            'feedback': FeedbackRCAAgent()
+            'feedback': FeedbackRCAAgent(),
+            'dispatch': DispatchAgent(),
+            'campaign': CampaignAgent()
         }
     
     def execute(self, input_data: dict) -> dict:
@@ -42,6 +46,10 @@ class MasterOrchestrator(BaseAgent):
             return self.handle_feedback_analysis(input_data)
         elif task_type == 'generate_visualization':
             return self.handle_visualization(input_data)
+        elif task_type == 'batch_dispatch':
+            return self.handle_batch_dispatch(input_data)
+        elif task_type == 'schedule_campaign':
+            return self.handle_campaign(input_data)
         else:
             return {"success": False, "error": f"Unknown task type: {task_type}"}
     
@@ -92,15 +100,15 @@ class MasterOrchestrator(BaseAgent):
         pricing_results = []
         
         if garage_result.get('success') and garage_result.get('recommendations'):
-            for garage in garage_result['recommendations'][:3]:
-                eta_input = {
-                    'garage_latitude': garage['latitude'],
-                    'garage_longitude': garage['longitude'],
-                    'vehicle_latitude': input_data.get('latitude'),
-                    'vehicle_longitude': input_data.get('longitude'),
-                    'breakdown_type': input_data.get('breakdown_type')
-                }
-                eta = self.agents['eta'].run(eta_input)
+            top_garages = garage_result['recommendations'][:3]
+            eta_input = {
+                'garages': top_garages,
+                'vehicle_latitude': input_data.get('latitude'),
+                'vehicle_longitude': input_data.get('longitude'),
+                'breakdown_type': input_data.get('breakdown_type')
+            }
+            eta_batch = self.agents['eta'].run(eta_input)
+            for garage, eta in zip(top_garages, eta_batch.get('estimates', [])):
                 eta_results.append({
                     'garage_id': garage['id'],
                     'garage_name': garage['name'],
@@ -133,5 +141,11 @@ class MasterOrchestrator(BaseAgent):
     def handle_visualization(self, input_data: dict) -> dict:
         return self.agents['visualization'].run(input_data)
     
+    def handle_batch_dispatch(self, input_data: dict) -> dict:
+        return self.agents['dispatch'].run(input_data)
+    
+    def handle_campaign(self, input_data: dict) -> dict:
+        return self.agents['campaign'].run(input_data)
+    
     def get_agent(self, agent_name: str):
         return self.agents.get(agent_name)
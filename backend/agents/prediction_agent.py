@@ -1,13 +1,53 @@
 from backend.agents.base_agent import BaseAgent
 from datetime import datetime, timedelta
 import numpy as np
+from backend.ml.service_interval_model import get_model, get_model_error
 
 class PredictionAgent(BaseAgent):
     def __init__(self):
         super().__init__("PredictionAgent")
     
     def execute(self, input_data: dict) -> dict:
-        last_service_date = input_data.get('last_service_date')
+        model = get_model()
+        
+        if model is not None:
+            interval_days, breakdown_risk = model.predict_one(self.model_features(input_data))
+            return self.build_prediction(input_data, interval_days / 30, breakdown_risk, model.version)
+        
+        result = self.build_prediction(input_data, self.rule_based_months(input_data))
+        if get_model_error():
+            result["model_error"] = get_model_error()
+        return result
+    
+    def predict_batch(self, inputs: list) -> list:
+        model = get_model()
+        
+        if model is None or not inputs:
+            return [self.execute(input_data) for input_data in inputs]
+        
+        interval_days, breakdown_risk = model.predict_batch([self.model_features(i) for i in inputs])
+        
+        return [
+            self.build_prediction(input_data, float(days) / 30, float(risk), model.version)
+            for input_data, days, risk in zip(inputs, interval_days, breakdown_risk)
+        ]
+    
+    def model_features(self, input_data: dict) -> dict:
+        vehicle_year = input_data.get('vehicle_year')
+        
+        return {
+            'vehicle_age_years': datetime.now().year - vehicle_year if vehicle_year else None,
+            'avg_km_per_month': input_data.get('avg_km_per_month'),
+            'service_interval_km': input_data.get('service_interval_km'),
+            'service_interval_months': input_data.get('service_interval_months'),
+            'breakdown_count': input_data.get('breakdown_count', 0),
+            'engine_health': input_data.get('engine_health'),
+            'brake_health': input_data.get('brake_health'),
+            'battery_health': input_data.get('battery_health'),
+            'tire_health': input_data.get('tire_health')
+        }
+    
+    def rule_based_months(self, input_data: dict) -> float:
         avg_km_per_month = input_data.get('avg_km_per_month', 1000)
         service_interval_km = input_data.get('service_interval_km', 10000)
         service_interval_months = input_data.get('service_interval_months', 6)
@@ -16,11 +56,6 @@ class PredictionAgent(BaseAgent):
         brake_health = input_data.get('brake_health', 100)
         battery_health = input_data.get('battery_health', 100)
         
-        if isinstance(last_service_date, str):
-            last_service_date = datetime.fromisoformat(last_service_date)
-        elif last_service_date is None:
-            last_service_date = datetime.now() - timedelta(days=180)
-        
         months_to_km_limit = service_interval_km / avg_km_per_month if avg_km_per_month > 0 else 12
         
         predicted_months = min(months_to_km_limit, service_interval_months)
@@ -29,7 +64,23 @@ class PredictionAgent(BaseAgent):
         breakdown_penalty = breakdown_count * 0.5
         
         adjusted_months = predicted_months * health_factor - breakdown_penalty
-        adjusted_months = max(0.5, adjusted_months)
+        return max(0.5, adjusted_months)
+    
+    def build_prediction(self, input_data: dict, adjusted_months: float,
+                         breakdown_risk: float = None, model_version: str = None) -> dict:
+        last_service_date = input_data.get('last_service_date')
+        breakdown_count = input_data.get('breakdown_count', 0)
+        engine_health = input_data.get('engine_health', 100)
+        brake_health = input_data.get('brake_health', 100)
+        battery_health = input_data.get('battery_health', 100)
+        
+        if isinstance(last_service_date, str):
+            last_service_date = datetime.fromisoformat(last_service_date)
+        elif last_service_date is None:
+            last_service_date = datetime.now() - timedelta(days=180)
+        
+        health_factor = (engine_health + brake_health + battery_health) / 300
+        breakdown_penalty = breakdown_count * 0.5
         
         next_service_date = last_service_date + timedelta(days=int(adjusted_months * 30))
         
@@ -62,13 +113,14 @@ class PredictionAgent(BaseAgent):
         else:
             alert_trigger = "low"
         
-        return {
+        result = {
             "success": True,
             "predicted_service_date": next_service_date.isoformat(),
             "days_until_service": days_until_service,
             "urgency_score": round(urgency_score, 2),
             "confidence_score": round(confidence, 2),
             "alert_trigger": alert_trigger,
+            "prediction_source": f"model:{model_version}" if model_version else "rules",
             "decision": f"Predicted next service in {days_until_service} days with {urgency_score:.0f}% urgency",
             "factors": {
                 "health_factor": round(health_factor, 2),
@@ -76,3 +128,8 @@ class PredictionAgent(BaseAgent):
                 "adjusted_interval_months": round(adjusted_months, 1)
             }
         }
+        
+        if breakdown_risk is not None:
+            result["breakdown_risk"] = round(breakdown_risk, 3)
+        
+        return result
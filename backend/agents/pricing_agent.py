@@ -1,5 +1,5 @@
 from backend.agents.base_agent import BaseAgent
-from database.models import SparePart, get_db_session
+from backend.services.parts_catalog import parts_catalog
 
 class PricingAgent(BaseAgent):
     def __init__(self):
@@ -26,6 +26,24 @@ class PricingAgent(BaseAgent):
             'general': 500,
             'regular_service': 1500
         }
+        
+        self.parts_mapping = {
+            'flat_tire': [('Tire', 3500), ('Tube', 500)],
+            'tire': [('Tire', 3500), ('Tube', 500)],
+            'battery': [('Battery 12V', 5000)],
+            'battery_dead': [('Battery 12V', 5000)],
+            'brake': [('Brake Pads Set', 2500), ('Brake Fluid', 400)],
+            'brake_failure': [('Brake Pads Set', 2500), ('Brake Disc', 3000), ('Brake Fluid', 400)],
+            'engine': [('Engine Oil 5L', 2500), ('Oil Filter', 350), ('Air Filter', 450)],
+            'overheating': [('Coolant 2L', 600), ('Thermostat', 1200), ('Radiator Hose', 800)],
+            'electrical': [('Fuse Kit', 300), ('Wiring Harness', 1500)],
+            'oil_leak': [('Oil Gasket Set', 800), ('Engine Oil 5L', 2500)],
+            'coolant': [('Coolant 2L', 600), ('Radiator Cap', 200)],
+            'starter': [('Starter Motor', 4500)],
+            'alternator': [('Alternator', 6000), ('Belt', 800)],
+            'transmission': [('Transmission Fluid', 1200), ('Clutch Kit', 8000)],
+            'regular_service': [('Engine Oil 5L', 2500), ('Oil Filter', 350), ('Air Filter', 450), ('Spark Plugs Set', 600)]
+        }
     
     def execute(self, input_data: dict) -> dict:
         breakdown_type = input_data.get('breakdown_type', 'general')
@@ -77,31 +95,11 @@ class PricingAgent(BaseAgent):
         return self.base_labor_rates['general']
     
     def get_required_parts(self, breakdown_type: str, vehicle_make: str, vehicle_model: str) -> dict:
-        parts_mapping = {
-            'flat_tire': [('Tire', 3500), ('Tube', 500)],
-            'tire': [('Tire', 3500), ('Tube', 500)],
-            'battery': [('Battery 12V', 5000)],
-            'battery_dead': [('Battery 12V', 5000)],
-            'brake': [('Brake Pads Set', 2500), ('Brake Fluid', 400)],
-            'brake_failure': [('Brake Pads Set', 2500), ('Brake Disc', 3000), ('Brake Fluid', 400)],
-            'engine': [('Engine Oil 5L', 2500), ('Oil Filter', 350), ('Air Filter', 450)],
-            'overheating': [('Coolant 2L', 600), ('Thermostat', 1200), ('Radiator Hose', 800)],
-            'electrical': [('Fuse Kit', 300), ('Wiring Harness', 1500)],
-            'oil_leak': [('Oil Gasket Set', 800), ('Engine Oil 5L', 2500)],
-            'coolant': [('Coolant 2L', 600), ('Radiator Cap', 200)],
-            'starter': [('Starter Motor', 4500)],
-            'alternator': [('Alternator', 6000), ('Belt', 800)],
-            'transmission': [('Transmission Fluid', 1200), ('Clutch Kit', 8000)],
-            'regular_service': [('Engine Oil 5L', 2500), ('Oil Filter', 350), ('Air Filter', 450), ('Spark Plugs Set', 600)]
-        }
-        
-        db = get_db_session()
-        
         try:
             breakdown_lower = breakdown_type.lower().replace(' ', '_')
             default_parts = []
             
-            for key, parts in parts_mapping.items():
+            for key, parts in self.parts_mapping.items():
                 if key in breakdown_lower or breakdown_lower in key:
                     default_parts = parts
                     break
@@ -110,32 +108,28 @@ class PricingAgent(BaseAgent):
             total = 0
             
             for part_name, default_price in default_parts:
-                db_part = db.query(SparePart).filter(
-                    SparePart.name.ilike(f"%{part_name}%")
-                ).first()
+                part = parts_catalog.find_by_name(part_name)
                 
-                if db_part:
-                    price = db_part.oem_price
-                    in_stock = db_part.quantity_in_stock > 0
+                if part:
+                    price = part.oem_price
+                    in_stock = part.quantity_in_stock > 0
                 else:
                     price = default_price
                     in_stock = True
                 
                 parts_info.append({
                     "name": part_name,
+                    "part_number": part.part_number if part else None,
                     "oem_price": price,
                     "in_stock": in_stock,
                     "quantity": 1
                 })
                 total += price
             
-            db.close()
-            
             return {
                 "parts": parts_info,
                 "total": total
             }
             
         except Exception as e:
-            db.close()
             return {"parts": [], "total": 0}
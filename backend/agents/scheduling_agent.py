@@ -1,10 +1,17 @@
 from backend.agents.base_agent import BaseAgent
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from database.models import ServiceSlot, ServiceRequest, Garage, get_db_session
+from backend.services.garage_catalog import garage_catalog
+from backend.services.garage_load import adjust_garage_load, garage_loads
+from backend.services.slot_calendar import claim_slot, slot_calendar
+from backend.services.slot_horizon import SLOT_CAPACITY, block_label, garage_blocks, parse_working_days
 
 class SchedulingAgent(BaseAgent):
     def __init__(self):
         super().__init__("SchedulingAgent")
+        
+        self.max_booking_attempts = 5
+        self.fallback_search_days = 14
     
     def execute(self, input_data: dict) -> dict:
         vehicle_id = input_data.get('vehicle_id')
@@ -18,94 +25,69 @@ class SchedulingAgent(BaseAgent):
         db = get_db_session()
         
         try:
-            available_slot = None
-            selected_garage = None
+            booked = None
+            conflicts = 0
             
-            if garage_id:
-                slot = db.query(ServiceSlot).filter(
-                    ServiceSlot.garage_id == garage_id,
-                    ServiceSlot.date >= preferred_date,
-                    ServiceSlot.is_available == True,
-                    ServiceSlot.current_bookings < ServiceSlot.max_capacity
-                ).order_by(ServiceSlot.date).first()
-                
-                if slot:
-                    available_slot = slot
-                    selected_garage = db.query(Garage).filter(Garage.id == garage_id).first()
-            
-            if not available_slot:
-                slots = db.query(ServiceSlot).join(Garage).filter(
-                    ServiceSlot.date >= preferred_date,
-                    ServiceSlot.is_available == True,
-                    ServiceSlot.current_bookings < ServiceSlot.max_capacity,
-                    Garage.is_active == True
-                ).order_by(ServiceSlot.date).limit(5).all()
-                
-                if slots:
-                    available_slot = slots[0]
-                    selected_garage = db.query(Garage).filter(
-                        Garage.id == available_slot.garage_id
-                    ).first()
+            for _ in range(self.max_booking_attempts):
+                slot_id, selected_garage = self.find_slot(db, preferred_date, garage_id)
+                if slot_id is None:
+                    break
+                if claim_slot(db, slot_id):
+                    booked = slot_id
+                    break
+                # Someone else took the last seat between lookup and claim
+                conflicts += 1
+                slot_calendar.mark_full(slot_id)
             
-            if not available_slot:
-                search_date = preferred_date
-                for i in range(14):
-                    search_date = preferred_date + timedelta(days=i)
-                    garages = db.query(Garage).filter(Garage.is_active == True).all()
-                    
-                    for garage in garages:
-                        if garage.current_load < garage.capacity:
-                            new_slot = ServiceSlot(
-                                garage_id=garage.id,
-                                date=search_date,
-                                time_slot="09:00-12:00",
-                                is_available=True,
-                                max_capacity=3,
-                                current_bookings=0
-                            )
-                            db.add(new_slot)
-                            db.commit()
-                            available_slot = new_slot
-                            selected_garage = garage
-                            break
-                    
-                    if available_slot:
-                        break
-            
-            if available_slot and selected_garage:
+            if booked is not None:
+                slot = db.query(ServiceSlot.date, ServiceSlot.time_slot).filter(ServiceSlot.id == booked).first()
                 service_request = ServiceRequest(
                     vehicle_id=vehicle_id,
                     garage_id=selected_garage.id,
                     service_type=service_type,
                     requested_date=preferred_date,
-                    scheduled_date=available_slot.date,
+                    scheduled_date=slot.date,
                     status='open',
                     priority='medium'
                 )
                 db.add(service_request)
-                
-                available_slot.current_bookings += 1
-                if available_slot.current_bookings >= available_slot.max_capacity:
-                    available_slot.is_available = False
+                adjust_garage_load(db, selected_garage.id, 1)
                 
                 db.commit()
+                if booked in slot_calendar:
+                    slot_calendar.adjust(booked, -1)
+                else:
+                    slot_calendar.invalidate()
                 
                 result = {
                     "success": True,
                     "slot_found": True,
-                    "scheduled_date": available_slot.date.isoformat(),
-                    "time_slot": available_slot.time_slot,
+                    "scheduled_date": slot.date.isoformat(),
+                    "time_slot": slot.time_slot,
                     "garage_name": selected_garage.name,
                     "garage_id": selected_garage.id,
                     "service_request_id": service_request.id,
-                    "is_preferred_date": available_slot.date.date() == preferred_date.date(),
-                    "decision": f"Scheduled service at {selected_garage.name} on {available_slot.date.strftime('%Y-%m-%d')}"
+                    "is_preferred_date": slot.date.date() == preferred_date.date(),
+                    "booking_conflicts": conflicts,
+                    "decision": f"Scheduled service at {selected_garage.name} on {slot.date.strftime('%Y-%m-%d')}"
+                }
+            elif conflicts >= self.max_booking_attempts:
+                db.rollback()
+                result = {
+                    "success": True,
+                    "slot_found": False,
+                    "conflict": True,
+                    "message": "Slots kept filling up while booking, please try again",
+                    "booking_conflicts": conflicts,
+                    "decision": "Gave up after repeated booking conflicts"
                 }
             else:
+                db.rollback()
                 result = {
                     "success": True,
                     "slot_found": False,
-                    "message": "No available slots found in the next 14 days",
+                    "message": "No garage has capacity for a new slot",
+                    "booking_conflicts": conflicts,
                     "decision": "Unable to find available slot"
                 }
             
@@ -116,3 +98,78 @@ class SchedulingAgent(BaseAgent):
             db.rollback()
             db.close()
             return {"success": False, "error": str(e)}
+    
+    def find_slot(self, db, preferred_date: datetime, garage_id: int = None) -> tuple:
+        if slot_calendar.covers(preferred_date.date()):
+            found = None
+            if garage_id:
+                found = slot_calendar.earliest(preferred_date, [garage_id])
+            if not found:
+                found = slot_calendar.earliest(preferred_date)
+            if found:
+                return found['slot_id'], garage_catalog.get(found['garage_id'])
+        else:
+            slot, garage = self.find_slot_beyond_horizon(db, preferred_date, garage_id)
+            if slot:
+                return slot.id, garage
+        
+        return self.create_fallback_slot(db, preferred_date, garage_id)
+    
+    def create_fallback_slot(self, db, preferred_date: datetime, garage_id: int = None) -> tuple:
+        # The requested garage goes first; a new slot lands on a working day and standard block
+        # that no existing slot already covers, so a full slot is never duplicated
+        garages = [g for g in garage_catalog.active() if garage_loads.get(g.id, g.current_load) < g.capacity]
+        garages.sort(key=lambda g: g.id != garage_id)
+        if not garages:
+            return None, None
+        
+        first_day = preferred_date.date()
+        earliest = preferred_date.replace(minute=0, second=0, microsecond=0)
+        window_start = datetime.combine(first_day, datetime.min.time())
+        window_end = window_start + timedelta(days=self.fallback_search_days)
+        taken = {
+            (row.garage_id, row.date.date(), row.time_slot)
+            for row in db.query(ServiceSlot.garage_id, ServiceSlot.date, ServiceSlot.time_slot).filter(
+                ServiceSlot.garage_id.in_([g.id for g in garages]),
+                ServiceSlot.date >= window_start,
+                ServiceSlot.date < window_end
+            ).all()
+        }
+        
+        for garage in garages:
+            open_days = parse_working_days(garage.working_days)
+            blocks = garage_blocks(garage.opening_time, garage.closing_time)
+            for offset in range(self.fallback_search_days):
+                day = first_day + timedelta(days=offset)
+                if day.weekday() not in open_days:
+                    continue
+                for block in blocks:
+                    start = datetime.combine(day, time(block[0]))
+                    if start < earliest or (garage.id, day, block_label(block)) in taken:
+                        continue
+                    new_slot = ServiceSlot(
+                        garage_id=garage.id,
+                        date=start,
+                        time_slot=block_label(block),
+                        is_available=True,
+                        max_capacity=SLOT_CAPACITY,
+                        current_bookings=0
+                    )
+                    db.add(new_slot)
+                    db.flush()
+                    return new_slot.id, garage
+        return None, None
+    
+    def find_slot_beyond_horizon(self, db, preferred_date: datetime, garage_id: int = None) -> tuple:
+        query = db.query(ServiceSlot).join(Garage).filter(
+            ServiceSlot.date >= preferred_date,
+            ServiceSlot.is_available == True,
+            ServiceSlot.current_bookings < ServiceSlot.max_capacity,
+            Garage.is_active == True
+        )
+        slot = None
+        if garage_id:
+            slot = query.filter(ServiceSlot.garage_id == garage_id).order_by(ServiceSlot.date).first()
+        if not slot:
+            slot = query.order_by(ServiceSlot.date).first()
+        return (slot, garage_catalog.get(slot.garage_id)) if slot else (None, None)
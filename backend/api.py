@@ -1,17 +1,21 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 from functools import wraps
 import os
 
-from utils.auth import create_access_token, decode_token, hash_password, verify_password
+from utils.auth import STREAM_SCOPE, STREAM_TOKEN_EXPIRE_MINUTES, create_access_token, create_stream_token, decode_token, hash_password, verify_password
 from database.models import User, get_db_session, init_db
-from backend.services.vehicle_service import get_user_vehicles, get_vehicle_details, get_vehicle_prediction, get_all_vehicles
-from backend.services.service_request_service import schedule_service, get_user_service_requests, get_all_service_requests, update_service_status
-from backend.services.breakdown_service import report_breakdown, get_user_breakdowns, get_all_breakdowns, update_breakdown_status, get_breakdown_details
-from backend.services.garage_service import get_all_garages, get_garage_details, add_garage, update_garage, delete_garage, get_nearby_garages
+from backend.services.vehicle_service import get_user_vehicles, get_vehicle_details, get_vehicle_prediction, get_vehicle_predictions, get_all_vehicles, get_vehicle_health_history
+from backend.services.service_request_service import schedule_service, schedule_campaign, get_available_slots_nearby, get_user_service_requests, get_all_service_requests, update_service_status
+from backend.services.breakdown_service import report_breakdown, get_user_breakdowns, get_all_breakdowns, update_breakdown_status, get_breakdown_details, dispatch_open_breakdowns
+from backend.services.garage_service import get_all_garages, get_garage_details, add_garage, update_garage, delete_garage, get_nearby_garages, get_garage_catalog_stats
 from backend.services.spare_parts_service import get_all_spare_parts, get_parts_for_breakdown, add_spare_part, update_spare_part
 from backend.services.analytics_service import get_dashboard_stats, get_breakdown_analytics, get_service_analytics, get_garage_performance, get_agent_logs
-from backend.services.alert_service import get_user_alerts, mark_alert_read, dismiss_alert, get_all_alerts
+from backend.services.alert_service import get_user_alerts, mark_alert_read, dismiss_alert, get_all_alerts, get_alert_events_since
+from backend.services.event_stream import alert_broker, alert_topic, tracking_broker, tracking_topic, stream_events
+from backend.services.telemetry_service import ingest_readings, get_ingest_stats
+from backend.services.tracking_service import update_tracking_position, get_tracking_state, get_tracking_stats, get_tracking_events_since
+from backend.services.background_jobs import start_background_jobs
 from backend.agents.orchestrator import MasterOrchestrator
 
 app = Flask(__name__)
@@ -20,21 +24,29 @@ CORS(app)
 
 orchestrator = MasterOrchestrator()
 
+def get_request_token(allow_query: bool = False):
+    token = None
+    
+    if 'Authorization' in request.headers:
+        auth_header = request.headers['Authorization']
+        if auth_header.startswith('Bearer '):
+            token = auth_header.split(' ')[1]
+    
+    if not token and allow_query:
+        token = request.args.get('token')
+    
+    return token
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
+        token = get_request_token()
         
         if not token:
             return jsonify({'success': False, 'error': 'Token is missing'}), 401
         
         payload = decode_token(token)
-        if not payload:
+        if not payload or payload.get('scope'):
             return jsonify({'success': False, 'error': 'Token is invalid or expired'}), 401
         
         request.user = payload
@@ -42,6 +54,30 @@ def token_required(f):
     
     return decorated
 
+def stream_token_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = get_request_token(allow_query=True)
+        
+        if not token:
+            return jsonify({'success': False, 'error': 'Token is missing'}), 401
+        
+        payload = decode_token(token)
+        if not payload or payload.get('scope') != STREAM_SCOPE:
+            return jsonify({'success': False, 'error': 'Stream token is invalid or expired'}), 401
+        
+        request.user = payload
+        return f(*args, **kwargs)
+    
+    return decorated
+
+def get_last_event_id():
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        return int(last_event_id) if last_event_id else None
+    except ValueError:
+        return None
+
 def admin_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -103,6 +139,13 @@ def get_vehicles():
         vehicles = get_user_vehicles(user_id)
     return jsonify({'success': True, 'vehicles': vehicles})
 
+@app.route('/api/vehicles/predictions', methods=['GET'])
+@token_required
+def get_predictions():
+    owner_id = None if request.user.get('role') == 'admin' else request.user.get('user_id')
+    result = get_vehicle_predictions(owner_id)
+    return jsonify(result), 200 if result.get('success') else 500
+
 @app.route('/api/vehicles/<int:vehicle_id>', methods=['GET'])
 @token_required
 def get_vehicle(vehicle_id):
@@ -119,6 +162,52 @@ def get_prediction(vehicle_id):
     return jsonify(result)
 
 
+def can_view_vehicle(vehicle: dict) -> bool:
+    return request.user.get('role') == 'admin' or vehicle.get('owner_id') == request.user.get('user_id')
+
+@app.route('/api/vehicles/<int:vehicle_id>/health-history', methods=['GET'])
+@token_required
+def vehicle_health_history(vehicle_id):
+    vehicle = get_vehicle_details(vehicle_id)
+    if not vehicle or not can_view_vehicle(vehicle):
+        return jsonify({'success': False, 'error': 'Vehicle not found'}), 404
+    field = request.args.get('field', 'engine_health')
+    days = request.args.get('days', 90, type=int)
+    result = get_vehicle_health_history([vehicle_id], field, days)
+    return jsonify(result)
+
+@app.route('/api/analytics/health-history', methods=['POST'])
+@token_required
+@admin_required
+def fleet_health_history():
+    data = request.get_json(silent=True) or {}
+    result = get_vehicle_health_history(
+        data.get('vehicle_ids', []),
+        data.get('field', 'engine_health'),
+        data.get('days', 90)
+    )
+    return jsonify(result)
+
+@app.route('/api/telemetry', methods=['POST'])
+@token_required
+def ingest_telemetry():
+    data = request.get_json(silent=True) or {}
+    owner_id = None if request.user.get('role') == 'admin' else request.user.get('user_id')
+    result = ingest_readings(data.get('readings'), owner_id)
+    
+    if not result.get('success'):
+        if result.get('forbidden'):
+            return jsonify(result), 404
+        return jsonify(result), 503 if result.get('retry') else 400
+    return jsonify(result), 202
+
+@app.route('/api/telemetry/stats', methods=['GET'])
+@token_required
+@admin_required
+def telemetry_stats():
+    return jsonify({'success': True, 'stats': get_ingest_stats()})
+
+
 @app.route('/api/services', methods=['GET'])
 @token_required
 def get_services():
@@ -141,6 +230,27 @@ def create_service():
     )
     return jsonify(result)
 
+@app.route('/api/services/campaign', methods=['POST'])
+@token_required
+@admin_required
+def create_campaign():
+    data = request.get_json(silent=True) or {}
+    if not data.get('make'):
+        return jsonify({'success': False, 'error': 'make is required'}), 400
+    result = schedule_campaign(
+        make=data.get('make'),
+        model=data.get('model'),
+        year_from=data.get('year_from'),
+        year_to=data.get('year_to'),
+        service_type=data.get('service_type', 'Recall Campaign'),
+        start_date=data.get('start_date'),
+        days=data.get('days', 30),
+        max_distance_km=data.get('max_distance_km', 50),
+        description=data.get('description'),
+        commit=not data.get('dry_run', False)
+    )
+    return jsonify(result)
+
 @app.route('/api/services/<int:service_id>', methods=['PATCH'])
 @token_required
 @admin_required
@@ -178,6 +288,19 @@ def create_breakdown():
     )
     return jsonify(result)
 
+@app.route('/api/breakdowns/dispatch', methods=['POST'])
+@token_required
+@admin_required
+def dispatch_breakdowns():
+    data = request.get_json(silent=True) or {}
+    result = dispatch_open_breakdowns(
+        breakdown_ids=data.get('breakdown_ids'),
+        max_distance_km=data.get('max_distance_km', 100),
+        method=data.get('method', 'auto'),
+        commit=not data.get('dry_run', False)
+    )
+    return jsonify(result)
+
 @app.route('/api/breakdowns/<int:breakdown_id>', methods=['GET'])
 @token_required
 def get_breakdown(breakdown_id):
@@ -199,6 +322,72 @@ def update_breakdown(breakdown_id):
     )
     return jsonify(result)
 
+@app.route('/api/breakdowns/<int:breakdown_id>/position', methods=['POST'])
+@token_required
+@admin_required
+def update_breakdown_position(breakdown_id):
+    data = request.get_json(silent=True) or {}
+    result = update_tracking_position(
+        breakdown_id,
+        data.get('latitude'),
+        data.get('longitude'),
+        data.get('timestamp'),
+        data.get('speed_kmh')
+    )
+    if result.get('invalid'):
+        return jsonify(result), 400
+    return jsonify(result), 200 if result.get('success') else 409
+
+def can_view_breakdown(breakdown: dict) -> bool:
+    return request.user.get('role') == 'admin' or breakdown.get('owner_id') == request.user.get('user_id')
+
+@app.route('/api/breakdowns/<int:breakdown_id>/tracking', methods=['GET'])
+@token_required
+def get_breakdown_tracking(breakdown_id):
+    breakdown = get_breakdown_details(breakdown_id)
+    if not breakdown or not can_view_breakdown(breakdown):
+        return jsonify({'success': False, 'error': 'Breakdown not found'}), 404
+    result = get_tracking_state(breakdown_id)
+    return jsonify(result), 200 if result.get('success') else 404
+
+@app.route('/api/breakdowns/<int:breakdown_id>/tracking/stream-token', methods=['POST'])
+@token_required
+def create_tracking_stream_token(breakdown_id):
+    breakdown = get_breakdown_details(breakdown_id)
+    if not breakdown or not can_view_breakdown(breakdown):
+        return jsonify({'success': False, 'error': 'Breakdown not found'}), 404
+    
+    token = create_stream_token(request.user.get('user_id'), request.user.get('role'), tracking_topic(breakdown_id))
+    return jsonify({'success': True, 'token': token, 'expires_in': STREAM_TOKEN_EXPIRE_MINUTES * 60})
+
+@app.route('/api/breakdowns/<int:breakdown_id>/tracking/stream', methods=['GET'])
+@stream_token_required
+def stream_breakdown_tracking(breakdown_id):
+    if request.user.get('topic') != tracking_topic(breakdown_id):
+        return jsonify({'success': False, 'error': 'Token is not valid for this stream'}), 403
+    
+    breakdown = get_breakdown_details(breakdown_id)
+    if not breakdown or not can_view_breakdown(breakdown):
+        return jsonify({'success': False, 'error': 'Breakdown not found'}), 404
+    
+    events = stream_events(
+        tracking_broker,
+        tracking_topic(breakdown_id),
+        last_event_id=get_last_event_id() or 0,
+        backfill=lambda last_id: get_tracking_events_since(breakdown_id, last_id)
+    )
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/tracking/stats', methods=['GET'])
+@token_required
+@admin_required
+def tracking_stats():
+    return jsonify({'success': True, 'stats': get_tracking_stats()})
+
 
 @app.route('/api/garages', methods=['GET'])
 def list_garages():
@@ -218,10 +407,29 @@ def find_nearby_garages():
     lng = request.args.get('longitude', type=float)
     breakdown_type = request.args.get('breakdown_type')
     limit = request.args.get('limit', 5, type=int)
+    radius_km = request.args.get('radius_km', type=float)
     
-    result = get_nearby_garages(lat, lng, breakdown_type, limit)
+    result = get_nearby_garages(lat, lng, breakdown_type, limit, radius_km)
     return jsonify(result)
 
+@app.route('/api/slots/nearby', methods=['GET'])
+@token_required
+def find_nearby_slots():
+    lat = request.args.get('latitude', type=float)
+    lng = request.args.get('longitude', type=float)
+    radius_km = request.args.get('radius_km', 10, type=float)
+    days = request.args.get('days', 14, type=int)
+    limit = min(request.args.get('limit', 10, type=int), 100)
+    
+    result = get_available_slots_nearby(lat, lng, radius_km, request.args.get('start_date'), days, limit)
+    return jsonify(result), 200 if result.get('success') else 400
+
+@app.route('/api/garages/catalog/stats', methods=['GET'])
+@token_required
+@admin_required
+def garage_catalog_stats():
+    return jsonify({'success': True, 'stats': get_garage_catalog_stats()})
+
 @app.route('/api/garages', methods=['POST'])
 @token_required
 @admin_required
@@ -313,6 +521,32 @@ def get_alerts_list():
     
     return jsonify({'success': True, 'alerts': alerts})
 
+@app.route('/api/alerts/stream-token', methods=['POST'])
+@token_required
+def create_alert_stream_token():
+    user_id = request.user.get('user_id')
+    token = create_stream_token(user_id, request.user.get('role'), alert_topic(user_id))
+    return jsonify({'success': True, 'token': token, 'expires_in': STREAM_TOKEN_EXPIRE_MINUTES * 60})
+
+@app.route('/api/alerts/stream', methods=['GET'])
+@stream_token_required
+def stream_alerts():
+    user_id = request.user.get('user_id')
+    if request.user.get('topic') != alert_topic(user_id):
+        return jsonify({'success': False, 'error': 'Token is not valid for this stream'}), 403
+    
+    events = stream_events(
+        alert_broker,
+        alert_topic(user_id),
+        last_event_id=get_last_event_id(),
+        backfill=lambda last_id: get_alert_events_since(user_id, last_id)
+    )
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/alerts/<int:alert_id>/read', methods=['POST'])
 @token_required
 def mark_read(alert_id):
@@ -399,12 +633,14 @@ def api_info():
         'version': '1.0.0',
         'endpoints': {
             'auth': ['/api/auth/login', '/api/auth/verify'],
-            'vehicles': ['/api/vehicles', '/api/vehicles/<id>', '/api/vehicles/<id>/prediction'],
-            'services': ['/api/services'],
-            'breakdowns': ['/api/breakdowns'],
+            'vehicles': ['/api/vehicles', '/api/vehicles/predictions', '/api/vehicles/<id>', '/api/vehicles/<id>/prediction', '/api/vehicles/<id>/health-history'],
+            'telemetry': ['/api/telemetry', '/api/telemetry/stats'],
+            'services': ['/api/services', '/api/services/campaign'],
+            'breakdowns': ['/api/breakdowns', '/api/breakdowns/dispatch', '/api/breakdowns/<id>/tracking', '/api/breakdowns/<id>/tracking/stream-token', '/api/breakdowns/<id>/tracking/stream'],
             'garages': ['/api/garages', '/api/garages/nearby'],
+            'slots': ['/api/slots/nearby'],
             'parts': ['/api/parts'],
-            'alerts': ['/api/alerts'],
+            'alerts': ['/api/alerts', '/api/alerts/stream-token', '/api/alerts/stream'],
             'analytics': ['/api/analytics/dashboard', '/api/analytics/breakdowns', '/api/analytics/services'],
             'orchestrator': ['/api/orchestrator/predict', '/api/orchestrator/breakdown', '/api/orchestrator/schedule']
         }
@@ -413,8 +649,10 @@ def api_info():
 
 def create_app():
     init_db()
+    start_background_jobs()
     return app
 
 if __name__ == '__main__':
     init_db()
+    start_background_jobs()
     app.run(host='0.0.0.0', port=5001, debug=True)
@@ -0,0 +1,343 @@
+from datetime import datetime, timedelta
+import argparse
+import json
+import os
+import threading
+import time
+
+import joblib
+import numpy as np
+
+MODEL_DIR = os.environ.get("SERVICE_MODEL_DIR", "models/service_interval")
+RISK_HORIZON_DAYS = 90
+MIN_TRAINING_SAMPLES = 20
+
+FEATURES = [
+    ('vehicle_age_years', 3.0),
+    ('avg_km_per_month', None),
+    ('service_interval_km', 10000.0),
+    ('service_interval_months', 6.0),
+    ('breakdown_count', 0.0),
+    ('engine_health', None),
+    ('brake_health', None),
+    ('battery_health', None),
+    ('tire_health', None),
+]
+
+def build_feature_matrix(rows: list) -> np.ndarray:
+    matrix = np.empty((len(rows), len(FEATURES)), dtype=np.float32)
+    for j, (name, default) in enumerate(FEATURES):
+        column = [row.get(name) for row in rows]
+        # Features without a default are history-derived; training leaves them NaN when no
+        # reading exists, so serving must too instead of imputing perfect health
+        fill = np.nan if default is None else default
+        matrix[:, j] = [fill if v is None else v for v in column]
+    return matrix
+
+
+class ServiceIntervalModel:
+    def __init__(self, interval_model, risk_model, risk_prior: float, metadata: dict):
+        self.interval_model = interval_model
+        self.risk_model = risk_model
+        self.risk_prior = risk_prior
+        self.metadata = metadata
+
+    @property
+    def version(self) -> str:
+        return self.metadata.get('version')
+
+    def predict_matrix(self, X: np.ndarray) -> tuple:
+        interval_days = np.clip(self.interval_model.predict(X), 15, 730)
+        if self.risk_model is not None:
+            risk = self.risk_model.predict_proba(X)[:, 1]
+        else:
+            risk = np.full(len(X), self.risk_prior)
+        return interval_days, risk
+
+    def predict_batch(self, rows: list) -> tuple:
+        return self.predict_matrix(build_feature_matrix(rows))
+
+    def predict_one(self, row: dict) -> tuple:
+        interval_days, risk = self.predict_batch([row])
+        return float(interval_days[0]), float(risk[0])
+
+
+HEALTH_FIELDS = ['engine_health', 'brake_health', 'battery_health', 'tire_health']
+LOOKBACK_DAYS = 90
+MIN_USAGE_SPAN_DAYS = 7
+HOLDOUT_FRACTION = 0.2
+
+def point_in_time_features(vehicle_ids: list, starts: list) -> dict:
+    from backend.storage.health_history import get_health_history_store, make_key
+
+    n = len(vehicle_ids)
+    features = {field: np.full(n, np.nan) for field in HEALTH_FIELDS + ['avg_km_per_month']}
+    if not n:
+        return features
+
+    ids = np.asarray(vehicle_ids, dtype=np.int64)
+    at = np.array([int(s.timestamp()) for s in starts], dtype=np.int64)
+    since = at - LOOKBACK_DAYS * 86400
+    store = get_health_history_store()
+
+    def latest_before(history):
+        keys = make_key(history['vehicle_id'], history['timestamp'])
+        if not len(keys):
+            return np.zeros(n, dtype=bool), np.zeros(n, dtype=np.int64), keys
+        pos = np.searchsorted(keys, make_key(ids, at), side='right') - 1
+        safe = pos.clip(0)
+        found = (pos >= 0) & (history['vehicle_id'][safe] == ids) & (history['timestamp'][safe] >= since)
+        return found, safe, keys
+
+    for field in HEALTH_FIELDS:
+        history = store.read_range(np.unique(ids), field, since.min(), at.max())
+        found, pos, _ = latest_before(history)
+        features[field][found] = history['value'][pos[found]]
+
+    # Usage rate over the lookback window before each interval, from odometer readings
+    history = store.read_range(np.unique(ids), 'total_km', since.min(), at.max())
+    found, last, keys = latest_before(history)
+    if len(keys):
+        first = np.searchsorted(keys, make_key(ids, since), side='left').clip(0, len(keys) - 1)
+        span_days = (history['timestamp'][last] - history['timestamp'][first]) / 86400
+        usable = found & (history['vehicle_id'][first] == ids) & (span_days >= MIN_USAGE_SPAN_DAYS)
+        km = history['value'][last] - history['value'][first]
+        features['avg_km_per_month'][usable] = km[usable] / span_days[usable] * 30.44
+
+    return features
+
+
+def build_training_set(db) -> tuple:
+    from database.models import Vehicle, ServiceRequest, BreakdownEvent
+
+    vehicles = {v.id: v for v in db.query(Vehicle).all()}
+
+    services = {}
+    for vehicle_id, completed_date in db.query(
+        ServiceRequest.vehicle_id, ServiceRequest.completed_date
+    ).filter(ServiceRequest.completed_date != None).all():
+        services.setdefault(vehicle_id, []).append(completed_date)
+
+    breakdowns = {}
+    for vehicle_id, reported_at in db.query(
+        BreakdownEvent.vehicle_id, BreakdownEvent.reported_at
+    ).filter(BreakdownEvent.reported_at != None).all():
+        breakdowns.setdefault(vehicle_id, []).append(reported_at)
+
+    rows = []
+    starts = []
+    intervals = []
+    risk_labels = []
+
+    for vehicle_id, dates in services.items():
+        vehicle = vehicles.get(vehicle_id)
+        if not vehicle:
+            continue
+
+        dates = sorted(set(dates))
+        vehicle_breakdowns = sorted(breakdowns.get(vehicle_id, []))
+
+        for start, end in zip(dates, dates[1:]):
+            interval = (end - start).days
+            if interval <= 0:
+                continue
+
+            prior = sum(1 for b in vehicle_breakdowns if b <= start)
+            upcoming = any(start < b <= start + timedelta(days=RISK_HORIZON_DAYS) for b in vehicle_breakdowns)
+
+            rows.append({
+                'vehicle_id': vehicle_id,
+                'vehicle_age_years': start.year - vehicle.year if vehicle.year else None,
+                'service_interval_km': vehicle.service_interval_km,
+                'service_interval_months': vehicle.service_interval_months,
+                'breakdown_count': prior
+            })
+            starts.append(start)
+            intervals.append(interval)
+            risk_labels.append(1 if upcoming else 0)
+
+    # Health and usage as recorded when each interval started; the vehicle's current
+    # values would leak the future. Intervals without history stay NaN, which the
+    # gradient boosting models treat as missing.
+    history = point_in_time_features([r['vehicle_id'] for r in rows], starts)
+    for i, row in enumerate(rows):
+        for field, values in history.items():
+            row[field] = float(values[i])
+
+    return (
+        build_feature_matrix(rows),
+        np.array(intervals, dtype=np.float32),
+        np.array(risk_labels, dtype=np.int8),
+        np.array(starts, dtype='datetime64[s]')
+    )
+
+
+def train_model(db=None, model_dir: str = None) -> dict:
+    from sklearn.ensemble import HistGradientBoostingClassifier, HistGradientBoostingRegressor
+    from database.models import get_db_session
+
+    model_dir = model_dir or MODEL_DIR
+    owns_session = db is None
+    db = db or get_db_session()
+
+    try:
+        X, y_interval, y_risk, starts = build_training_set(db)
+    finally:
+        if owns_session:
+            db.close()
+
+    if len(X) < MIN_TRAINING_SAMPLES:
+        return {
+            "success": False,
+            "error": f"Need at least {MIN_TRAINING_SAMPLES} service intervals to train, found {len(X)}"
+        }
+
+    # Hold out the most recent intervals so the reported error is on data the model never saw
+    order = np.argsort(starts, kind='stable')
+    n_holdout = max(1, int(len(X) * HOLDOUT_FRACTION))
+    train_idx, holdout_idx = order[:-n_holdout], order[-n_holdout:]
+    holdout_model = HistGradientBoostingRegressor(max_iter=200, max_depth=4, random_state=42)
+    holdout_model.fit(X[train_idx], y_interval[train_idx])
+    holdout_mae = float(np.mean(np.abs(holdout_model.predict(X[holdout_idx]) - y_interval[holdout_idx])))
+
+    interval_model = HistGradientBoostingRegressor(max_iter=200, max_depth=4, random_state=42)
+    interval_model.fit(X, y_interval)
+
+    risk_model = None
+    risk_prior = float(y_risk.mean())
+    if 0 < y_risk.sum() < len(y_risk):
+        risk_model = HistGradientBoostingClassifier(max_iter=200, max_depth=4, random_state=42)
+        risk_model.fit(X, y_risk)
+
+    train_mae = float(np.mean(np.abs(interval_model.predict(X) - y_interval)))
+    health_columns = [i for i, (name, _) in enumerate(FEATURES) if name in HEALTH_FIELDS]
+    history_coverage = float(np.mean(~np.isnan(X[:, health_columns]).all(axis=1)))
+
+    version = datetime.now().strftime('%Y%m%d%H%M%S')
+    metadata = {
+        'version': version,
+        'trained_at': datetime.now().isoformat(),
+        'features': [name for name, _ in FEATURES],
+        'n_samples': int(len(X)),
+        'risk_horizon_days': RISK_HORIZON_DAYS,
+        'risk_prior': risk_prior,
+        'train_interval_mae_days': round(train_mae, 2),
+        'holdout_interval_mae_days': round(holdout_mae, 2),
+        'holdout_samples': int(n_holdout),
+        'health_history_coverage': round(history_coverage, 4)
+    }
+
+    version_dir = os.path.join(model_dir, f"v{version}")
+    os.makedirs(version_dir, exist_ok=True)
+    joblib.dump(
+        {'interval_model': interval_model, 'risk_model': risk_model, 'risk_prior': risk_prior},
+        os.path.join(version_dir, 'model.joblib')
+    )
+    with open(os.path.join(version_dir, 'metadata.json'), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    latest_tmp = os.path.join(model_dir, 'LATEST.tmp')
+    with open(latest_tmp, 'w') as f:
+        f.write(version)
+    os.replace(latest_tmp, os.path.join(model_dir, 'LATEST'))
+
+    return {"success": True, **metadata}
+
+
+_model_lock = threading.Lock()
+_loaded_model = None
+_loaded_checked = False
+_load_error = None
+
+def load_model(model_dir: str = None, version: str = None) -> ServiceIntervalModel:
+    model_dir = model_dir or MODEL_DIR
+
+    if version is None:
+        latest_path = os.path.join(model_dir, 'LATEST')
+        if not os.path.exists(latest_path):
+            return None
+        with open(latest_path) as f:
+            version = f.read().strip()
+
+    version_dir = os.path.join(model_dir, f"v{version}")
+    artifact = joblib.load(os.path.join(version_dir, 'model.joblib'), mmap_mode='r')
+    with open(os.path.join(version_dir, 'metadata.json')) as f:
+        metadata = json.load(f)
+
+    return ServiceIntervalModel(
+        artifact['interval_model'],
+        artifact['risk_model'],
+        artifact['risk_prior'],
+        metadata
+    )
+
+def get_model() -> ServiceIntervalModel:
+    global _loaded_model, _loaded_checked, _load_error
+
+    if _loaded_checked:
+        return _loaded_model
+
+    with _model_lock:
+        if not _loaded_checked:
+            try:
+                _loaded_model = load_model()
+                _load_error = None
+            except Exception as e:
+                _loaded_model = None
+                _load_error = f"Error loading service interval model: {e}"
+            _loaded_checked = True
+
+    return _loaded_model
+
+def get_model_error() -> str:
+    return _load_error
+
+def reload_model() -> ServiceIntervalModel:
+    global _loaded_checked
+    with _model_lock:
+        _loaded_checked = False
+    return get_model()
+
+
+def benchmark(n: int = 10000) -> dict:
+    model = get_model()
+    if model is None:
+        return {"success": False, "error": "No trained model found"}
+
+    rng = np.random.default_rng(0)
+    X = np.column_stack([
+        rng.uniform(0, 15, n),
+        rng.uniform(300, 4000, n),
+        rng.choice([6000, 10000, 15000], n),
+        rng.choice([4, 6, 12], n),
+        rng.integers(0, 5, n),
+        rng.uniform(20, 100, n),
+        rng.uniform(20, 100, n),
+        rng.uniform(20, 100, n),
+        rng.uniform(20, 100, n),
+    ]).astype(np.float32)
+
+    model.predict_matrix(X[:100])
+    start = time.perf_counter()
+    model.predict_matrix(X)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "success": True,
+        "model_version": model.version,
+        "vehicles": n,
+        "total_ms": round(elapsed * 1000, 2),
+        "us_per_vehicle": round(elapsed * 1e6 / n, 2)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Service interval model")
+    parser.add_argument('command', choices=['train', 'benchmark'])
+    parser.add_argument('--n', type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.command == 'train':
+        print(json.dumps(train_model(), indent=2))
+    else:
+        print(json.dumps(benchmark(args.n), indent=2))
@@ -0,0 +1,255 @@
+from datetime import datetime
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from backend.routing.road_graph import ACCESS_SPEED_KMH, MAX_SEARCH_SECONDS, MAX_SNAP_KM, get_road_graph, get_road_graph_error
+
+ETA_MATRIX_DIR = os.environ.get("ETA_MATRIX_DIR", "data/eta_matrix")
+CELL_DEG = 0.01
+RADIUS_KM = 40.0
+
+def _signature(garages: list, graph_version: str, cell_deg: float, window: int) -> str:
+    digest = hashlib.sha1(f"{graph_version}:{cell_deg}:{window}".encode())
+    for garage_id, lat, lng in garages:
+        digest.update(f"{garage_id}:{lat:.6f}:{lng:.6f};".encode())
+    return digest.hexdigest()
+
+def _read_latest(matrix_dir: str) -> str:
+    latest_path = os.path.join(matrix_dir, 'LATEST')
+    if not os.path.exists(latest_path):
+        return None
+    with open(latest_path) as f:
+        return f.read().strip()
+
+
+def build_eta_matrix(garages: list = None, matrix_dir: str = None, cell_deg: float = CELL_DEG,
+                     radius_km: float = RADIUS_KM, force: bool = False) -> dict:
+    from scipy.sparse.csgraph import dijkstra
+
+    matrix_dir = matrix_dir or ETA_MATRIX_DIR
+    graph = get_road_graph()
+    if graph is None:
+        return {"success": False, "error": get_road_graph_error() or "No road graph available"}
+
+    if garages is None:
+        from backend.services.garage_catalog import garage_catalog
+        garages = [(g.id, g.latitude, g.longitude) for g in garage_catalog.active()]
+    garages = sorted(garages)
+    if not garages:
+        return {"success": False, "error": "No active garages"}
+
+    window = 2 * int(np.ceil(radius_km / (cell_deg * 111.32))) + 1
+    signature = _signature(garages, graph.version, cell_deg, window)
+
+    latest = _read_latest(matrix_dir)
+    if latest and not force:
+        with open(os.path.join(matrix_dir, f"v{latest}", 'metadata.json')) as f:
+            if json.load(f).get('signature') == signature:
+                return {"success": True, "skipped": True, "version": latest}
+
+    start = time.perf_counter()
+    garage_ids = np.array([g[0] for g in garages], dtype=np.int64)
+    garage_lats = np.array([g[1] for g in garages], dtype=np.float64)
+    garage_lngs = np.array([g[2] for g in garages], dtype=np.float64)
+
+    half = window // 2
+    origin_lat = (np.round(garage_lats / cell_deg) - half) * cell_deg
+    origin_lng = (np.round(garage_lngs / cell_deg) - half) * cell_deg
+    offsets = np.arange(window) * cell_deg
+
+    version = datetime.now().strftime('%Y%m%d%H%M%S')
+    version_dir = os.path.join(matrix_dir, f"v{version}")
+    os.makedirs(version_dir, exist_ok=True)
+
+    times = np.lib.format.open_memmap(
+        os.path.join(version_dir, 'times.npy'), mode='w+', dtype=np.float32, shape=(len(garages), window, window)
+    )
+
+    garage_nodes, garage_snap = graph.snap(garage_lats, garage_lngs)
+    chunk = max(1, int(2e7 // max(graph.node_count, 1)))
+
+    for start_row in range(0, len(garages), chunk):
+        rows = np.arange(start_row, min(start_row + chunk, len(garages)))
+        from_garage = dijkstra(graph.graph, directed=True, indices=garage_nodes[rows], limit=MAX_SEARCH_SECONDS)
+
+        for i, row in enumerate(rows):
+            cell_lats = np.repeat(origin_lat[row] + offsets, window)
+            cell_lngs = np.tile(origin_lng[row] + offsets, window)
+            cell_nodes, cell_snap = graph.snap(cell_lats, cell_lngs)
+
+            seconds = from_garage[i, cell_nodes] + (cell_snap + garage_snap[row]) / ACCESS_SPEED_KMH * 3600
+            seconds[(cell_snap > MAX_SNAP_KM) | (garage_snap[row] > MAX_SNAP_KM)] = np.inf
+            times[row] = seconds.reshape(window, window).astype(np.float32)
+
+    times.flush()
+    del times
+
+    np.save(os.path.join(version_dir, 'garage_ids.npy'), garage_ids)
+    np.save(os.path.join(version_dir, 'origin.npy'), np.column_stack([origin_lat, origin_lng]))
+
+    metadata = {
+        'version': version,
+        'built_at': datetime.now().isoformat(),
+        'graph_version': graph.version,
+        'garages': len(garages),
+        'window': window,
+        'cell_deg': cell_deg,
+        'radius_km': radius_km,
+        'signature': signature,
+        'build_seconds': round(time.perf_counter() - start, 2)
+    }
+    with open(os.path.join(version_dir, 'metadata.json'), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    latest_tmp = os.path.join(matrix_dir, 'LATEST.tmp')
+    with open(latest_tmp, 'w') as f:
+        f.write(version)
+    os.replace(latest_tmp, os.path.join(matrix_dir, 'LATEST'))
+
+    reload_eta_matrix()
+    _remove_old_versions(matrix_dir, keep=[version, latest])
+    return {"success": True, **metadata}
+
+def _remove_old_versions(matrix_dir: str, keep: list):
+    import shutil
+    for name in os.listdir(matrix_dir):
+        if name.startswith('v') and name[1:] not in keep:
+            shutil.rmtree(os.path.join(matrix_dir, name), ignore_errors=True)
+
+
+class EtaMatrix:
+    def __init__(self, times: np.ndarray, garage_ids: np.ndarray, origin: np.ndarray, metadata: dict):
+        self.times = times
+        self.garage_ids = garage_ids
+        self.origin = origin
+        self.metadata = metadata
+        self.version = metadata.get('version')
+        self.cell_deg = metadata['cell_deg']
+        self.window = metadata['window']
+
+    def lookup(self, garage_ids, lats, lngs) -> np.ndarray:
+        garage_ids = np.atleast_1d(np.asarray(garage_ids, dtype=np.int64))
+        lats = np.broadcast_to(np.asarray(lats, dtype=np.float64), garage_ids.shape)
+        lngs = np.broadcast_to(np.asarray(lngs, dtype=np.float64), garage_ids.shape)
+        seconds = np.full(garage_ids.shape, np.nan)
+
+        rows = np.clip(np.searchsorted(self.garage_ids, garage_ids), 0, len(self.garage_ids) - 1)
+        known = self.garage_ids[rows] == garage_ids
+
+        fy = (lats - self.origin[rows, 0]) / self.cell_deg
+        fx = (lngs - self.origin[rows, 1]) / self.cell_deg
+        y0 = np.floor(fy).astype(np.int64)
+        x0 = np.floor(fx).astype(np.int64)
+        inside = known & (y0 >= 0) & (x0 >= 0) & (y0 < self.window - 1) & (x0 < self.window - 1)
+        if not inside.any():
+            return seconds
+
+        r, y, x = rows[inside], y0[inside], x0[inside]
+        wy = (fy[inside] - y)[:, None]
+        wx = (fx[inside] - x)[:, None]
+        corners = np.column_stack([
+            self.times[r, y, x], self.times[r, y, x + 1],
+            self.times[r, y + 1, x], self.times[r, y + 1, x + 1]
+        ]).astype(np.float64)
+        weights = np.column_stack([(1 - wy) * (1 - wx), (1 - wy) * wx, wy * (1 - wx), wy * wx])
+
+        # Unreachable corners drop out and the remaining weights are renormalised
+        finite = np.isfinite(corners)
+        weights = np.where(finite, weights, 0)
+        total = weights.sum(axis=1)
+        weighted = (np.where(finite, corners, 0) * weights).sum(axis=1)
+        seconds[inside] = np.where(total > 0, weighted / np.where(total > 0, total, 1), np.nan)
+        return seconds
+
+
+def load_eta_matrix(matrix_dir: str = None, version: str = None) -> EtaMatrix:
+    matrix_dir = matrix_dir or ETA_MATRIX_DIR
+    version = version or _read_latest(matrix_dir)
+    if version is None:
+        return None
+
+    version_dir = os.path.join(matrix_dir, f"v{version}")
+    with open(os.path.join(version_dir, 'metadata.json')) as f:
+        metadata = json.load(f)
+
+    return EtaMatrix(
+        np.load(os.path.join(version_dir, 'times.npy'), mmap_mode='r'),
+        np.load(os.path.join(version_dir, 'garage_ids.npy')),
+        np.load(os.path.join(version_dir, 'origin.npy')),
+        metadata
+    )
+
+
+_matrix_lock = threading.Lock()
+_loaded_matrix = None
+_loaded_checked = False
+
+def get_eta_matrix() -> EtaMatrix:
+    global _loaded_matrix, _loaded_checked
+
+    if _loaded_checked:
+        return _loaded_matrix
+
+    with _matrix_lock:
+        if not _loaded_checked:
+            try:
+                _loaded_matrix = load_eta_matrix()
+            except Exception as e:
+                print(f"Error loading ETA matrix: {e}")
+                _loaded_matrix = None
+            _loaded_checked = True
+
+    return _loaded_matrix
+
+def reload_eta_matrix() -> EtaMatrix:
+    global _loaded_checked
+    with _matrix_lock:
+        _loaded_checked = False
+    return get_eta_matrix()
+
+def refresh_eta_matrix() -> dict:
+    return build_eta_matrix()
+
+
+def benchmark(pairs: int = 100000) -> dict:
+    matrix = get_eta_matrix()
+    if matrix is None:
+        return {"success": False, "error": "No ETA matrix found"}
+
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, len(matrix.garage_ids), pairs)
+    span = (matrix.window - 1) * matrix.cell_deg
+    lats = matrix.origin[rows, 0] + rng.uniform(0, span, pairs)
+    lngs = matrix.origin[rows, 1] + rng.uniform(0, span, pairs)
+
+    start = time.perf_counter()
+    seconds = matrix.lookup(matrix.garage_ids[rows], lats, lngs)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "success": True,
+        "matrix_version": matrix.version,
+        "pairs": pairs,
+        "total_ms": round(elapsed * 1000, 2),
+        "ns_per_pair": round(elapsed * 1e9 / pairs, 1),
+        "covered_fraction": round(float(np.isfinite(seconds).mean()), 4)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precomputed garage-to-cell ETA matrix")
+    parser.add_argument('command', choices=['build', 'benchmark'])
+    parser.add_argument('--force', action='store_true')
+    parser.add_argument('--pairs', type=int, default=100000)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        print(json.dumps(build_eta_matrix(force=args.force), indent=2))
+    else:
+        print(json.dumps(benchmark(args.pairs), indent=2))
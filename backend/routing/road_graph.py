@@ -0,0 +1,310 @@
+from datetime import datetime
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from utils.geo import EARTH_RADIUS_KM, haversine_one_to_many
+
+ROAD_GRAPH_DIR = os.environ.get("ROAD_GRAPH_DIR", "data/road_graph")
+DEFAULT_SPEED_KMH = 40.0
+ACCESS_SPEED_KMH = 20.0
+MAX_SNAP_KM = 2.0
+MAX_SEARCH_SECONDS = 4 * 3600
+ALT_SLACK = 1.25
+GRAPH_ARRAYS = ['indptr', 'indices', 'weights', 'rev_indptr', 'rev_indices', 'rev_weights',
+                'node_lat', 'node_lng', 'landmarks', 'from_landmark', 'to_landmark']
+
+def _unit_vectors(lats, lngs) -> np.ndarray:
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lng = np.radians(np.asarray(lngs, dtype=np.float64))
+    return np.column_stack([np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)])
+
+def _select_landmarks(node_lat: np.ndarray, node_lng: np.ndarray, count: int) -> np.ndarray:
+    # Farthest-point selection spreads landmarks around the edge of the network
+    count = min(count, len(node_lat))
+    distance = haversine_one_to_many(float(np.mean(node_lat)), float(np.mean(node_lng)), node_lat, node_lng)
+    landmarks = []
+    for _ in range(count):
+        landmark = int(np.argmax(distance))
+        landmarks.append(landmark)
+        distance = np.minimum(distance, haversine_one_to_many(node_lat[landmark], node_lng[landmark], node_lat, node_lng))
+    return np.array(landmarks, dtype=np.int32)
+
+
+def build_graph(nodes_csv: str, edges_csv: str, graph_dir: str = None, landmark_count: int = 8) -> dict:
+    import pandas as pd
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra
+
+    graph_dir = graph_dir or ROAD_GRAPH_DIR
+    start = time.perf_counter()
+
+    nodes = pd.read_csv(nodes_csv)
+    edges = pd.read_csv(edges_csv)
+
+    node_ids = nodes['node_id'].to_numpy(dtype=np.int64)
+    order = np.argsort(node_ids)
+    sorted_ids = node_ids[order]
+    node_lat = nodes['lat'].to_numpy(dtype=np.float64)[order]
+    node_lng = nodes['lng'].to_numpy(dtype=np.float64)[order]
+    n = len(sorted_ids)
+
+    def node_index(ids) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        index = np.clip(np.searchsorted(sorted_ids, ids), 0, n - 1)
+        index[sorted_ids[index] != ids] = -1
+        return index
+
+    src = node_index(edges['from_node'])
+    dst = node_index(edges['to_node'])
+    length_m = edges['length_m'].to_numpy(dtype=np.float64)
+    speed = edges['speed_kmh'].fillna(DEFAULT_SPEED_KMH).to_numpy(dtype=np.float64) if 'speed_kmh' in edges else np.full(len(edges), DEFAULT_SPEED_KMH)
+    oneway = edges['oneway'].fillna(0).to_numpy(dtype=bool) if 'oneway' in edges else np.zeros(len(edges), dtype=bool)
+
+    valid = (src >= 0) & (dst >= 0) & (src != dst) & (length_m >= 0)
+    src, dst, length_m, speed, oneway = src[valid], dst[valid], length_m[valid], speed[valid], oneway[valid]
+    seconds = length_m / (np.clip(speed, 5, 130) / 3.6)
+
+    two_way = ~oneway
+    rows = np.concatenate([src, dst[two_way]])
+    cols = np.concatenate([dst, src[two_way]])
+    weights = np.concatenate([seconds, seconds[two_way]])
+
+    # Keep the fastest of any parallel edges
+    order = np.lexsort((weights, cols, rows))
+    rows, cols, weights = rows[order], cols[order], weights[order]
+    first = np.r_[True, (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])]
+    rows, cols, weights = rows[first], cols[first], np.maximum(weights[first], 1e-3)
+
+    graph = csr_matrix((weights, (rows, cols)), shape=(n, n))
+    reverse = graph.T.tocsr()
+    reverse.sort_indices()
+
+    landmarks = _select_landmarks(node_lat, node_lng, landmark_count)
+    from_landmark = dijkstra(graph, directed=True, indices=landmarks).astype(np.float32)
+    to_landmark = dijkstra(reverse, directed=True, indices=landmarks).astype(np.float32)
+
+    version = datetime.now().strftime('%Y%m%d%H%M%S')
+    version_dir = os.path.join(graph_dir, f"v{version}")
+    os.makedirs(version_dir, exist_ok=True)
+
+    arrays = {
+        'indptr': graph.indptr.astype(np.int32),
+        'indices': graph.indices.astype(np.int32),
+        'weights': graph.data.astype(np.float64),
+        'rev_indptr': reverse.indptr.astype(np.int32),
+        'rev_indices': reverse.indices.astype(np.int32),
+        'rev_weights': reverse.data.astype(np.float64),
+        'node_lat': node_lat,
+        'node_lng': node_lng,
+        'landmarks': landmarks,
+        'from_landmark': from_landmark,
+        'to_landmark': to_landmark,
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(version_dir, f"{name}.npy"), array)
+
+    metadata = {
+        'version': version,
+        'built_at': datetime.now().isoformat(),
+        'source_nodes': os.path.basename(nodes_csv),
+        'source_edges': os.path.basename(edges_csv),
+        'nodes': int(n),
+        'edges': int(graph.nnz),
+        'landmarks': int(len(landmarks)),
+        'build_seconds': round(time.perf_counter() - start, 2)
+    }
+    with open(os.path.join(version_dir, 'metadata.json'), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    latest_tmp = os.path.join(graph_dir, 'LATEST.tmp')
+    with open(latest_tmp, 'w') as f:
+        f.write(version)
+    os.replace(latest_tmp, os.path.join(graph_dir, 'LATEST'))
+
+    return {"success": True, **metadata}
+
+
+class RoadGraph:
+    def __init__(self, arrays: dict, metadata: dict):
+        from scipy.sparse import csr_matrix
+
+        n = len(arrays['node_lat'])
+        self.metadata = metadata
+        self.version = metadata.get('version')
+        self.node_lat = arrays['node_lat']
+        self.node_lng = arrays['node_lng']
+        self.landmarks = arrays['landmarks']
+        self.from_landmark = arrays['from_landmark']
+        self.to_landmark = arrays['to_landmark']
+        self.graph = csr_matrix((arrays['weights'], arrays['indices'], arrays['indptr']), shape=(n, n), copy=False)
+        self.reverse = csr_matrix((arrays['rev_weights'], arrays['rev_indices'], arrays['rev_indptr']), shape=(n, n), copy=False)
+        self._tree = None
+        self._tree_lock = threading.Lock()
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_lat)
+
+    def _kdtree(self):
+        if self._tree is None:
+            from scipy.spatial import cKDTree
+            with self._tree_lock:
+                if self._tree is None:
+                    self._tree = cKDTree(_unit_vectors(self.node_lat, self.node_lng))
+        return self._tree
+
+    def snap(self, lats, lngs) -> tuple:
+        chord, nodes = self._kdtree().query(_unit_vectors(np.atleast_1d(lats), np.atleast_1d(lngs)))
+        snap_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1.0))
+        return nodes.astype(np.int64), snap_km
+
+    def landmark_upper_bound(self, sources: np.ndarray, target: int) -> np.ndarray:
+        # d(s, t) <= d(s, L) + d(L, t) for every landmark L
+        return np.min(self.to_landmark[:, sources] + self.from_landmark[:, [target]], axis=0).astype(np.float64)
+
+    def landmark_lower_bound(self, sources: np.ndarray, target: int) -> np.ndarray:
+        # d(s, t) >= d(L, t) - d(L, s) and d(s, t) >= d(s, L) - d(t, L) for every landmark L
+        with np.errstate(invalid='ignore'):
+            bounds = np.fmax(self.from_landmark[:, [target]].astype(np.float64) - self.from_landmark[:, sources],
+                             self.to_landmark[:, sources].astype(np.float64) - self.to_landmark[:, [target]])
+        return np.max(np.nan_to_num(bounds, nan=0.0, posinf=np.inf), axis=0)
+
+    def travel_seconds_to(self, target_lat: float, target_lng: float, source_lats, source_lngs) -> tuple:
+        from scipy.sparse.csgraph import dijkstra
+
+        target, target_snap = self.snap(target_lat, target_lng)
+        target = int(target[0])
+        sources, source_snap = self.snap(source_lats, source_lngs)
+
+        upper = self.landmark_upper_bound(sources, target)
+        finite = np.isfinite(upper)
+        # Every source lies within its landmark upper bound, so the search never needs to go past the largest one;
+        # sources beyond MAX_SEARCH_SECONDS come back with exact=False and their bound as a rough figure
+        max_limit = min(float(upper[finite].max()) * 1.001 if finite.any() else MAX_SEARCH_SECONDS, MAX_SEARCH_SECONDS)
+
+        # Upper bounds are loose for nearby sources while the landmark lower bounds are tight, so search
+        # just past the largest lower bound first and only widen when a source has not been reached
+        lower = self.landmark_lower_bound(sources, target)
+        reachable = np.isfinite(lower)
+        limit = min(max(float(lower[reachable].max()) if reachable.any() else 0.0, 1.0) * ALT_SLACK, max_limit)
+        while True:
+            seconds = dijkstra(self.reverse, directed=True, indices=target, limit=limit)[sources]
+            if limit >= max_limit or np.isfinite(seconds[reachable]).all():
+                break
+            limit = min(limit * 2, max_limit)
+        exact = np.isfinite(seconds)
+        seconds = np.where(exact, seconds, upper)
+
+        access = (source_snap + target_snap[0]) / ACCESS_SPEED_KMH * 3600
+        seconds = seconds + access
+
+        # Points too far from any road node are outside this extract's coverage
+        outside = (source_snap > MAX_SNAP_KM) | (target_snap[0] > MAX_SNAP_KM)
+        seconds[outside] = np.inf
+        exact &= ~outside
+        return seconds, exact
+
+
+def load_road_graph(graph_dir: str = None, version: str = None) -> RoadGraph:
+    graph_dir = graph_dir or ROAD_GRAPH_DIR
+
+    if version is None:
+        latest_path = os.path.join(graph_dir, 'LATEST')
+        if not os.path.exists(latest_path):
+            return None
+        with open(latest_path) as f:
+            version = f.read().strip()
+
+    version_dir = os.path.join(graph_dir, f"v{version}")
+    arrays = {name: np.load(os.path.join(version_dir, f"{name}.npy"), mmap_mode='r') for name in GRAPH_ARRAYS}
+    with open(os.path.join(version_dir, 'metadata.json')) as f:
+        metadata = json.load(f)
+
+    return RoadGraph(arrays, metadata)
+
+
+_graph_lock = threading.Lock()
+_loaded_graph = None
+_loaded_checked = False
+_load_error = None
+
+def get_road_graph() -> RoadGraph:
+    global _loaded_graph, _loaded_checked, _load_error
+
+    if _loaded_checked:
+        return _loaded_graph
+
+    with _graph_lock:
+        if not _loaded_checked:
+            try:
+                _loaded_graph = load_road_graph()
+                _load_error = None
+            except Exception as e:
+                _loaded_graph = None
+                _load_error = f"Error loading road graph: {e}"
+            _loaded_checked = True
+
+    return _loaded_graph
+
+def get_road_graph_error() -> str:
+    return _load_error
+
+def reload_road_graph() -> RoadGraph:
+    global _loaded_checked
+    with _graph_lock:
+        _loaded_checked = False
+    return get_road_graph()
+
+
+def benchmark(queries: int = 200, sources: int = 20) -> dict:
+    graph = get_road_graph()
+    if graph is None:
+        return {"success": False, "error": get_road_graph_error() or "No road graph found"}
+
+    rng = np.random.default_rng(0)
+    nodes = rng.integers(0, graph.node_count, size=(queries, sources + 1))
+    lats = np.asarray(graph.node_lat)[nodes]
+    lngs = np.asarray(graph.node_lng)[nodes]
+
+    graph.travel_seconds_to(lats[0, 0], lngs[0, 0], lats[0, 1:], lngs[0, 1:])
+    timings = []
+    exact = 0
+    for q in range(queries):
+        start = time.perf_counter()
+        _, is_exact = graph.travel_seconds_to(lats[q, 0], lngs[q, 0], lats[q, 1:], lngs[q, 1:])
+        timings.append(time.perf_counter() - start)
+        exact += int(is_exact.sum())
+
+    timings = np.array(timings) * 1000
+    return {
+        "success": True,
+        "graph_version": graph.version,
+        "nodes": graph.node_count,
+        "queries": queries,
+        "sources_per_query": sources,
+        "p50_ms": round(float(np.percentile(timings, 50)), 2),
+        "p95_ms": round(float(np.percentile(timings, 95)), 2),
+        "exact_fraction": round(exact / (queries * sources), 4)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline road graph for ETA estimation")
+    parser.add_argument('command', choices=['build', 'benchmark'])
+    parser.add_argument('--nodes', help="CSV with node_id,lat,lng")
+    parser.add_argument('--edges', help="CSV with from_node,to_node,length_m[,speed_kmh][,oneway]")
+    parser.add_argument('--landmarks', type=int, default=8)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        if not args.nodes or not args.edges:
+            parser.error("build requires --nodes and --edges")
+        print(json.dumps(build_graph(args.nodes, args.edges, landmark_count=args.landmarks), indent=2))
+    else:
+        print(json.dumps(benchmark(args.queries), indent=2))
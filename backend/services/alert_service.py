@@ -1,12 +1,31 @@
-from database.models import Alert, get_db_session
+from database.models import Alert, AlertCounter, get_db_session
 from datetime import datetime
+from sqlalchemy import exists, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+def alert_to_dict(a: Alert) -> dict:
+    return {
+        'id': a.id,
+        'alert_type': a.alert_type,
+        'title': a.title,
+        'message': a.message,
+        'priority': a.priority,
+        'is_read': bool(a.is_read),
+        'created_at': a.created_at.isoformat() if a.created_at else None,
+        'vehicle_id': a.vehicle_id
+    }
+
+def live_alert_filter(now: datetime = None):
+    now = now or datetime.now()
+    return or_(Alert.expires_at == None, Alert.expires_at > now)
 
 def get_user_alerts(user_id: int, include_read: bool = False) -> list:
     db = get_db_session()
     try:
         query = db.query(Alert).filter(
             Alert.user_id == user_id,
-            Alert.is_dismissed == False
+            Alert.is_dismissed == False,
+            live_alert_filter()
         )
         
         if not include_read:
@@ -14,18 +33,7 @@ def get_user_alerts(user_id: int, include_read: bool = False) -> list:
         
         alerts = query.order_by(Alert.created_at.desc()).all()
         
-        result = []
-        for a in alerts:
-            result.append({
-                'id': a.id,
-                'alert_type': a.alert_type,
-                'title': a.title,
-                'message': a.message,
-                'priority': a.priority,
-                'is_read': a.is_read,
-                'created_at': a.created_at.isoformat() if a.created_at else None,
-                'vehicle_id': a.vehicle_id
-            })
+        result = [alert_to_dict(a) for a in alerts]
         
         db.close()
         return result
@@ -33,15 +41,76 @@ def get_user_alerts(user_id: int, include_read: bool = False) -> list:
         db.close()
         return []
 
-def mark_alert_read(alert_id: int) -> dict:
+def get_alert_events_since(user_id: int, last_alert_id: int, limit: int = 100) -> list:
     db = get_db_session()
     try:
-        alert = db.query(Alert).filter(Alert.id == alert_id).first()
+        alerts = db.query(Alert).filter(
+            Alert.user_id == user_id,
+            Alert.id > last_alert_id,
+            Alert.is_dismissed == False,
+            live_alert_filter()
+        ).order_by(Alert.id).limit(limit).all()
+        
+        result = [{'id': a.id, 'event': 'alert', 'data': alert_to_dict(a)} for a in alerts]
+        
+        db.close()
+        return result
+    except Exception as e:
+        db.close()
+        return []
+
+def adjust_unread_count(db, user_id: int, priority: str, delta: int):
+    query = db.query(AlertCounter).filter(
+        AlertCounter.user_id == user_id,
+        AlertCounter.priority == priority
+    )
+    
+    if delta < 0:
+        query.filter(AlertCounter.unread_count >= -delta).update(
+            {AlertCounter.unread_count: AlertCounter.unread_count + delta},
+            synchronize_session=False
+        )
+        return
+    
+    updated = query.update(
+        {AlertCounter.unread_count: AlertCounter.unread_count + delta},
+        synchronize_session=False
+    )
+    if updated:
+        return
+    
+    try:
+        with db.begin_nested():
+            db.add(AlertCounter(user_id=user_id, priority=priority, unread_count=delta))
+    except IntegrityError:
+        query.update(
+            {AlertCounter.unread_count: AlertCounter.unread_count + delta},
+            synchronize_session=False
+        )
+
+def _clear_unread_alert(alert_id: int, field) -> dict:
+    db = get_db_session()
+    try:
+        alert = db.query(Alert.user_id, Alert.priority).filter(Alert.id == alert_id).first()
         if not alert:
             db.close()
             return {"success": False, "error": "Alert not found"}
         
-        alert.is_read = True
+        # Only the request whose UPDATE flips an unread alert gets to decrement the counter
+        cleared = db.query(Alert).filter(
+            Alert.id == alert_id,
+            Alert.is_read == False,
+            Alert.is_dismissed == False
+        ).update({field: True}, synchronize_session=False)
+        
+        if cleared == 1:
+            adjust_unread_count(db, alert.user_id, alert.priority, -1)
+        else:
+            db.query(Alert).filter(
+                Alert.id == alert_id,
+                field == False
+            ).update({field: True}, synchronize_session=False)
+        
         db.commit()
         db.close()
         
@@ -51,43 +120,104 @@ def mark_alert_read(alert_id: int) -> dict:
         db.close()
         return {"success": False, "error": str(e)}
 
+def mark_alert_read(alert_id: int) -> dict:
+    return _clear_unread_alert(alert_id, Alert.is_read)
+
 def dismiss_alert(alert_id: int) -> dict:
+    return _clear_unread_alert(alert_id, Alert.is_dismissed)
+
+def _expired_unread_counts(db, user_id: int, now: datetime = None) -> dict:
+    # Counters only drop expired alerts when the sweeper deletes them, so
+    # readers subtract the expired-but-unswept ones to agree with get_user_alerts
+    now = now or datetime.now()
+    rows = db.query(Alert.priority, func.count(Alert.id)).filter(
+        Alert.user_id == user_id,
+        Alert.is_dismissed == False,
+        Alert.is_read == False,
+        Alert.expires_at <= now
+    ).group_by(Alert.priority).all()
+    return {priority: count for priority, count in rows}
+
+def get_unread_count(user_id: int) -> int:
     db = get_db_session()
     try:
-        alert = db.query(Alert).filter(Alert.id == alert_id).first()
-        if not alert:
-            db.close()
-            return {"success": False, "error": "Alert not found"}
+        count = db.query(func.coalesce(func.sum(AlertCounter.unread_count), 0)).filter(
+            AlertCounter.user_id == user_id
+        ).scalar()
+        expired = sum(_expired_unread_counts(db, user_id).values())
         
-        alert.is_dismissed = True
-        db.commit()
         db.close()
+        return max(int(count) - expired, 0)
+    except Exception as e:
+        db.close()
+        return 0
+
+def get_unread_counts_by_priority(user_id: int) -> dict:
+    db = get_db_session()
+    try:
+        counters = db.query(AlertCounter).filter(AlertCounter.user_id == user_id).all()
+        expired = _expired_unread_counts(db, user_id)
         
-        return {"success": True}
+        result = {'low': 0, 'medium': 0, 'high': 0, 'critical': 0}
+        for c in counters:
+            result[c.priority] = max(c.unread_count - expired.get(c.priority, 0), 0)
+        
+        db.close()
+        return result
     except Exception as e:
-        db.rollback()
         db.close()
-        return {"success": False, "error": str(e)}
+        return {}
 
-def get_unread_count(user_id: int) -> int:
+def reconcile_unread_counts() -> dict:
     db = get_db_session()
     try:
-        count = db.query(Alert).filter(
-            Alert.user_id == user_id,
+        # Recount in place with single statements so a concurrent
+        # adjust_unread_count is never overwritten by a stale snapshot and
+        # readers never see a counter vanish mid-reconcile. Expired alerts stay
+        # counted until the sweeper deletes and decrements them; readers
+        # subtract them via _expired_unread_counts
+        unread = (
             Alert.is_read == False,
             Alert.is_dismissed == False
-        ).count()
+        )
+        recount = select(func.count(Alert.id)).where(
+            Alert.user_id == AlertCounter.user_id,
+            Alert.priority == AlertCounter.priority,
+            *unread
+        ).scalar_subquery()
+        updated = db.execute(
+            update(AlertCounter)
+            .where(AlertCounter.unread_count != recount)
+            .values(unread_count=recount)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        
+        missing = select(Alert.user_id, Alert.priority, func.count(Alert.id)).where(
+            *unread,
+            ~exists().where(
+                AlertCounter.user_id == Alert.user_id,
+                AlertCounter.priority == Alert.priority
+            )
+        ).group_by(Alert.user_id, Alert.priority)
+        inserted = db.execute(
+            insert(AlertCounter).from_select(['user_id', 'priority', 'unread_count'], missing)
+        ).rowcount
         
+        db.commit()
         db.close()
-        return count
+        
+        return {"success": True, "updated": updated, "inserted": inserted}
     except Exception as e:
+        db.rollback()
         db.close()
-        return 0
+        return {"success": False, "error": str(e)}
 
 def get_all_alerts() -> list:
     db = get_db_session()
     try:
-        alerts = db.query(Alert).order_by(Alert.created_at.desc()).limit(100).all()
+        alerts = db.query(Alert).filter(
+            live_alert_filter()
+        ).order_by(Alert.created_at.desc()).limit(100).all()
         
         result = []
         for a in alerts:
@@ -108,3 +238,45 @@ def get_all_alerts() -> list:
     except Exception as e:
         db.close()
         return []
+
+def sweep_expired_alerts(batch_size: int = 500, max_batches: int = 20) -> dict:
+    now = datetime.now()
+    deleted = 0
+    
+    for _ in range(max_batches):
+        db = get_db_session()
+        try:
+            expired = db.query(
+                Alert.id, Alert.user_id, Alert.priority, Alert.is_read, Alert.is_dismissed
+            ).filter(
+                Alert.expires_at <= now
+            ).order_by(Alert.expires_at).limit(batch_size).all()
+            
+            if not expired:
+                db.close()
+                break
+            
+            unread = {}
+            for alert_id, user_id, priority, is_read, is_dismissed in expired:
+                if not is_read and not is_dismissed:
+                    unread[(user_id, priority)] = unread.get((user_id, priority), 0) + 1
+            
+            db.query(Alert).filter(
+                Alert.id.in_([row[0] for row in expired])
+            ).delete(synchronize_session=False)
+            
+            for (user_id, priority), count in unread.items():
+                adjust_unread_count(db, user_id, priority, -count)
+            
+            db.commit()
+            db.close()
+            deleted += len(expired)
+            
+            if len(expired) < batch_size:
+                break
+        except Exception as e:
+            db.rollback()
+            db.close()
+            return {"success": False, "deleted": deleted, "error": str(e)}
+    
+    return {"success": True, "deleted": deleted}
@@ -0,0 +1,169 @@
+import threading
+
+import numpy as np
+
+from database.models import Vehicle, get_db_session
+from backend.agents.alert_agent import AlertAgent
+
+HEALTH_FIELDS = ['engine_health', 'brake_health', 'battery_health', 'tire_health']
+
+class HealthAnomalyDetector:
+    def __init__(self, max_vehicles: int = 200000, alpha: float = 0.1, z_threshold: float = 4.0,
+                 min_drop: float = 10.0, min_std: float = 1.5, warmup: int = 5,
+                 cooldown_seconds: float = 3600, initial_capacity: int = 1024):
+        self.max_vehicles = max_vehicles
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_drop = min_drop
+        self.min_std = min_std
+        self.warmup = warmup
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._allocate(min(initial_capacity, max_vehicles))
+
+    def _allocate(self, capacity: int):
+        fields = len(HEALTH_FIELDS)
+        old = getattr(self, 'mean', None)
+        size = 0 if old is None else len(old)
+
+        mean = np.zeros((capacity, fields), dtype=np.float32)
+        var = np.zeros((capacity, fields), dtype=np.float32)
+        count = np.zeros((capacity, fields), dtype=np.int32)
+        last_seen = np.zeros(capacity, dtype=np.float64)
+        last_alert = np.full(capacity, -np.inf, dtype=np.float64)
+        vehicle_ids = np.zeros(capacity, dtype=np.int64)
+
+        if size:
+            mean[:size] = self.mean
+            var[:size] = self.var
+            count[:size] = self.count
+            last_seen[:size] = self.last_seen
+            last_alert[:size] = self.last_alert
+            vehicle_ids[:size] = self.vehicle_ids
+
+        self.mean, self.var, self.count = mean, var, count
+        self.last_seen, self.last_alert, self.vehicle_ids = last_seen, last_alert, vehicle_ids
+
+    def _slot_for(self, vehicle_id: int) -> int:
+        slot = self._slots.get(vehicle_id)
+        if slot is not None:
+            self.last_seen[slot] = np.inf
+            return slot
+
+        if len(self._slots) < len(self.mean):
+            slot = len(self._slots)
+        elif len(self.mean) < self.max_vehicles:
+            self._allocate(min(len(self.mean) * 2, self.max_vehicles))
+            slot = len(self._slots)
+        else:
+            slot = int(np.argmin(self.last_seen))
+            del self._slots[int(self.vehicle_ids[slot])]
+
+        self._slots[vehicle_id] = slot
+        self.vehicle_ids[slot] = vehicle_id
+        self.mean[slot] = 0
+        self.var[slot] = 0
+        self.count[slot] = 0
+        self.last_seen[slot] = np.inf
+        self.last_alert[slot] = -np.inf
+        return slot
+
+    def update_batch(self, batch: dict) -> list:
+        n = len(batch['vehicle_id'])
+        if not n:
+            return []
+
+        order = np.lexsort((batch['timestamp'], batch['vehicle_id']))
+        vehicle_ids = batch['vehicle_id'][order]
+        timestamps = batch['timestamp'][order]
+        values = np.column_stack([batch[f][order] for f in HEALTH_FIELDS]).astype(np.float32)
+
+        group_start = np.flatnonzero(np.r_[True, vehicle_ids[1:] != vehicle_ids[:-1]])
+        group_sizes = np.diff(np.r_[group_start, n])
+        rank = np.arange(n) - np.repeat(group_start, group_sizes)
+
+        detections = []
+        with self._lock:
+            slots = np.array([self._slot_for(int(v)) for v in vehicle_ids[group_start]], dtype=np.int64)
+            slots = np.repeat(slots, group_sizes)
+
+            for r in range(int(group_sizes.max())):
+                idx = np.flatnonzero(rank == r)
+                s = slots[idx]
+                x = values[idx]
+                m = self.mean[s]
+                v = self.var[s]
+                c = self.count[s]
+                present = ~np.isnan(x)
+
+                std = np.maximum(np.sqrt(v), self.min_std)
+                drop = m - x
+                anomalous = present & (c >= self.warmup) & (drop >= self.min_drop) & (drop / std > self.z_threshold)
+
+                first = present & (c == 0)
+                delta = np.where(present, x - m, 0)
+                self.mean[s] = np.where(first, x, m + self.alpha * delta)
+                self.var[s] = np.where(first, 0, np.where(present, (1 - self.alpha) * (v + self.alpha * delta * delta), v))
+                self.count[s] = c + present
+                self.last_seen[s] = timestamps[idx]
+
+                for row, col in zip(*np.nonzero(anomalous)):
+                    detections.append({
+                        'vehicle_id': int(vehicle_ids[idx[row]]),
+                        'component': HEALTH_FIELDS[col],
+                        'value': round(float(x[row, col]), 1),
+                        'expected': round(float(m[row, col]), 1),
+                        'z_score': round(float(drop[row, col] / std[row, col]), 2),
+                        'timestamp': float(timestamps[idx[row]])
+                    })
+
+            alerts = {}
+            for detection in detections:
+                slot = self._slots.get(detection['vehicle_id'])
+                if slot is None or detection['timestamp'] - self.last_alert[slot] < self.cooldown_seconds:
+                    continue
+                alerts.setdefault(detection['vehicle_id'], {})[detection['component']] = detection
+
+            for vehicle_id, items in alerts.items():
+                slot = self._slots[vehicle_id]
+                self.last_alert[slot] = max(d['timestamp'] for d in items.values())
+
+        return [d for items in alerts.values() for d in items.values()]
+
+    def tracked_vehicles(self) -> int:
+        with self._lock:
+            return len(self._slots)
+
+    def memory_bytes(self) -> int:
+        return sum(a.nbytes for a in (self.mean, self.var, self.count, self.last_seen, self.last_alert, self.vehicle_ids))
+
+
+anomaly_detector = HealthAnomalyDetector()
+alert_agent = AlertAgent()
+
+def process_readings(batch: dict) -> int:
+    detections = anomaly_detector.update_batch(batch)
+    if not detections:
+        return 0
+
+    by_vehicle = {}
+    for detection in detections:
+        by_vehicle.setdefault(detection['vehicle_id'], []).append(detection)
+
+    db = get_db_session()
+    try:
+        owners = dict(db.query(Vehicle.id, Vehicle.owner_id).filter(
+            Vehicle.id.in_(list(by_vehicle.keys()))
+        ).all())
+    finally:
+        db.close()
+
+    for vehicle_id, anomalies in by_vehicle.items():
+        alert_agent.run({
+            'user_id': owners.get(vehicle_id),
+            'vehicle_id': vehicle_id,
+            'anomaly_data': anomalies
+        })
+
+    return len(detections)
@@ -0,0 +1,52 @@
+import threading
+
+_jobs = {}
+_lock = threading.Lock()
+
+def schedule_job(name: str, interval_seconds: float, func, initial_delay: float = 0):
+    with _lock:
+        if name in _jobs:
+            return False
+
+        stop_event = threading.Event()
+
+        def loop():
+            if initial_delay:
+                stop_event.wait(initial_delay)
+            while not stop_event.is_set():
+                try:
+                    func()
+                except Exception as e:
+                    print(f"Error running background job {name}: {e}")
+                stop_event.wait(interval_seconds)
+
+        thread = threading.Thread(target=loop, name=f"job-{name}", daemon=True)
+        _jobs[name] = (thread, stop_event)
+        thread.start()
+        return True
+
+def stop_background_jobs():
+    with _lock:
+        for thread, stop_event in _jobs.values():
+            stop_event.set()
+        _jobs.clear()
+
+def get_scheduled_jobs() -> list:
+    with _lock:
+        return sorted(_jobs.keys())
+
+def start_background_jobs():
+    from backend.services.alert_service import reconcile_unread_counts, sweep_expired_alerts
+    from backend.storage.health_history import compact_health_history
+    from backend.services.garage_spatial_index import garage_index
+    from backend.routing.eta_matrix import refresh_eta_matrix
+    from backend.services.garage_load import reconcile_garage_loads
+    from backend.services.slot_horizon import extend_slot_horizon
+
+    schedule_job('reconcile_unread_counts', 900, reconcile_unread_counts)
+    schedule_job('sweep_expired_alerts', 300, sweep_expired_alerts, initial_delay=30)
+    schedule_job('compact_health_history', 600, compact_health_history, initial_delay=60)
+    schedule_job('rebuild_garage_index', 60, garage_index.build)
+    schedule_job('refresh_eta_matrix', 3600, refresh_eta_matrix, initial_delay=120)
+    schedule_job('reconcile_garage_loads', 900, reconcile_garage_loads)
+    schedule_job('extend_slot_horizon', 3600, extend_slot_horizon, initial_delay=15)
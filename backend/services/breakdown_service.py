@@ -1,5 +1,6 @@
 from database.models import BreakdownEvent, Vehicle, Garage, get_db_session
 from backend.agents.orchestrator import MasterOrchestrator
+from backend.services.tracking_service import tracking_store
 from datetime import datetime
 
 orchestrator = MasterOrchestrator()
@@ -25,6 +26,18 @@ def report_breakdown(vehicle_id: int, breakdown_type: str, description: str = ""
     
     return orchestrator.run(breakdown_input)
 
+def dispatch_open_breakdowns(breakdown_ids: list = None, max_distance_km: float = 100,
+                             method: str = 'auto', commit: bool = True) -> dict:
+    dispatch_input = {
+        'task_type': 'batch_dispatch',
+        'breakdown_ids': breakdown_ids,
+        'max_distance_km': max_distance_km,
+        'method': method,
+        'commit': commit
+    }
+    
+    return orchestrator.run(dispatch_input)
+
 def get_user_breakdowns(user_id: int) -> list:
     db = get_db_session()
     try:
@@ -108,6 +121,9 @@ def update_breakdown_status(breakdown_id: int, new_status: str,
     
     result = breakdown_agent.update_status(breakdown_id, new_status)
     
+    if result.get('success') and new_status != 'garage_en_route':
+        tracking_store.stop_tracking(breakdown_id, new_status)
+    
     if actual_cost and result.get('success'):
         db = get_db_session()
         breakdown = db.query(BreakdownEvent).filter(BreakdownEvent.id == breakdown_id).first()
@@ -132,6 +148,7 @@ def get_breakdown_details(breakdown_id: int) -> dict:
         result = {
             'id': b.id,
             'vehicle_id': b.vehicle_id,
+            'owner_id': vehicle.owner_id if vehicle else None,
             'vehicle_name': f"{vehicle.make} {vehicle.model}" if vehicle else 'Unknown',
             'registration_number': vehicle.registration_number if vehicle else '',
             'breakdown_type': b.breakdown_type,
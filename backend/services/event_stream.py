@@ -0,0 +1,104 @@
+from collections import deque
+import json
+import queue
+import threading
+
+class EventBroker:
+    def __init__(self, history_size: int = 100, queue_size: int = 256):
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._history = {}
+
+    def publish(self, topic: str, event_id: int, event_type: str, data: dict):
+        event = {'id': event_id, 'event': event_type, 'data': data}
+
+        with self._lock:
+            history = self._history.get(topic)
+            if history is None:
+                history = deque(maxlen=self.history_size)
+                self._history[topic] = history
+            history.append(event)
+            subscribers = list(self._subscribers.get(topic, ()))
+
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                pass
+
+    def subscribe(self, topic: str, last_event_id: int = None) -> tuple:
+        q = queue.Queue(maxsize=self.queue_size)
+
+        with self._lock:
+            self._subscribers.setdefault(topic, set()).add(q)
+            history = list(self._history.get(topic, ()))
+
+        replay = []
+        complete = True
+        if last_event_id is not None:
+            replay = [e for e in history if e['id'] > last_event_id]
+            complete = bool(history) and history[0]['id'] <= last_event_id
+
+        return q, replay, complete
+
+    def unsubscribe(self, topic: str, q: queue.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(topic)
+            if subscribers:
+                subscribers.discard(q)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+    def subscriber_count(self, topic: str = None) -> int:
+        with self._lock:
+            if topic is not None:
+                return len(self._subscribers.get(topic, ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+
+def format_sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+def stream_events(broker: EventBroker, topic: str, last_event_id: int = None,
+                  backfill=None, heartbeat_seconds: float = 15.0):
+    q, replay, complete = broker.subscribe(topic, last_event_id)
+    try:
+        sent_id = last_event_id or 0
+
+        if not complete and backfill is not None:
+            for event in backfill(sent_id):
+                yield format_sse(event)
+                sent_id = max(sent_id, event['id'])
+
+        for event in replay:
+            if event['id'] > sent_id:
+                yield format_sse(event)
+                sent_id = event['id']
+
+        yield "retry: 3000\n\n"
+
+        while True:
+            try:
+                event = q.get(timeout=heartbeat_seconds)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+
+            if event['id'] > sent_id:
+                yield format_sse(event)
+                sent_id = event['id']
+    finally:
+        broker.unsubscribe(topic, q)
+
+
+alert_broker = EventBroker()
+
+def alert_topic(user_id: int) -> str:
+    return f"user:{user_id}"
+
+tracking_broker = EventBroker(history_size=20)
+
+def tracking_topic(breakdown_id: int) -> str:
+    return f"breakdown:{breakdown_id}"
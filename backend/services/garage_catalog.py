@@ -0,0 +1,101 @@
+from collections import namedtuple
+from types import MappingProxyType
+import threading
+import time
+
+from backend.services.garage_load import garage_loads
+from database.models import Garage, get_db_session
+
+GARAGE_FIELDS = [
+    'id', 'name', 'address', 'city', 'latitude', 'longitude', 'phone', 'email',
+    'capacity', 'current_load', 'opening_time', 'closing_time', 'working_days',
+    'supported_services', 'rating', 'avg_repair_time_hours', 'is_active'
+]
+
+GarageRecord = namedtuple('GarageRecord', GARAGE_FIELDS)
+CatalogSnapshot = namedtuple('CatalogSnapshot', ['version', 'loaded_at', 'records', 'active', 'by_id', 'by_city'])
+
+def garage_record_to_dict(record: GarageRecord) -> dict:
+    result = record._asdict()
+    result['current_load'] = garage_loads.get(record.id, record.current_load)
+    result['available_capacity'] = record.capacity - result['current_load']
+    return result
+
+
+class GarageCatalog:
+    def __init__(self, max_age_seconds: float = 60):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot = None
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self.stats['invalidations'] += 1
+
+    def _load(self, version: int) -> CatalogSnapshot:
+        db = get_db_session()
+        try:
+            rows = db.query(*[getattr(Garage, f) for f in GARAGE_FIELDS]).order_by(Garage.id).all()
+        finally:
+            db.close()
+
+        records = tuple(GarageRecord(*row) for row in rows)
+        by_city = {}
+        for record in records:
+            if record.is_active:
+                by_city.setdefault((record.city or '').lower(), []).append(record)
+
+        return CatalogSnapshot(
+            version=version,
+            loaded_at=time.time(),
+            records=records,
+            active=tuple(r for r in records if r.is_active),
+            by_id=MappingProxyType({r.id: r for r in records}),
+            by_city=MappingProxyType({city: tuple(items) for city, items in by_city.items()})
+        )
+
+    def snapshot(self) -> CatalogSnapshot:
+        with self._lock:
+            snapshot = self._snapshot
+            version = self._version
+            if (snapshot is not None and snapshot.version == version
+                    and time.time() - snapshot.loaded_at < self.max_age_seconds):
+                self.stats['hits'] += 1
+                return snapshot
+            self.stats['misses'] += 1
+
+        snapshot = self._load(version)
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version <= version:
+                self._snapshot = snapshot
+        return snapshot
+
+    def get(self, garage_id: int) -> GarageRecord:
+        return self.snapshot().by_id.get(garage_id)
+
+    def active(self) -> tuple:
+        return self.snapshot().active
+
+    def in_city(self, city: str) -> tuple:
+        return self.snapshot().by_city.get((city or '').lower(), ())
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            snapshot = self._snapshot
+            return {
+                **self.stats,
+                'hit_rate': round(self.stats['hits'] / lookups, 4) if lookups else 0.0,
+                'version': self._version,
+                'garages': len(snapshot.records) if snapshot else 0
+            }
+
+
+garage_catalog = GarageCatalog()
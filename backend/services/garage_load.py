@@ -0,0 +1,154 @@
+import threading
+
+from sqlalchemy import event, func, update
+
+from database.models import BreakdownEvent, Garage, ServiceRequest, SessionLocal, get_db_session
+
+ACTIVE_BREAKDOWN_STATUSES = ['garage_assigned', 'garage_en_route', 'repair_in_progress']
+ACTIVE_SERVICE_STATUSES = ['open', 'in_progress']
+PENDING_KEY = 'garage_load_deltas'
+
+class GarageLoadMirror:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loads = None
+        self.stats = {'increments': 0, 'decrements': 0, 'rejected': 0, 'reconciles': 0}
+
+    def _ensure_loaded(self):
+        if self._loads is not None:
+            return
+        db = get_db_session()
+        try:
+            rows = db.query(Garage.id, Garage.current_load).all()
+        finally:
+            db.close()
+        with self._lock:
+            if self._loads is None:
+                self._loads = {garage_id: load or 0 for garage_id, load in rows}
+
+    def get(self, garage_id: int, default: int = 0) -> int:
+        self._ensure_loaded()
+        with self._lock:
+            return self._loads.get(garage_id, default)
+
+    def loads(self) -> dict:
+        self._ensure_loaded()
+        with self._lock:
+            return dict(self._loads)
+
+    def apply(self, deltas: dict):
+        with self._lock:
+            # Not loaded yet means the next load reads the committed values anyway
+            if self._loads is None:
+                return
+            for garage_id, delta in deltas.items():
+                self._loads[garage_id] = max(self._loads.get(garage_id, 0) + delta, 0)
+
+    def reset(self, loads: dict = None):
+        with self._lock:
+            self._loads = dict(loads) if loads is not None else None
+
+    def record(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+
+garage_loads = GarageLoadMirror()
+
+def is_active_breakdown(status: str) -> bool:
+    return status in ACTIVE_BREAKDOWN_STATUSES
+
+def is_active_service(status: str) -> bool:
+    return status in ACTIVE_SERVICE_STATUSES
+
+def adjust_garage_load(db, garage_id: int, delta: int) -> bool:
+    if not garage_id or not delta:
+        return True
+
+    stmt = update(Garage).where(Garage.id == garage_id)
+    if delta < 0:
+        stmt = stmt.where(Garage.current_load >= -delta)
+    result = db.execute(stmt.values(current_load=Garage.current_load + delta))
+
+    if result.rowcount == 0:
+        # A decrement below zero means an earlier release was counted twice; reconcile_garage_loads repairs it
+        garage_loads.record('rejected')
+        print(f"Rejected garage load change {delta:+d} for garage {garage_id}")
+        return False
+
+    garage_loads.record('increments' if delta > 0 else 'decrements')
+    pending = db.info.setdefault(PENDING_KEY, {})
+    pending[garage_id] = pending.get(garage_id, 0) + delta
+    return True
+
+def transfer_garage_load(db, old_garage_id: int, was_active: bool, new_garage_id: int, is_active: bool):
+    if was_active and is_active and old_garage_id == new_garage_id:
+        return
+    if was_active:
+        adjust_garage_load(db, old_garage_id, -1)
+    if is_active:
+        adjust_garage_load(db, new_garage_id, 1)
+
+@event.listens_for(SessionLocal, 'after_commit')
+def _apply_committed_loads(session):
+    deltas = session.info.pop(PENDING_KEY, None)
+    if deltas:
+        garage_loads.apply(deltas)
+
+@event.listens_for(SessionLocal, 'after_rollback')
+def _discard_rolled_back_loads(session):
+    session.info.pop(PENDING_KEY, None)
+
+def reconcile_garage_loads() -> dict:
+    db = get_db_session()
+    try:
+        loads = {garage_id: 0 for (garage_id,) in db.query(Garage.id).all()}
+        breakdowns = db.query(BreakdownEvent.garage_id, func.count(BreakdownEvent.id)).filter(
+            BreakdownEvent.garage_id != None,
+            BreakdownEvent.status.in_(ACTIVE_BREAKDOWN_STATUSES)
+        ).group_by(BreakdownEvent.garage_id).all()
+        services = db.query(ServiceRequest.garage_id, func.count(ServiceRequest.id)).filter(
+            ServiceRequest.garage_id != None,
+            ServiceRequest.status.in_(ACTIVE_SERVICE_STATUSES)
+        ).group_by(ServiceRequest.garage_id).all()
+        for garage_id, count in breakdowns + services:
+            if garage_id in loads:
+                loads[garage_id] += count
+
+        current = dict(db.query(Garage.id, Garage.current_load).all())
+        corrections = {}
+        skipped = 0
+        for garage_id, load in loads.items():
+            old_load = current.get(garage_id)
+            if old_load == load:
+                continue
+            # Only overwrite the value that was counted; a load that moved in
+            # the meantime is left for the next reconcile
+            result = db.execute(
+                update(Garage)
+                .where(Garage.id == garage_id, Garage.current_load == old_load)
+                .values(current_load=load)
+            )
+            if result.rowcount:
+                corrections[garage_id] = load - (old_load or 0)
+            else:
+                skipped += 1
+        if corrections:
+            # Applied to the mirror as deltas by the after_commit hook, so
+            # deltas committed concurrently by other sessions are kept
+            pending = db.info.setdefault(PENDING_KEY, {})
+            for garage_id, delta in corrections.items():
+                pending[garage_id] = pending.get(garage_id, 0) + delta
+        db.commit()
+        db.close()
+
+        garage_loads.record('reconciles')
+        return {"success": True, "garages": len(loads), "corrected": len(corrections), "skipped": skipped}
+    except Exception as e:
+        db.rollback()
+        db.close()
+        return {"success": False, "error": str(e)}
@@ -1,78 +1,30 @@
-from database.models import Garage, ServiceSlot, get_db_session
+from database.models import Garage, get_db_session
 from backend.agents.orchestrator import MasterOrchestrator
-from datetime import datetime, timedelta
+from backend.services.garage_spatial_index import garage_index
+from backend.services.garage_catalog import garage_catalog, garage_record_to_dict
+from backend.services.garage_load import garage_loads
+from backend.services.slot_horizon import extend_slot_horizon
 
 orchestrator = MasterOrchestrator()
 
 def get_all_garages() -> list:
-    db = get_db_session()
     try:
-        garages = db.query(Garage).filter(Garage.is_active == True).all()
-        
-        result = []
-        for g in garages:
-            result.append({
-                'id': g.id,
-                'name': g.name,
-                'address': g.address,
-                'city': g.city,
-                'latitude': g.latitude,
-                'longitude': g.longitude,
-                'phone': g.phone,
-                'email': g.email,
-                'capacity': g.capacity,
-                'current_load': g.current_load,
-                'available_capacity': g.capacity - g.current_load,
-                'opening_time': g.opening_time,
-                'closing_time': g.closing_time,
-                'working_days': g.working_days,
-                'supported_services': g.supported_services,
-                'rating': g.rating,
-                'avg_repair_time_hours': g.avg_repair_time_hours,
-                'is_active': g.is_active
-            })
-        
-        db.close()
-        return result
+        return [garage_record_to_dict(g) for g in garage_catalog.active()]
     except Exception as e:
-        db.close()
         return []
 
 def get_garage_details(garage_id: int) -> dict:
-    db = get_db_session()
     try:
-        g = db.query(Garage).filter(Garage.id == garage_id).first()
+        g = garage_catalog.get(garage_id)
         if not g:
-            db.close()
             return None
-        
-        result = {
-            'id': g.id,
-            'name': g.name,
-            'address': g.address,
-            'city': g.city,
-            'latitude': g.latitude,
-            'longitude': g.longitude,
-            'phone': g.phone,
-            'email': g.email,
-            'capacity': g.capacity,
-            'current_load': g.current_load,
-            'available_capacity': g.capacity - g.current_load,
-            'opening_time': g.opening_time,
-            'closing_time': g.closing_time,
-            'working_days': g.working_days,
-            'supported_services': g.supported_services,
-            'rating': g.rating,
-            'avg_repair_time_hours': g.avg_repair_time_hours,
-            'is_active': g.is_active
-        }
-        
-        db.close()
-        return result
+        return garage_record_to_dict(g)
     except Exception as e:
-        db.close()
         return None
 
+def get_garage_catalog_stats() -> dict:
+    return {**garage_catalog.get_stats(), 'load_mirror': garage_loads.get_stats()}
+
 def add_garage(name: str, address: str, city: str, latitude: float, longitude: float,
                phone: str = None, email: str = None, capacity: int = 10,
                opening_time: str = "08:00", closing_time: str = "18:00",
@@ -97,24 +49,13 @@ def add_garage(name: str, address: str, city: str, latitude: float, longitude: f
         
         db.add(garage)
         db.commit()
-        
-        for i in range(14):
-            date = datetime.now() + timedelta(days=i)
-            for slot_time in ["09:00-12:00", "12:00-15:00", "15:00-18:00"]:
-                slot = ServiceSlot(
-                    garage_id=garage.id,
-                    date=date,
-                    time_slot=slot_time,
-                    is_available=True,
-                    max_capacity=3,
-                    current_bookings=0
-                )
-                db.add(slot)
-        
-        db.commit()
         garage_id = garage.id
         db.close()
         
+        garage_catalog.invalidate()
+        garage_index.upsert(garage_id, latitude, longitude)
+        extend_slot_horizon(garage_ids=[garage_id])
+        
         return {"success": True, "garage_id": garage_id}
     except Exception as e:
         db.rollback()
@@ -134,6 +75,13 @@ def update_garage(garage_id: int, **kwargs) -> dict:
                 setattr(garage, key, value)
         
         db.commit()
+        garage_catalog.invalidate()
+        if kwargs.get('current_load') is not None:
+            garage_loads.reset()
+        if garage.is_active:
+            garage_index.upsert(garage.id, garage.latitude, garage.longitude)
+        else:
+            garage_index.remove(garage.id)
         db.close()
         
         return {"success": True, "message": "Garage updated successfully"}
@@ -154,6 +102,9 @@ def delete_garage(garage_id: int) -> dict:
         db.commit()
         db.close()
         
+        garage_catalog.invalidate()
+        garage_index.remove(garage_id)
+        
         return {"success": True, "message": "Garage deactivated successfully"}
     except Exception as e:
         db.rollback()
@@ -161,14 +112,15 @@ def delete_garage(garage_id: int) -> dict:
         return {"success": False, "error": str(e)}
 
 def get_nearby_garages(latitude: float, longitude: float, 
-                       breakdown_type: str = None, limit: int = 5) -> dict:
+                       breakdown_type: str = None, limit: int = 5, radius_km: float = None) -> dict:
     recommendation_agent = orchestrator.get_agent('garage_recommendation')
     
     input_data = {
         'latitude': latitude,
         'longitude': longitude,
         'breakdown_type': breakdown_type,
-        'limit': limit
+        'limit': limit,
+        'radius_km': radius_km
     }
     
     return recommendation_agent.run(input_data)
@@ -0,0 +1,180 @@
+import math
+import threading
+
+from database.models import Garage, get_db_session
+from backend.services.garage_catalog import GARAGE_FIELDS, GarageRecord, garage_catalog
+from utils.geo import haversine_one_to_many
+
+KM_PER_DEG_LAT = 111.32
+
+class GarageSpatialIndex:
+    def __init__(self, cell_deg: float = 0.1):
+        self.cell_deg = cell_deg
+        self._lock = threading.RLock()
+        self._cells = {}
+        self._points = {}
+        self._built = False
+
+    def _cell(self, lat: float, lng: float) -> tuple:
+        return (int(math.floor(lat / self.cell_deg)), int(math.floor(lng / self.cell_deg)))
+
+    def build(self, rows: list = None):
+        if rows is None:
+            rows = [(g.id, g.latitude, g.longitude) for g in garage_catalog.active()]
+
+        cells = {}
+        points = {}
+        for garage_id, lat, lng in rows:
+            if lat is None or lng is None:
+                continue
+            cell = self._cell(lat, lng)
+            cells.setdefault(cell, set()).add(garage_id)
+            points[garage_id] = (lat, lng, cell)
+
+        with self._lock:
+            self._cells = cells
+            self._points = points
+            self._built = True
+        return len(points)
+
+    @property
+    def is_built(self) -> bool:
+        return self._built
+
+    def ensure_built(self):
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self.build()
+
+    def upsert(self, garage_id: int, lat: float, lng: float):
+        with self._lock:
+            self.remove(garage_id)
+            if lat is None or lng is None:
+                return
+            cell = self._cell(lat, lng)
+            self._cells.setdefault(cell, set()).add(garage_id)
+            self._points[garage_id] = (lat, lng, cell)
+
+    def remove(self, garage_id: int):
+        with self._lock:
+            point = self._points.pop(garage_id, None)
+            if point is None:
+                return
+            members = self._cells.get(point[2])
+            if members is not None:
+                members.discard(garage_id)
+                if not members:
+                    del self._cells[point[2]]
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _ring_cells(self, center: tuple, ring: int):
+        cy, cx = center
+        if ring == 0:
+            yield center
+            return
+        for dx in range(-ring, ring + 1):
+            yield (cy - ring, cx + dx)
+            yield (cy + ring, cx + dx)
+        for dy in range(-ring + 1, ring):
+            yield (cy + dy, cx - ring)
+            yield (cy + dy, cx + ring)
+
+    def _covered_km(self, lat: float, ring: int) -> float:
+        cell_km = self.cell_deg * KM_PER_DEG_LAT * min(1.0, math.cos(math.radians(min(abs(lat) + self.cell_deg * (ring + 1), 89.9))))
+        return ring * cell_km
+
+    def _max_ring(self, lat: float, radius_km: float) -> int:
+        cell_km = self.cell_deg * KM_PER_DEG_LAT * max(math.cos(math.radians(min(abs(lat) + radius_km / KM_PER_DEG_LAT, 89.9))), 0.01)
+        return int(math.ceil(radius_km / cell_km)) + 1
+
+    def _scan_ring(self, lat: float, lng: float, center: tuple, ring: int, radius_km: float) -> tuple:
+        ids = []
+        for cell in self._ring_cells(center, ring):
+            ids.extend(self._cells.get(cell, ()))
+        if not ids:
+            return [], 0
+
+        points = [self._points[garage_id] for garage_id in ids]
+        distances = haversine_one_to_many(lat, lng, [p[0] for p in points], [p[1] for p in points])
+        return [(garage_id, float(d)) for garage_id, d in zip(ids, distances) if d <= radius_km], len(ids)
+
+    def query_radius(self, lat: float, lng: float, radius_km: float) -> list:
+        self.ensure_built()
+        center = self._cell(lat, lng)
+        results = []
+
+        with self._lock:
+            scanned = 0
+            for ring in range(self._max_ring(lat, radius_km) + 1):
+                matches, count = self._scan_ring(lat, lng, center, ring, radius_km)
+                results.extend(matches)
+                scanned += count
+                if scanned >= len(self._points):
+                    break
+
+        results.sort(key=lambda r: r[1])
+        return results
+
+    def nearest(self, lat: float, lng: float, k: int, max_radius_km: float = 20000) -> list:
+        self.ensure_built()
+        center = self._cell(lat, lng)
+        found = []
+
+        with self._lock:
+            total = len(self._points)
+            scanned = 0
+            for ring in range(self._max_ring(lat, max_radius_km) + 1):
+                matches, count = self._scan_ring(lat, lng, center, ring, max_radius_km)
+                found.extend(matches)
+                scanned += count
+
+                if scanned >= total:
+                    break
+                if len(found) >= k:
+                    found.sort(key=lambda r: r[1])
+                    if found[k - 1][1] <= self._covered_km(lat, ring):
+                        break
+
+        found.sort(key=lambda r: r[1])
+        return found[:k]
+
+
+garage_index = GarageSpatialIndex()
+
+def _bbox(lat: float, lng: float, radius_km: float) -> tuple:
+    dlat = radius_km / KM_PER_DEG_LAT
+    dlng = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(min(abs(lat) + dlat, 89.9))), 0.01))
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+
+def nearest_garages_db(lat: float, lng: float, k: int = None, radius_km: float = None,
+                       initial_radius_km: float = 10, max_radius_km: float = 20000) -> list:
+    radius = radius_km if radius_km is not None else initial_radius_km
+    columns = [getattr(Garage, f) for f in GARAGE_FIELDS]
+
+    db = get_db_session()
+    try:
+        while True:
+            min_lat, max_lat, min_lng, max_lng = _bbox(lat, lng, radius)
+            rows = db.query(*columns).filter(
+                Garage.is_active == True,
+                Garage.latitude.between(min_lat, max_lat),
+                Garage.longitude.between(min_lng, max_lng)
+            ).all()
+
+            matches = []
+            if rows:
+                records = [GarageRecord(*row) for row in rows]
+                distances = haversine_one_to_many(lat, lng, [r.latitude for r in records], [r.longitude for r in records])
+                matches = sorted(
+                    ((record, float(d)) for record, d in zip(records, distances) if d <= radius),
+                    key=lambda m: m[1]
+                )
+
+            if radius_km is not None or len(matches) >= k or radius >= max_radius_km:
+                return matches if k is None else matches[:k]
+            radius = min(radius * 2, max_radius_km)
+    finally:
+        db.close()
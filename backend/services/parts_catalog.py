@@ -0,0 +1,123 @@
+from collections import namedtuple
+from types import MappingProxyType
+import re
+import threading
+import time
+
+from database.models import SparePart, get_db_session
+
+PART_FIELDS = [
+    'id', 'part_number', 'name', 'category', 'oem_price', 'aftermarket_price',
+    'quantity_in_stock', 'minimum_stock', 'compatible_makes', 'compatible_models', 'breakdown_types'
+]
+
+PartRecord = namedtuple('PartRecord', PART_FIELDS)
+PartsSnapshot = namedtuple('PartsSnapshot', ['version', 'loaded_at', 'records', 'by_id', 'by_part_number',
+                                             'names', 'tokens', 'matches'])
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+def normalize_name(name: str) -> str:
+    return (name or '').lower()
+
+def name_tokens(name: str) -> list:
+    return TOKEN_PATTERN.findall(normalize_name(name))
+
+
+class PartsCatalog:
+    def __init__(self, max_age_seconds: float = 300):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot = None
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self.stats['invalidations'] += 1
+
+    def _load(self, version: int) -> PartsSnapshot:
+        db = get_db_session()
+        try:
+            rows = db.query(*[getattr(SparePart, f) for f in PART_FIELDS]).order_by(SparePart.id).all()
+        finally:
+            db.close()
+
+        records = tuple(PartRecord(*row) for row in rows)
+        tokens = {}
+        for position, record in enumerate(records):
+            for token in set(name_tokens(record.name)):
+                tokens.setdefault(token, []).append(position)
+
+        return PartsSnapshot(
+            version=version,
+            loaded_at=time.time(),
+            records=records,
+            by_id=MappingProxyType({r.id: r for r in records}),
+            by_part_number=MappingProxyType({r.part_number: r for r in records}),
+            names=tuple(normalize_name(r.name) for r in records),
+            tokens=MappingProxyType({token: tuple(positions) for token, positions in tokens.items()}),
+            matches={}
+        )
+
+    def snapshot(self) -> PartsSnapshot:
+        with self._lock:
+            snapshot = self._snapshot
+            version = self._version
+            if (snapshot is not None and snapshot.version == version
+                    and time.time() - snapshot.loaded_at < self.max_age_seconds):
+                self.stats['hits'] += 1
+                return snapshot
+            self.stats['misses'] += 1
+
+        snapshot = self._load(version)
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version <= version:
+                self._snapshot = snapshot
+        return snapshot
+
+    def get(self, part_id: int) -> PartRecord:
+        return self.snapshot().by_id.get(part_id)
+
+    def by_part_number(self, part_number: str) -> PartRecord:
+        return self.snapshot().by_part_number.get(part_number)
+
+    def find_by_name(self, name: str) -> PartRecord:
+        # Same answer as the lowest-id row for name ILIKE '%name%'
+        snapshot = self.snapshot()
+        needle = normalize_name(name)
+        if needle in snapshot.matches:
+            return snapshot.matches[needle]
+
+        candidates = None
+        for token in name_tokens(needle):
+            positions = set(snapshot.tokens.get(token, ()))
+            candidates = positions if candidates is None else candidates & positions
+        found = [p for p in sorted(candidates or ()) if needle in snapshot.names[p]]
+
+        # Token hits miss substrings inside longer words, e.g. "tire" in "tires"; records are in
+        # id order, so only those before the first token hit can hold a lower-id match
+        limit = found[0] if found else len(snapshot.names)
+        earlier = next((p for p in range(limit) if needle in snapshot.names[p]), None)
+        if earlier is not None:
+            found = [earlier]
+
+        match = snapshot.records[found[0]] if found else None
+        snapshot.matches[needle] = match
+        return match
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            snapshot = self._snapshot
+            return {
+                **self.stats,
+                'hit_rate': round(self.stats['hits'] / lookups, 4) if lookups else 0.0,
+                'version': self._version,
+                'parts': len(snapshot.records) if snapshot else 0,
+                'tokens': len(snapshot.tokens) if snapshot else 0
+            }
+
+
+parts_catalog = PartsCatalog()
@@ -1,6 +1,9 @@
-from database.models import ServiceRequest, Vehicle, Garage, get_db_session
+from database.models import ServiceRequest, ServiceSlot, Vehicle, Garage, get_db_session
 from backend.agents.orchestrator import MasterOrchestrator
-from datetime import datetime
+from backend.services.garage_catalog import garage_catalog
+from backend.services.garage_load import is_active_service, transfer_garage_load
+from backend.services.garage_spatial_index import garage_index
+from datetime import datetime, timedelta
 
 orchestrator = MasterOrchestrator()
 
@@ -16,6 +19,80 @@ def schedule_service(vehicle_id: int, preferred_date: datetime,
     
     return orchestrator.run(scheduling_input)
 
+def schedule_campaign(make: str, model: str = None, year_from: int = None, year_to: int = None,
+                      service_type: str = "Recall Campaign", start_date: datetime = None, days: int = 30,
+                      max_distance_km: float = 50, description: str = None, commit: bool = True) -> dict:
+    campaign_input = {
+        'task_type': 'schedule_campaign',
+        'make': make,
+        'model': model,
+        'year_from': year_from,
+        'year_to': year_to,
+        'service_type': service_type,
+        'start_date': start_date.isoformat() if isinstance(start_date, datetime) else start_date,
+        'days': days,
+        'max_distance_km': max_distance_km,
+        'description': description,
+        'commit': commit
+    }
+    
+    return orchestrator.run(campaign_input)
+
+def get_available_slots_nearby(latitude: float, longitude: float, radius_km: float = 10,
+                               start_date: datetime = None, days: int = 14, limit: int = 10) -> dict:
+    if latitude is None or longitude is None:
+        return {"success": False, "error": "latitude and longitude are required"}
+    
+    start_date = start_date or datetime.now()
+    if isinstance(start_date, str):
+        try:
+            start_date = datetime.fromisoformat(start_date)
+        except ValueError:
+            return {"success": False, "error": "start_date must be an ISO date"}
+    end_date = start_date + timedelta(days=days)
+    
+    nearby = dict(garage_index.query_radius(latitude, longitude, radius_km))
+    if not nearby:
+        return {"success": True, "slots": [], "garages_in_radius": 0}
+    
+    db = get_db_session()
+    try:
+        # Walks the (date, is_available) index in date order and stops after `limit` nearby rows
+        query = db.query(
+            ServiceSlot.id, ServiceSlot.garage_id, ServiceSlot.date, ServiceSlot.time_slot,
+            ServiceSlot.max_capacity - ServiceSlot.current_bookings
+        ).filter(
+            ServiceSlot.date >= start_date,
+            ServiceSlot.date < end_date,
+            ServiceSlot.is_available == True,
+            ServiceSlot.current_bookings < ServiceSlot.max_capacity,
+            ServiceSlot.garage_id.in_(list(nearby))
+        )
+        rows = query.order_by(ServiceSlot.date).limit(limit).all()
+        if len(rows) == limit:
+            # Rows sharing the last date are all fetched so the closer garage wins the tie at the cut
+            last_date = rows[-1][2]
+            rows = [row for row in rows if row[2] != last_date] + query.filter(ServiceSlot.date == last_date).all()
+        db.close()
+    except Exception as e:
+        db.close()
+        return {"success": False, "error": str(e)}
+    
+    slots = []
+    for slot_id, garage_id, date, time_slot, free in sorted(rows, key=lambda r: (r[2], nearby[r[1]]))[:limit]:
+        garage = garage_catalog.get(garage_id)
+        slots.append({
+            'slot_id': slot_id,
+            'garage_id': garage_id,
+            'garage_name': garage.name if garage else None,
+            'distance_km': round(nearby[garage_id], 2),
+            'date': date.isoformat(),
+            'time_slot': time_slot,
+            'free_seats': free
+        })
+    
+    return {"success": True, "slots": slots, "garages_in_radius": len(nearby)}
+
 def get_user_service_requests(user_id: int) -> list:
     db = get_db_session()
     try:
@@ -97,6 +174,10 @@ def update_service_status(request_id: int, new_status: str,
             db.close()
             return {"success": False, "error": "Service request not found"}
         
+        transfer_garage_load(
+            db, request.garage_id, is_active_service(request.status),
+            garage_id or request.garage_id, is_active_service(new_status)
+        )
         request.status = new_status
         
         if garage_id:
@@ -0,0 +1,216 @@
+from datetime import date, datetime, timedelta
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import case, update
+
+from backend.services.garage_catalog import garage_catalog
+from database.models import ServiceSlot, get_db_session
+
+def label_start_seconds(label: str) -> int:
+    try:
+        hours, minutes = label.split('-')[0].split(':')
+        return int(hours) * 3600 + int(minutes) * 60
+    except (AttributeError, ValueError):
+        return 0
+
+
+class SlotCalendar:
+    def __init__(self, horizon_days: int = 90, max_age_seconds: float = 300):
+        self.horizon_days = horizon_days
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._built_at = 0.0
+        self._catalog_version = None
+        self._stale = True
+        self.start_day = None
+        self.garage_ids = np.empty(0, dtype=np.int64)
+        self.labels = []
+        self.label_starts = np.zeros(0, dtype=np.int64)
+        self.free = np.zeros((0, 0, 0), dtype=np.int16)
+        self.slot_ids = np.zeros((0, 0, 0), dtype=np.int64)
+        self.open_garages = np.zeros((0, 0), dtype=np.int32)
+        self._positions = {}
+        self.stats = {'builds': 0, 'lookups': 0, 'last_build_ms': 0}
+
+    def build(self) -> dict:
+        start = time.perf_counter()
+        snapshot = garage_catalog.snapshot()
+        garage_ids = np.array(sorted(g.id for g in snapshot.active), dtype=np.int64)
+        start_day = date.today()
+        horizon_end = datetime.combine(start_day + timedelta(days=self.horizon_days), datetime.min.time())
+
+        db = get_db_session()
+        try:
+            rows = db.query(
+                ServiceSlot.id, ServiceSlot.garage_id, ServiceSlot.date, ServiceSlot.time_slot,
+                ServiceSlot.is_available, ServiceSlot.max_capacity, ServiceSlot.current_bookings
+            ).filter(
+                ServiceSlot.date >= datetime.combine(start_day, datetime.min.time()),
+                ServiceSlot.date < horizon_end
+            ).all()
+        finally:
+            db.close()
+
+        labels = sorted({row.time_slot for row in rows})
+        label_index = {label: i for i, label in enumerate(labels)}
+        free = np.zeros((len(garage_ids), self.horizon_days, len(labels)), dtype=np.int16)
+        slot_ids = np.zeros(free.shape, dtype=np.int64)
+        positions = {}
+
+        if rows and len(garage_ids):
+            ids = np.array([row.id for row in rows], dtype=np.int64)
+            garages = np.array([row.garage_id for row in rows], dtype=np.int64)
+            days = np.array([(row.date.date() - start_day).days for row in rows], dtype=np.int64)
+            slots = np.array([label_index[row.time_slot] for row in rows], dtype=np.int64)
+            seats = np.array([
+                (row.max_capacity or 0) - (row.current_bookings or 0) if row.is_available else 0
+                for row in rows
+            ], dtype=np.int64)
+
+            g = np.clip(np.searchsorted(garage_ids, garages), 0, len(garage_ids) - 1)
+            keep = garage_ids[g] == garages
+            # Duplicate rows for one garage/day/slot keep the one with the most seats
+            keep = np.flatnonzero(keep)[np.argsort(seats[keep], kind='stable')]
+            g, d, s, ids, seats = g[keep], days[keep], slots[keep], ids[keep], seats[keep]
+            free[g, d, s] = np.clip(seats, 0, None)
+            slot_ids[g, d, s] = ids
+            positions = dict(zip(ids.tolist(), zip(g.tolist(), d.tolist(), s.tolist())))
+
+        with self._lock:
+            self.start_day = start_day
+            self.garage_ids = garage_ids
+            self.labels = labels
+            self.label_starts = np.array([label_start_seconds(label) for label in labels], dtype=np.int64)
+            self.free = free
+            self.slot_ids = slot_ids
+            self.open_garages = (free > 0).sum(axis=0).astype(np.int32)
+            self._positions = positions
+            self._catalog_version = snapshot.version
+            self._built_at = time.time()
+            self._stale = False
+
+        self.stats['builds'] += 1
+        self.stats['last_build_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return {"success": True, "garages": len(garage_ids), "slots": len(positions), "days": self.horizon_days}
+
+    def invalidate(self):
+        with self._lock:
+            self._stale = True
+
+    def needs_build(self) -> bool:
+        return (self._stale or self.start_day != date.today()
+                or time.time() - self._built_at > self.max_age_seconds
+                or garage_catalog.version != self._catalog_version)
+
+    def ensure_built(self):
+        if not self.needs_build():
+            return
+        with self._build_lock:
+            # Concurrent callers wait for the one rebuild instead of each starting their own
+            if self.needs_build():
+                self.build()
+
+    def covers(self, day: date) -> bool:
+        self.ensure_built()
+        return (day - self.start_day).days < self.horizon_days
+
+    def earliest(self, after: datetime, garage_ids: list = None) -> dict:
+        self.ensure_built()
+        self.stats['lookups'] += 1
+
+        with self._lock:
+            first_day = max((after.date() - self.start_day).days, 0)
+            if first_day >= self.horizon_days or not self.labels:
+                return None
+
+            # Blocks on the requested day that already started are not offered, like date >= after in SQL
+            if after.date() >= self.start_day:
+                seconds = after.hour * 3600 + after.minute * 60 + after.second + (after.microsecond > 0)
+                not_started = self.label_starts >= seconds
+            else:
+                not_started = np.ones(len(self.labels), dtype=bool)
+
+            if garage_ids is None:
+                # Days x slots bitmap of "any garage has a seat"; garage choice happens only at the hit
+                window = self.open_garages[first_day:] > 0
+                window[0] &= not_started
+                hits = np.flatnonzero(window.ravel())
+                if not len(hits):
+                    return None
+                d, s = divmod(int(hits[0]), len(self.labels))
+                d += first_day
+                g = int(np.argmax(self.free[:, d, s]))
+            else:
+                if not len(self.garage_ids):
+                    return None
+                wanted = np.asarray(garage_ids, dtype=np.int64)
+                rows = np.clip(np.searchsorted(self.garage_ids, wanted), 0, len(self.garage_ids) - 1)
+                rows = rows[self.garage_ids[rows] == wanted]
+                if not len(rows):
+                    return None
+                window = (self.free[rows, first_day:, :] > 0).any(axis=0)
+                window[0] &= not_started
+                hits = np.flatnonzero(window.ravel())
+                if not len(hits):
+                    return None
+                d, s = divmod(int(hits[0]), len(self.labels))
+                d += first_day
+                g = int(rows[np.argmax(self.free[rows, d, s])])
+
+            return {
+                'slot_id': int(self.slot_ids[g, d, s]),
+                'garage_id': int(self.garage_ids[g]),
+                'date': self.start_day + timedelta(days=d),
+                'time_slot': self.labels[s],
+                'free': int(self.free[g, d, s])
+            }
+
+    def __contains__(self, slot_id: int) -> bool:
+        return slot_id in self._positions
+
+    def adjust(self, slot_id: int, delta: int):
+        with self._lock:
+            position = self._positions.get(slot_id)
+            if position is None:
+                return
+            was_open = self.free[position] > 0
+            self.free[position] = max(int(self.free[position]) + delta, 0)
+            is_open = self.free[position] > 0
+            if was_open != is_open:
+                self.open_garages[position[1], position[2]] += 1 if is_open else -1
+
+    def mark_full(self, slot_id: int):
+        with self._lock:
+            position = self._positions.get(slot_id)
+        if position is not None:
+            self.adjust(slot_id, -int(self.free[position]))
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                'garages': len(self.garage_ids),
+                'slots': len(self._positions),
+                'open_seats': int(self.free.sum()),
+                'start_day': self.start_day.isoformat() if self.start_day else None
+            }
+
+
+slot_calendar = SlotCalendar()
+
+def claim_slot(db, slot_id: int) -> bool:
+    # Single conditional UPDATE: the database, not the caller, decides whether a seat is left
+    result = db.execute(
+        update(ServiceSlot).where(
+            ServiceSlot.id == slot_id,
+            ServiceSlot.is_available == True,
+            ServiceSlot.current_bookings < ServiceSlot.max_capacity
+        ).values(
+            current_bookings=ServiceSlot.current_bookings + 1,
+            is_available=case((ServiceSlot.current_bookings + 1 >= ServiceSlot.max_capacity, False), else_=True)
+        ).execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
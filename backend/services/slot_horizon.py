@@ -0,0 +1,108 @@
+from datetime import date, datetime, time, timedelta
+import threading
+
+from sqlalchemy import insert
+
+from backend.services.slot_calendar import slot_calendar
+from database.models import Garage, ServiceSlot, get_db_session
+
+SLOT_HORIZON_DAYS = 90
+SLOT_BLOCKS = [(9, 12), (12, 15), (15, 18)]
+SLOT_CAPACITY = 3
+BATCH_SIZE = 1000
+WEEKDAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+_lock = threading.Lock()
+
+def parse_working_days(working_days: str) -> set:
+    text = (working_days or '').strip().lower()
+    if not text or text in ('daily', 'all', 'everyday'):
+        return set(range(7))
+
+    days = set()
+    for part in text.replace(' ', '').split(','):
+        bounds = [p[:3] for p in part.split('-')]
+        if not all(b in WEEKDAYS for b in bounds):
+            continue
+        first, last = WEEKDAYS.index(bounds[0]), WEEKDAYS.index(bounds[-1])
+        # Ranges may wrap past Sunday, e.g. Fri-Mon
+        days.update((first + i) % 7 for i in range((last - first) % 7 + 1))
+    return days or set(range(7))
+
+def parse_minutes(value: str, default: int) -> int:
+    try:
+        hours, minutes = value.split(':')
+        return int(hours) * 60 + int(minutes)
+    except (AttributeError, ValueError):
+        return default
+
+def garage_blocks(opening_time: str, closing_time: str) -> list:
+    opens = parse_minutes(opening_time, 8 * 60)
+    closes = parse_minutes(closing_time, 18 * 60)
+    return [(start, end) for start, end in SLOT_BLOCKS if opens <= start * 60 and end * 60 <= closes]
+
+def block_label(block: tuple) -> str:
+    return f"{block[0]:02d}:00-{block[1]:02d}:00"
+
+def extend_slot_horizon(horizon_days: int = SLOT_HORIZON_DAYS, garage_ids: list = None) -> dict:
+    with _lock:
+        start_day = date.today()
+        window_start = datetime.combine(start_day, datetime.min.time())
+        window_end = window_start + timedelta(days=horizon_days)
+
+        db = get_db_session()
+        try:
+            garages = db.query(Garage.id, Garage.opening_time, Garage.closing_time, Garage.working_days).filter(
+                Garage.is_active == True
+            )
+            if garage_ids is not None:
+                garages = garages.filter(Garage.id.in_(garage_ids))
+            garages = garages.all()
+
+            existing = db.query(ServiceSlot.garage_id, ServiceSlot.date, ServiceSlot.time_slot).filter(
+                ServiceSlot.garage_id.in_([g.id for g in garages]),
+                ServiceSlot.date >= window_start,
+                ServiceSlot.date < window_end
+            ).all()
+            # Keyed by calendar day so slots stored with any time of day still count
+            taken = {(row.garage_id, row.date.date(), row.time_slot) for row in existing}
+
+            rows = []
+            for garage in garages:
+                open_days = parse_working_days(garage.working_days)
+                blocks = garage_blocks(garage.opening_time, garage.closing_time)
+                for offset in range(horizon_days):
+                    day = start_day + timedelta(days=offset)
+                    if day.weekday() not in open_days:
+                        continue
+                    for block in blocks:
+                        label = block_label(block)
+                        if (garage.id, day, label) in taken:
+                            continue
+                        rows.append({
+                            'garage_id': garage.id,
+                            'date': datetime.combine(day, time(block[0])),
+                            'time_slot': label,
+                            'is_available': True,
+                            'max_capacity': SLOT_CAPACITY,
+                            'current_bookings': 0
+                        })
+
+            for i in range(0, len(rows), BATCH_SIZE):
+                db.execute(insert(ServiceSlot), rows[i:i + BATCH_SIZE])
+            db.commit()
+            db.close()
+        except Exception as e:
+            db.rollback()
+            db.close()
+            return {"success": False, "error": str(e)}
+
+    if rows:
+        slot_calendar.invalidate()
+    return {
+        "success": True,
+        "garages": len(garages),
+        "existing": len(existing),
+        "created": len(rows),
+        "horizon_days": horizon_days
+    }
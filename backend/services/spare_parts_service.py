@@ -1,5 +1,6 @@
 from database.models import SparePart, get_db_session
 from backend.agents.orchestrator import MasterOrchestrator
+from backend.services.parts_catalog import parts_catalog
 
 orchestrator = MasterOrchestrator()
 
@@ -74,6 +75,7 @@ def add_spare_part(part_number: str, name: str, category: str, oem_price: float,
         part_id = part.id
         db.close()
         
+        parts_catalog.invalidate()
         return {"success": True, "part_id": part_id}
     except Exception as e:
         db.rollback()
@@ -95,6 +97,7 @@ def update_spare_part(part_id: int, **kwargs) -> dict:
         db.commit()
         db.close()
         
+        parts_catalog.invalidate()
         return {"success": True, "message": "Part updated successfully"}
     except Exception as e:
         db.rollback()
@@ -118,6 +121,7 @@ def update_stock(part_id: int, quantity_change: int) -> dict:
         db.commit()
         db.close()
         
+        parts_catalog.invalidate()
         return {"success": True, "new_quantity": new_quantity}
     except Exception as e:
         db.rollback()
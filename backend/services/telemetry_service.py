@@ -0,0 +1,330 @@
+from datetime import datetime
+import atexit
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import bindparam, event, func, inspect, update
+from sqlalchemy.orm import object_session
+
+from database.models import SessionLocal, Vehicle, get_db_session
+from backend.storage.health_history import append_readings
+from backend.services.anomaly_detector import process_readings
+from backend.services.usage_estimator import process_odometer_readings
+
+HEALTH_FIELDS = ['engine_health', 'brake_health', 'battery_health', 'tire_health']
+VALUE_FIELDS = HEALTH_FIELDS + ['total_km']
+MAX_READINGS_PER_REQUEST = 50000
+OWNER_CACHE_TTL_SECONDS = 300
+OWNER_CACHE_MAX_ENTRIES = 50000
+OWNER_CHANGES_KEY = 'vehicle_owner_changes'
+
+def _parse_timestamp(value, default: float) -> float:
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(str(value)).timestamp()
+
+def _to_float(value) -> float:
+    if value is None:
+        return np.nan
+    return float(value)
+
+def validate_readings(readings: list, owner_id: int = None) -> tuple:
+    if not isinstance(readings, list):
+        return None, [{"index": None, "error": "readings must be a list"}]
+
+    n = len(readings)
+    now = time.time()
+    errors = []
+    parsed = np.ones(n, dtype=bool)
+
+    vehicle_ids = np.zeros(n, dtype=np.int64)
+    timestamps = np.zeros(n, dtype=np.float64)
+    values = {field: np.full(n, np.nan) for field in VALUE_FIELDS}
+
+    for i, reading in enumerate(readings):
+        try:
+            vehicle_ids[i] = int(reading['vehicle_id'])
+            timestamps[i] = _parse_timestamp(reading.get('timestamp'), now)
+            for field in VALUE_FIELDS:
+                values[field][i] = _to_float(reading.get(field))
+        except (KeyError, TypeError, ValueError, AttributeError, OverflowError):
+            parsed[i] = False
+            errors.append({"index": i, "error": "Malformed reading"})
+
+    if owner_id is not None:
+        # Non-admin callers may only report for their own vehicles; nothing is queued otherwise
+        owners = _vehicle_owners(np.unique(vehicle_ids[parsed]))
+        foreign = [i for i in np.flatnonzero(parsed) if owners.get(int(vehicle_ids[i])) != owner_id]
+        if foreign:
+            return None, [{"index": int(i), "error": "Vehicle not found"} for i in foreign]
+
+    checks = [
+        (vehicle_ids > 0, "vehicle_id must be positive"),
+        (np.isfinite(timestamps) & (timestamps > 0), "timestamp is invalid"),
+        (timestamps <= now + 300, "timestamp is in the future"),
+        (np.any([~np.isnan(values[f]) for f in VALUE_FIELDS], axis=0) if n else np.ones(0, dtype=bool),
+         "reading has no values"),
+        (~(values['total_km'] < 0), "total_km must be non-negative"),
+    ]
+    for field in VALUE_FIELDS:
+        checks.append((~np.isinf(values[field]), f"{field} must be finite"))
+    for field in HEALTH_FIELDS:
+        column = values[field]
+        checks.append((~((column < 0) | (column > 100)), f"{field} must be between 0 and 100"))
+
+    valid = parsed.copy()
+    for ok, message in checks:
+        failed = np.flatnonzero(parsed & ~ok)
+        errors.extend({"index": int(i), "error": message} for i in failed)
+        valid &= ok
+
+    owners = _vehicle_owners(np.unique(vehicle_ids[valid]))
+    unknown = np.array([v for v in np.unique(vehicle_ids[valid]) if int(v) not in owners], dtype=np.int64)
+    if unknown.size:
+        failed = valid & np.isin(vehicle_ids, unknown)
+        errors.extend({"index": int(i), "error": "Unknown vehicle"} for i in np.flatnonzero(failed))
+        valid &= ~failed
+
+    batch = {
+        'vehicle_id': vehicle_ids[valid],
+        'timestamp': timestamps[valid],
+    }
+    for field in VALUE_FIELDS:
+        batch[field] = values[field][valid]
+
+    errors.sort(key=lambda e: -1 if e['index'] is None else e['index'])
+    return batch, errors
+
+
+_known_owners = {}
+_known_lock = threading.Lock()
+
+def invalidate_vehicle_owners(vehicle_ids=None):
+    with _known_lock:
+        if vehicle_ids is None:
+            _known_owners.clear()
+            return
+        for vehicle_id in vehicle_ids:
+            _known_owners.pop(int(vehicle_id), None)
+
+def _vehicle_owners(vehicle_ids: np.ndarray) -> dict:
+    ids = [int(v) for v in vehicle_ids]
+    now = time.monotonic()
+    with _known_lock:
+        missing = [v for v in ids if v not in _known_owners or _known_owners[v][1] <= now]
+    if missing:
+        db = get_db_session()
+        try:
+            found = dict(db.query(Vehicle.id, Vehicle.owner_id).filter(Vehicle.id.in_(missing)).all())
+        finally:
+            db.close()
+        expires = now + OWNER_CACHE_TTL_SECONDS
+        with _known_lock:
+            for vehicle_id in missing:
+                if vehicle_id in found:
+                    _known_owners[vehicle_id] = (found[vehicle_id], expires)
+                else:
+                    _known_owners.pop(vehicle_id, None)
+            if len(_known_owners) > OWNER_CACHE_MAX_ENTRIES:
+                for vehicle_id in [v for v, (_, exp) in _known_owners.items() if exp <= now]:
+                    del _known_owners[vehicle_id]
+                if len(_known_owners) > OWNER_CACHE_MAX_ENTRIES:
+                    _known_owners.clear()
+                    _known_owners.update({v: (found[v], expires) for v in ids if v in found})
+
+    with _known_lock:
+        return {v: _known_owners[v][0] for v in ids if v in _known_owners}
+
+def _record_owner_change(target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(OWNER_CHANGES_KEY, set()).add(target.id)
+
+@event.listens_for(Vehicle, 'after_update')
+def _vehicle_owner_updated(mapper, connection, target):
+    if inspect(target).attrs.owner_id.history.has_changes():
+        _record_owner_change(target)
+
+@event.listens_for(Vehicle, 'after_delete')
+def _vehicle_deleted(mapper, connection, target):
+    _record_owner_change(target)
+
+@event.listens_for(SessionLocal, 'after_commit')
+def _invalidate_committed_owners(session):
+    changed = session.info.pop(OWNER_CHANGES_KEY, None)
+    if changed:
+        invalidate_vehicle_owners(changed)
+
+@event.listens_for(SessionLocal, 'after_rollback')
+def _discard_rolled_back_owners(session):
+    session.info.pop(OWNER_CHANGES_KEY, None)
+
+
+def latest_per_vehicle(batch: dict) -> list:
+    order = np.lexsort((batch['timestamp'], batch['vehicle_id']))
+    vehicle_ids = batch['vehicle_id'][order]
+    unique_ids = np.unique(vehicle_ids)
+
+    rows = [{'vid': int(v)} for v in unique_ids]
+    for field in VALUE_FIELDS:
+        column = batch[field][order]
+        present = ~np.isnan(column)
+        latest = np.full(len(unique_ids), np.nan)
+        if present.any():
+            ids_present = vehicle_ids[present]
+            last_index = len(ids_present) - 1 - np.unique(ids_present[::-1], return_index=True)[1]
+            positions = np.searchsorted(unique_ids, ids_present[last_index])
+            latest[positions] = column[present][last_index]
+        for row, value in zip(rows, latest):
+            row[f"new_{field}"] = None if np.isnan(value) else float(value)
+    return rows
+
+
+class TelemetryBuffer:
+    def __init__(self, flush_interval: float = 0.5, flush_size: int = 20000, max_pending: int = 500000):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._batches = []
+        self._pending = 0
+        self._listeners = []
+        self._thread = None
+        self.stats = {'accepted': 0, 'flushed': 0, 'flushes': 0, 'failed': 0, 'failed_flushes': 0,
+                      'dropped': 0, 'last_flush_ms': 0}
+
+    def add_listener(self, listener):
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def add(self, batch: dict) -> bool:
+        size = len(batch['vehicle_id'])
+        if not size:
+            return True
+
+        with self._lock:
+            if self._pending + size > self.max_pending:
+                return False
+            self._batches.append(batch)
+            self._pending += size
+            self.stats['accepted'] += size
+            pending = self._pending
+
+        self._ensure_started()
+        if pending >= self.flush_size:
+            self._wakeup.set()
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batches = self._batches
+                self._batches = []
+                self._pending = 0
+
+            if not batches:
+                return 0
+
+            start = time.perf_counter()
+            batch = {key: np.concatenate([b[key] for b in batches]) for key in batches[0]}
+            rows = latest_per_vehicle(batch)
+
+            size = len(batch['vehicle_id'])
+            db = get_db_session()
+            try:
+                stmt = update(Vehicle).where(Vehicle.id == bindparam('vid')).values(**{
+                    field: func.coalesce(bindparam(f"new_{field}"), getattr(Vehicle, field))
+                    for field in VALUE_FIELDS
+                })
+                db.connection().execute(stmt, rows)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Error flushing telemetry: {e}")
+                self._requeue(batch)
+                self.stats['failed'] += size
+                self.stats['failed_flushes'] += 1
+                return 0
+            finally:
+                db.close()
+
+            for listener in self._listeners:
+                try:
+                    listener(batch)
+                except Exception as e:
+                    print(f"Error in telemetry listener: {e}")
+
+            self.stats['flushed'] += size
+            self.stats['flushes'] += 1
+            self.stats['last_flush_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            return size
+
+    def _requeue(self, batch: dict):
+        # Failed rows go back to the front of the queue and keep counting against max_pending,
+        # so a database outage turns into 503 back-pressure instead of lost readings
+        size = len(batch['vehicle_id'])
+        with self._lock:
+            if self._pending + size > self.max_pending:
+                self.stats['dropped'] += size
+                print(f"Dropping {size} telemetry readings: retry queue is full")
+                return
+            self._batches.insert(0, batch)
+            self._pending += size
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="telemetry-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing telemetry: {e}")
+
+
+telemetry_buffer = TelemetryBuffer()
+telemetry_buffer.add_listener(append_readings)
+telemetry_buffer.add_listener(process_readings)
+telemetry_buffer.add_listener(process_odometer_readings)
+atexit.register(telemetry_buffer.flush)
+
+def ingest_readings(readings: list, owner_id: int = None) -> dict:
+    if isinstance(readings, list) and len(readings) > MAX_READINGS_PER_REQUEST:
+        return {"success": False, "error": f"At most {MAX_READINGS_PER_REQUEST} readings per request"}
+
+    batch, errors = validate_readings(readings, owner_id)
+    if batch is None:
+        result = {"success": False, "error": errors[0]['error']}
+        if errors[0]['index'] is not None:
+            # Readings for vehicles the caller does not own; the whole request is refused
+            result.update(forbidden=True, errors=errors[:50])
+        return result
+
+    if not telemetry_buffer.add(batch):
+        return {"success": False, "error": "Telemetry buffer is full, retry later", "retry": True}
+
+    return {
+        "success": True,
+        "accepted": int(len(batch['vehicle_id'])),
+        "rejected": len(errors),
+        "errors": errors[:50]
+    }
+
+def get_ingest_stats() -> dict:
+    return {**telemetry_buffer.stats, 'pending': telemetry_buffer.pending()}
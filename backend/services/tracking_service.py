@@ -0,0 +1,312 @@
+from datetime import datetime
+import atexit
+import threading
+import time
+
+from sqlalchemy import bindparam, update
+
+from backend.services.event_stream import tracking_broker, tracking_topic
+from database.models import BreakdownEvent, get_db_session
+from utils.geo import haversine_km
+
+TRACKABLE_STATUSES = ['garage_assigned', 'garage_en_route']
+ARRIVAL_RADIUS_KM = 0.1
+DEFAULT_SPEED_KMH = 30.0
+MIN_SPEED_KMH = 5.0
+MAX_SPEED_KMH = 150.0
+SPEED_ALPHA = 0.3
+DELTA_FIELDS = ['latitude', 'longitude', 'speed_kmh', 'remaining_distance_km', 'eta_minutes', 'arrived']
+
+class Track:
+    __slots__ = ('breakdown_id', 'garage_id', 'dest_lat', 'dest_lng', 'lat', 'lng', 'timestamp',
+                 'speed_kmh', 'remaining_km', 'eta_minutes', 'arrived_at', 'updates', 'last_update')
+
+    def __init__(self, breakdown_id: int, garage_id: int, dest_lat: float, dest_lng: float):
+        self.breakdown_id = breakdown_id
+        self.garage_id = garage_id
+        self.dest_lat = dest_lat
+        self.dest_lng = dest_lng
+        self.lat = None
+        self.lng = None
+        self.timestamp = None
+        self.speed_kmh = DEFAULT_SPEED_KMH
+        self.remaining_km = None
+        self.eta_minutes = None
+        self.arrived_at = None
+        self.updates = 0
+        self.last_update = time.time()
+
+    def apply(self, lat: float, lng: float, timestamp: float, speed_kmh: float = None) -> bool:
+        if self.timestamp is not None and timestamp <= self.timestamp:
+            return False
+
+        if speed_kmh is None and self.timestamp is not None:
+            hours = (timestamp - self.timestamp) / 3600
+            speed_kmh = haversine_km(self.lat, self.lng, lat, lng) / hours
+        if speed_kmh is not None and 0 <= speed_kmh <= MAX_SPEED_KMH:
+            self.speed_kmh += SPEED_ALPHA * (speed_kmh - self.speed_kmh)
+
+        self.lat = lat
+        self.lng = lng
+        self.timestamp = timestamp
+        self.remaining_km = haversine_km(lat, lng, self.dest_lat, self.dest_lng)
+        self.eta_minutes = int(round(self.remaining_km / max(self.speed_kmh, MIN_SPEED_KMH) * 60))
+        if self.arrived_at is None and self.remaining_km <= ARRIVAL_RADIUS_KM:
+            self.arrived_at = timestamp
+        self.updates += 1
+        self.last_update = time.time()
+        return True
+
+    def to_dict(self) -> dict:
+        return {
+            'breakdown_id': self.breakdown_id,
+            'garage_id': self.garage_id,
+            'sequence': self.updates,
+            'latitude': self.lat,
+            'longitude': self.lng,
+            'timestamp': self.timestamp,
+            'speed_kmh': round(self.speed_kmh, 1),
+            'remaining_distance_km': round(self.remaining_km, 2) if self.remaining_km is not None else None,
+            'eta_minutes': self.eta_minutes,
+            'arrived': self.arrived_at is not None,
+            'destination': {'latitude': self.dest_lat, 'longitude': self.dest_lng}
+        }
+
+
+class TrackingStore:
+    def __init__(self, flush_interval: float = 2.0, idle_seconds: float = 3600):
+        self.flush_interval = flush_interval
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._tracks = {}
+        self._published = {}
+        self._dirty = set()
+        self._listeners = []
+        self._thread = None
+        self.stats = {'updates': 0, 'rejected': 0, 'flushed_rows': 0, 'flushes': 0, 'last_flush_ms': 0}
+
+    def add_listener(self, listener):
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def _load_track(self, breakdown_id: int) -> Track:
+        db = get_db_session()
+        try:
+            row = db.query(
+                BreakdownEvent.garage_id,
+                BreakdownEvent.vehicle_latitude,
+                BreakdownEvent.vehicle_longitude,
+                BreakdownEvent.status
+            ).filter(BreakdownEvent.id == breakdown_id).first()
+        finally:
+            db.close()
+
+        if not row or row.garage_id is None or row.status not in TRACKABLE_STATUSES:
+            return None
+        if row.vehicle_latitude is None or row.vehicle_longitude is None:
+            return None
+        return Track(breakdown_id, row.garage_id, row.vehicle_latitude, row.vehicle_longitude)
+
+    def update_position(self, breakdown_id: int, lat: float, lng: float,
+                        timestamp: float = None, speed_kmh: float = None) -> dict:
+        timestamp = timestamp if timestamp is not None else time.time()
+
+        track = self._tracks.get(breakdown_id)
+        if track is None:
+            track = self._load_track(breakdown_id)
+            if track is None:
+                with self._lock:
+                    self.stats['rejected'] += 1
+                return None
+            with self._lock:
+                track = self._tracks.setdefault(breakdown_id, track)
+
+        with self._lock:
+            if not track.apply(lat, lng, timestamp, speed_kmh):
+                self.stats['rejected'] += 1
+                return None
+            self._dirty.add(breakdown_id)
+            self.stats['updates'] += 1
+            state = track.to_dict()
+
+        self._ensure_started()
+        return state
+
+    def get_state(self, breakdown_id: int) -> dict:
+        with self._lock:
+            track = self._tracks.get(breakdown_id)
+            return track.to_dict() if track and track.lat is not None else None
+
+    def stop_tracking(self, breakdown_id: int, status: str = None):
+        if breakdown_id not in self._tracks:
+            return
+        self.flush()
+        with self._lock:
+            track = self._tracks.pop(breakdown_id, None)
+            self._published.pop(breakdown_id, None)
+        if track is not None:
+            tracking_broker.publish(tracking_topic(breakdown_id), track.updates + 1, 'ended',
+                                    {'breakdown_id': breakdown_id, 'status': status})
+
+    def position_delta(self, state: dict, watched: bool) -> dict:
+        breakdown_id = state['breakdown_id']
+        with self._lock:
+            if not watched:
+                self._published.pop(breakdown_id, None)
+                return {}
+            previous = self._published.get(breakdown_id, {})
+            self._published[breakdown_id] = state
+        return {field: state[field] for field in DELTA_FIELDS if previous.get(field) != state[field]}
+
+    def active_count(self) -> int:
+        with self._lock:
+            return len(self._tracks)
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                dirty = self._dirty
+                self._dirty = set()
+                positions = []
+                arrivals = []
+                states = []
+                for breakdown_id in dirty:
+                    track = self._tracks.get(breakdown_id)
+                    if track is None:
+                        continue
+                    positions.append({
+                        'bid': breakdown_id,
+                        'new_lat': track.lat,
+                        'new_lng': track.lng,
+                        'new_eta': track.eta_minutes
+                    })
+                    states.append(track.to_dict())
+                    if track.arrived_at is not None:
+                        arrivals.append({'bid': breakdown_id, 'new_arrived_at': datetime.fromtimestamp(track.arrived_at)})
+
+                cutoff = time.time() - self.idle_seconds
+                for breakdown_id in [b for b, t in self._tracks.items() if t.last_update < cutoff and b not in dirty]:
+                    del self._tracks[breakdown_id]
+
+            if not positions:
+                return 0
+
+            start = time.perf_counter()
+            db = get_db_session()
+            try:
+                conn = db.connection()
+                conn.execute(
+                    update(BreakdownEvent).where(BreakdownEvent.id == bindparam('bid')).values(
+                        garage_current_lat=bindparam('new_lat'),
+                        garage_current_lng=bindparam('new_lng'),
+                        estimated_arrival_minutes=bindparam('new_eta')
+                    ),
+                    positions
+                )
+                if arrivals:
+                    conn.execute(
+                        update(BreakdownEvent).where(
+                            BreakdownEvent.id == bindparam('bid'),
+                            BreakdownEvent.garage_arrived_at == None
+                        ).values(garage_arrived_at=bindparam('new_arrived_at')),
+                        arrivals
+                    )
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                with self._lock:
+                    self._dirty.update(p['bid'] for p in positions)
+                print(f"Error flushing tracking positions: {e}")
+                return 0
+            finally:
+                db.close()
+
+            for listener in self._listeners:
+                try:
+                    listener(states)
+                except Exception as e:
+                    print(f"Error in tracking listener: {e}")
+
+            self.stats['flushed_rows'] += len(positions)
+            self.stats['flushes'] += 1
+            self.stats['last_flush_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            return len(positions)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="tracking-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing tracking positions: {e}")
+
+
+def publish_position_deltas(states: list):
+    for state in states:
+        breakdown_id = state['breakdown_id']
+        topic = tracking_topic(breakdown_id)
+        delta = tracking_store.position_delta(state, tracking_broker.subscriber_count(topic) > 0)
+        if delta:
+            tracking_broker.publish(topic, state['sequence'], 'position',
+                                    {'breakdown_id': breakdown_id, 'sequence': state['sequence'], **delta})
+
+def get_tracking_events_since(breakdown_id: int, last_event_id: int) -> list:
+    state = tracking_store.get_state(breakdown_id)
+    if state is None or state['sequence'] <= last_event_id:
+        return []
+    return [{'id': state['sequence'], 'event': 'position', 'data': {field: state[field] for field in ['breakdown_id', 'sequence'] + DELTA_FIELDS}}]
+
+
+tracking_store = TrackingStore()
+tracking_store.add_listener(publish_position_deltas)
+atexit.register(tracking_store.flush)
+
+def _parse_timestamp(value) -> float:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return datetime.fromisoformat(str(value)).timestamp()
+
+def update_tracking_position(breakdown_id: int, latitude: float, longitude: float,
+                             timestamp: float = None, speed_kmh: float = None) -> dict:
+    try:
+        latitude = float(latitude)
+        longitude = float(longitude)
+    except (TypeError, ValueError):
+        return {"success": False, "error": "latitude and longitude are required", "invalid": True}
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return {"success": False, "error": "Coordinates out of range", "invalid": True}
+
+    try:
+        timestamp = _parse_timestamp(timestamp)
+        speed_kmh = float(speed_kmh) if speed_kmh is not None else None
+    except (TypeError, ValueError, OverflowError):
+        return {"success": False, "error": "timestamp or speed_kmh is malformed", "invalid": True}
+    if timestamp is not None and not (0 < timestamp <= time.time() + 300):
+        return {"success": False, "error": "timestamp is invalid or in the future", "invalid": True}
+    if speed_kmh is not None and not (0 <= speed_kmh < float('inf')):
+        return {"success": False, "error": "speed_kmh must be a non-negative number", "invalid": True}
+
+    state = tracking_store.update_position(breakdown_id, latitude, longitude, timestamp, speed_kmh)
+    if state is None:
+        return {"success": False, "error": "Breakdown is not being tracked or update is out of order"}
+    return {"success": True, "tracking": state}
+
+def get_tracking_state(breakdown_id: int) -> dict:
+    state = tracking_store.get_state(breakdown_id)
+    if state is None:
+        return {"success": False, "error": "No live position for this breakdown"}
+    return {"success": True, "tracking": state}
+
+def get_tracking_stats() -> dict:
+    return {**tracking_store.stats, 'active_tracks': tracking_store.active_count()}
@@ -0,0 +1,152 @@
+from collections import deque
+from datetime import datetime
+import json
+import threading
+
+import numpy as np
+from sqlalchemy import bindparam, insert, update
+
+from database.models import Vehicle, VehicleUsageWindow, get_db_session
+
+DAYS_PER_MONTH = 30.44
+CHECKPOINT_SPACING_DAYS = 7
+MAX_CHECKPOINTS = 13
+MIN_SPAN_DAYS = 3
+
+class UsageWindow:
+    __slots__ = ('checkpoints', 'latest_ts', 'latest_km', 'persisted')
+
+    def __init__(self, checkpoints=None, latest_ts: float = None, latest_km: float = None, persisted: bool = False):
+        self.checkpoints = deque(checkpoints or [], maxlen=MAX_CHECKPOINTS)
+        self.latest_ts = latest_ts
+        self.latest_km = latest_km
+        self.persisted = persisted
+
+    def add_reading(self, ts: float, km: float) -> bool:
+        if self.latest_ts is not None and ts <= self.latest_ts:
+            return False
+
+        if self.latest_km is not None and km < self.latest_km:
+            self.checkpoints.clear()
+
+        if not self.checkpoints or ts - self.checkpoints[-1][0] >= CHECKPOINT_SPACING_DAYS * 86400:
+            self.checkpoints.append((ts, km))
+
+        self.latest_ts = ts
+        self.latest_km = km
+        return True
+
+    def km_per_month(self) -> float:
+        if not self.checkpoints or self.latest_ts is None:
+            return None
+
+        oldest_ts, oldest_km = self.checkpoints[0]
+        span_days = (self.latest_ts - oldest_ts) / 86400
+        if span_days < MIN_SPAN_DAYS:
+            return None
+
+        return (self.latest_km - oldest_km) / span_days * DAYS_PER_MONTH
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'checkpoints': [list(c) for c in self.checkpoints],
+            'latest': [self.latest_ts, self.latest_km]
+        })
+
+    @classmethod
+    def from_json(cls, state: str) -> 'UsageWindow':
+        data = json.loads(state)
+        latest_ts, latest_km = data.get('latest', [None, None])
+        return cls([tuple(c) for c in data.get('checkpoints', [])], latest_ts, latest_km, persisted=True)
+
+
+class UsageEstimator:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows = {}
+
+    def _load_windows(self, db, vehicle_ids: list):
+        missing = [v for v in vehicle_ids if v not in self._windows]
+        if not missing:
+            return
+
+        rows = db.query(VehicleUsageWindow).filter(VehicleUsageWindow.vehicle_id.in_(missing)).all()
+        for row in rows:
+            self._windows[row.vehicle_id] = UsageWindow.from_json(row.state)
+        for vehicle_id in missing:
+            if vehicle_id not in self._windows:
+                self._windows[vehicle_id] = UsageWindow()
+
+    def process_batch(self, batch: dict) -> int:
+        has_km = ~np.isnan(batch['total_km'])
+        if not has_km.any():
+            return 0
+
+        vehicle_ids = batch['vehicle_id'][has_km]
+        timestamps = batch['timestamp'][has_km]
+        kms = batch['total_km'][has_km]
+        order = np.lexsort((timestamps, vehicle_ids))
+        batch_vehicle_ids = [int(v) for v in np.unique(vehicle_ids)]
+
+        db = get_db_session()
+        try:
+            with self._lock:
+                self._load_windows(db, batch_vehicle_ids)
+
+                changed = set()
+                for i in order:
+                    vehicle_id = int(vehicle_ids[i])
+                    if self._windows[vehicle_id].add_reading(float(timestamps[i]), float(kms[i])):
+                        changed.add(vehicle_id)
+
+                inserts = []
+                updates = []
+                usage = []
+                now = datetime.utcnow()
+                for vehicle_id in changed:
+                    window = self._windows[vehicle_id]
+                    row = {'vid': vehicle_id, 'new_state': window.to_json(), 'new_updated_at': now}
+                    (updates if window.persisted else inserts).append(row)
+                    window.persisted = True
+
+                    estimate = window.km_per_month()
+                    if estimate is not None:
+                        usage.append({'vid': vehicle_id, 'usage': round(estimate, 1)})
+
+            if inserts:
+                db.execute(insert(VehicleUsageWindow), [
+                    {'vehicle_id': r['vid'], 'state': r['new_state'], 'updated_at': r['new_updated_at']} for r in inserts
+                ])
+            if updates:
+                db.connection().execute(
+                    update(VehicleUsageWindow).where(VehicleUsageWindow.vehicle_id == bindparam('vid')).values(
+                        state=bindparam('new_state'), updated_at=bindparam('new_updated_at')
+                    ),
+                    updates
+                )
+            if usage:
+                db.connection().execute(
+                    update(Vehicle).where(Vehicle.id == bindparam('vid')).values(avg_km_per_month=bindparam('usage')),
+                    usage
+                )
+            db.commit()
+            return len(usage)
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for vehicle_id in batch_vehicle_ids:
+                    self._windows.pop(vehicle_id, None)
+            raise
+        finally:
+            db.close()
+
+    def estimate(self, vehicle_id: int) -> float:
+        with self._lock:
+            window = self._windows.get(vehicle_id)
+            return window.km_per_month() if window else None
+
+
+usage_estimator = UsageEstimator()
+
+def process_odometer_readings(batch: dict) -> int:
+    return usage_estimator.process_batch(batch)
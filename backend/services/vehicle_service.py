@@ -1,6 +1,8 @@
 from database.models import Vehicle, User, get_db_session
 from backend.agents.orchestrator import MasterOrchestrator
+from backend.storage.health_history import VALUE_FIELDS, get_health_history
 from datetime import datetime
+import numpy as np
 
 orchestrator = MasterOrchestrator()
 
@@ -89,11 +91,70 @@ def get_vehicle_prediction(vehicle_id: int, user_id: int = None) -> dict:
         'breakdown_count': breakdown_count,
         'engine_health': vehicle.get('engine_health', 100),
         'brake_health': vehicle.get('brake_health', 100),
-        'battery_health': vehicle.get('battery_health', 100)
+        'battery_health': vehicle.get('battery_health', 100),
+        'tire_health': vehicle.get('tire_health', 100),
+        'vehicle_year': vehicle.get('year')
     }
     
     return orchestrator.run(prediction_input)
 
+def get_vehicle_predictions(owner_id: int = None) -> dict:
+    from database.models import BreakdownEvent
+    from sqlalchemy import func
+    
+    db = get_db_session()
+    try:
+        query = db.query(Vehicle)
+        if owner_id is not None:
+            query = query.filter(Vehicle.owner_id == owner_id)
+        vehicles = query.order_by(Vehicle.id).all()
+        
+        breakdown_counts = dict(db.query(BreakdownEvent.vehicle_id, func.count(BreakdownEvent.id)).filter(
+            BreakdownEvent.vehicle_id.in_([v.id for v in vehicles])
+        ).group_by(BreakdownEvent.vehicle_id).all())
+        
+        inputs = [{
+            'vehicle_id': v.id,
+            'last_service_date': v.last_service_date.isoformat() if v.last_service_date else None,
+            'avg_km_per_month': v.avg_km_per_month or 1000,
+            'service_interval_km': v.service_interval_km or 10000,
+            'service_interval_months': v.service_interval_months or 6,
+            'breakdown_count': breakdown_counts.get(v.id, 0),
+            'engine_health': v.engine_health if v.engine_health is not None else 100,
+            'brake_health': v.brake_health if v.brake_health is not None else 100,
+            'battery_health': v.battery_health if v.battery_health is not None else 100,
+            'tire_health': v.tire_health if v.tire_health is not None else 100,
+            'vehicle_year': v.year
+        } for v in vehicles]
+        db.close()
+    except Exception as e:
+        db.close()
+        return {"success": False, "error": str(e)}
+    
+    predictions = orchestrator.get_agent('prediction').predict_batch(inputs)
+    return {
+        "success": True,
+        "predictions": {str(i['vehicle_id']): p for i, p in zip(inputs, predictions)}
+    }
+
+def get_vehicle_health_history(vehicle_ids: list, field: str = 'engine_health', days: int = 90) -> dict:
+    if field not in VALUE_FIELDS:
+        return {"success": False, "error": f"Unknown field: {field}"}
+    
+    history = get_health_history(vehicle_ids, field, days)
+    
+    series = {}
+    boundaries = list(np.flatnonzero(history['vehicle_id'][1:] != history['vehicle_id'][:-1]) + 1)
+    for start, end in zip([0] + boundaries, boundaries + [len(history['vehicle_id'])]):
+        if start == end:
+            continue
+        series[int(history['vehicle_id'][start])] = {
+            'timestamps': history['timestamp'][start:end].tolist(),
+            'values': history['value'][start:end].tolist()
+        }
+    
+    return {"success": True, "field": field, "days": days, "series": series}
+
 def get_all_vehicles() -> list:
     db = get_db_session()
     try:
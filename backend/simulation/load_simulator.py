@@ -0,0 +1,274 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import func, insert
+
+from backend.services.breakdown_service import orchestrator, report_breakdown
+from backend.services.garage_catalog import garage_catalog
+from backend.services.garage_load import ACTIVE_BREAKDOWN_STATUSES, adjust_garage_load
+from backend.services.tracking_service import tracking_store, update_tracking_position
+from backend.simulation.tracks import generate_tracks
+from database.models import BreakdownEvent, Vehicle, get_db_session, require_scratch_database
+
+SIMULATION_TAG = "load-simulation"
+BREAKDOWN_TYPES = ['Flat Tire', 'Battery Dead', 'Engine Overheating', 'Brake Failure', 'Fuel Issue']
+
+class LoadSimulator:
+    def __init__(self, trucks: int = 500, update_interval: float = 2.0, breakdown_rate: float = 1.0,
+                 eta_rate: float = 20.0, duration: float = 30.0, workers: int = 16,
+                 center_lat: float = 28.6139, center_lng: float = 77.2090, seed: int = 0,
+                 scratch_db: str = None):
+        self.trucks = trucks
+        self.update_interval = update_interval
+        self.breakdown_rate = breakdown_rate
+        self.eta_rate = eta_rate
+        self.duration = duration
+        self.workers = workers
+        self.center_lat = center_lat
+        self.center_lng = center_lng
+        self.rng = np.random.default_rng(seed)
+        self.scratch_db = scratch_db
+
+        steps = max(2, int(np.ceil(duration / update_interval)) + 1)
+        self.tracks = generate_tracks(trucks, steps, center_lat, center_lng, seed=seed) if trucks else None
+        self.breakdown_ids = []
+        self.vehicle_ids = []
+        self.garages = []
+        self.points = {}
+        self.garage_picks = None
+        self._latencies = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def setup(self):
+        require_scratch_database(self.scratch_db)
+        self.garages = garage_catalog.active()
+        if not self.garages:
+            raise RuntimeError("No active garages to simulate against")
+
+        db = get_db_session()
+        try:
+            self.vehicle_ids = [v[0] for v in db.query(Vehicle.id).all()]
+            if not self.vehicle_ids:
+                raise RuntimeError("No vehicles to simulate against")
+
+            if self.trucks:
+                now = datetime.now()
+                garage_ids = self.rng.choice([g.id for g in self.garages], self.trucks)
+                db.execute(insert(BreakdownEvent), [{
+                    'vehicle_id': self.vehicle_ids[i % len(self.vehicle_ids)],
+                    'garage_id': int(garage_ids[i]),
+                    'breakdown_type': BREAKDOWN_TYPES[i % len(BREAKDOWN_TYPES)],
+                    'description': SIMULATION_TAG,
+                    'vehicle_latitude': float(self.tracks['end_lat'][i]),
+                    'vehicle_longitude': float(self.tracks['end_lng'][i]),
+                    'status': 'garage_en_route',
+                    'reported_at': now,
+                    'garage_assigned_at': now
+                } for i in range(self.trucks)])
+                # Simulated trucks are active jobs, so their garages carry the load like real ones
+                for garage_id, count in zip(*np.unique(garage_ids, return_counts=True)):
+                    adjust_garage_load(db, int(garage_id), int(count))
+                db.commit()
+                self.breakdown_ids = [row[0] for row in db.query(BreakdownEvent.id).filter(
+                    BreakdownEvent.description == SIMULATION_TAG,
+                    BreakdownEvent.status == 'garage_en_route'
+                ).order_by(BreakdownEvent.id.desc()).limit(self.trucks).all()][::-1]
+        finally:
+            db.close()
+
+    def cleanup(self) -> int:
+        for breakdown_id in self.breakdown_ids:
+            tracking_store.stop_tracking(breakdown_id)
+
+        db = get_db_session()
+        try:
+            active = db.query(BreakdownEvent.garage_id, func.count(BreakdownEvent.id)).filter(
+                BreakdownEvent.description == SIMULATION_TAG,
+                BreakdownEvent.garage_id != None,
+                BreakdownEvent.status.in_(ACTIVE_BREAKDOWN_STATUSES)
+            ).group_by(BreakdownEvent.garage_id).all()
+            for garage_id, count in active:
+                adjust_garage_load(db, garage_id, -count)
+
+            deleted = db.query(BreakdownEvent).filter(
+                BreakdownEvent.description == SIMULATION_TAG
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+    def schedule(self) -> tuple:
+        times = []
+        kinds = []
+        args = []
+
+        if self.trucks:
+            offsets = self.rng.uniform(0, self.update_interval, self.trucks)
+            ticks = np.arange(0, self.duration, self.update_interval)
+            due = (offsets[:, None] + ticks[None, :]).ravel()
+            truck = np.repeat(np.arange(self.trucks), len(ticks))
+            step = np.tile(np.arange(len(ticks)), self.trucks)
+            keep = due < self.duration
+            times.append(due[keep])
+            kinds.append(np.zeros(keep.sum(), dtype=np.int8))
+            args.append(truck[keep] * self.tracks['lats'].shape[1] + step[keep])
+
+        for kind, rate in [(1, self.breakdown_rate), (2, self.eta_rate)]:
+            count = self.rng.poisson(rate * self.duration) if rate > 0 else 0
+            self.points[kind] = self.random_points(count)
+            times.append(self.rng.uniform(0, self.duration, count))
+            kinds.append(np.full(count, kind, dtype=np.int8))
+            args.append(np.arange(count))
+
+        # Random draws happen up front because the generator is not thread-safe
+        self.garage_picks = np.argsort(self.rng.random((len(self.points[2]), len(self.garages))), axis=1)[:, :3]
+
+        times = np.concatenate(times)
+        order = np.argsort(times, kind='stable')
+        return times[order], np.concatenate(kinds)[order], np.concatenate(args)[order]
+
+    def track_update(self, arg: int, started: float):
+        truck, step = divmod(int(arg), self.tracks['lats'].shape[1])
+        result = update_tracking_position(
+            self.breakdown_ids[truck],
+            float(self.tracks['lats'][truck, step]),
+            float(self.tracks['lngs'][truck, step]),
+            started + step * self.update_interval
+        )
+        return result.get('success')
+
+    def report(self, arg: int, started: float):
+        lat, lng = self.points[1][arg]
+        result = report_breakdown(
+            vehicle_id=self.vehicle_ids[arg % len(self.vehicle_ids)],
+            breakdown_type=BREAKDOWN_TYPES[arg % len(BREAKDOWN_TYPES)],
+            description=SIMULATION_TAG,
+            latitude=lat,
+            longitude=lng
+        )
+        return result.get('success')
+
+    def estimate(self, arg: int, started: float):
+        lat, lng = self.points[2][arg]
+        result = orchestrator.get_agent('eta').run({
+            'vehicle_latitude': lat,
+            'vehicle_longitude': lng,
+            'breakdown_type': BREAKDOWN_TYPES[arg % len(BREAKDOWN_TYPES)],
+            'garages': [{'id': g.id, 'latitude': g.latitude, 'longitude': g.longitude}
+                        for g in (self.garages[i] for i in self.garage_picks[arg])]
+        })
+        return result.get('success')
+
+    def random_points(self, count: int) -> list:
+        offsets = self.rng.normal(0, 15.0, (count, 2)) / 111.32
+        lats = self.center_lat + offsets[:, 0]
+        lngs = self.center_lng + offsets[:, 1] / np.cos(np.radians(self.center_lat))
+        return list(zip(lats.tolist(), lngs.tolist()))
+
+    def _execute(self, name: str, handler, arg: int, due: float, started: float):
+        try:
+            ok = handler(arg, started)
+        except Exception as e:
+            ok = False
+            print(f"Error in simulated {name}: {e}")
+        # Latency is measured from the scheduled time, so queueing delay counts against it
+        latency = time.perf_counter() - due
+        with self._lock:
+            self._latencies[name].append(latency)
+            if not ok:
+                self._errors[name] += 1
+
+    def run(self) -> dict:
+        handlers = [('tracking', self.track_update), ('breakdown', self.report), ('eta', self.estimate)]
+        for name, _ in handlers:
+            self._latencies[name] = []
+            self._errors[name] = 0
+
+        times, kinds, args = self.schedule()
+        wall_started = time.time()
+        started = time.perf_counter()
+        max_lag = 0.0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for due_offset, kind, arg in zip(times, kinds, args):
+                due = started + due_offset
+                wait = due - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                else:
+                    max_lag = max(max_lag, -wait)
+                name, handler = handlers[kind]
+                executor.submit(self._execute, name, handler, int(arg), due, wall_started)
+
+        elapsed = time.perf_counter() - started
+        flush_start = time.perf_counter()
+        tracking_store.flush()
+        final_flush_ms = round((time.perf_counter() - flush_start) * 1000, 2)
+
+        paths = {}
+        for name, _ in handlers:
+            latencies = np.array(self._latencies[name]) * 1000
+            if not len(latencies):
+                continue
+            paths[name] = {
+                'operations': int(len(latencies)),
+                'errors': self._errors[name],
+                'throughput_per_s': round(len(latencies) / elapsed, 1),
+                'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+                'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+                'p99_ms': round(float(np.percentile(latencies, 99)), 2),
+                'max_ms': round(float(latencies.max()), 2)
+            }
+
+        return {
+            'success': True,
+            'duration_s': round(elapsed, 2),
+            'trucks': self.trucks,
+            'workers': self.workers,
+            'max_schedule_lag_ms': round(max_lag * 1000, 2),
+            'paths': paths,
+            'tracking_store': {**tracking_store.stats, 'final_flush_ms': final_flush_ms}
+        }
+
+
+def run_simulation(cleanup: bool = True, **options) -> dict:
+    simulator = LoadSimulator(**options)
+    simulator.setup()
+    try:
+        return simulator.run()
+    finally:
+        if cleanup:
+            simulator.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay simulated fleet load against the emergency flow. Run against a scratch DATABASE_URL.")
+    parser.add_argument('--scratch-db', required=True, help="Must repeat DATABASE_URL to confirm it is a scratch database")
+    parser.add_argument('--trucks', type=int, default=500)
+    parser.add_argument('--update-interval', type=float, default=2.0, help="Seconds between position updates per truck")
+    parser.add_argument('--breakdown-rate', type=float, default=1.0, help="Breakdown reports per second")
+    parser.add_argument('--eta-rate', type=float, default=20.0, help="ETA requests per second")
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keep', action='store_true', help="Keep simulated breakdowns in the database")
+    args = parser.parse_args()
+
+    print(json.dumps(run_simulation(
+        cleanup=not args.keep,
+        trucks=args.trucks,
+        update_interval=args.update_interval,
+        breakdown_rate=args.breakdown_rate,
+        eta_rate=args.eta_rate,
+        duration=args.duration,
+        workers=args.workers,
+        seed=args.seed,
+        scratch_db=args.scratch_db
+    ), indent=2))
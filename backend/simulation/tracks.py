@@ -0,0 +1,35 @@
+import numpy as np
+
+from utils.geo import equirectangular_km
+
+KM_PER_DEG_LAT = 111.32
+
+def generate_tracks(count: int, steps: int, center_lat: float = 28.6139, center_lng: float = 77.2090,
+                    spread_km: float = 15.0, max_trip_km: float = 12.0, jitter_km: float = 0.05,
+                    seed: int = None) -> dict:
+    rng = np.random.default_rng(seed)
+    km_per_deg_lng = KM_PER_DEG_LAT * np.cos(np.radians(center_lat))
+
+    end_lat = center_lat + rng.normal(0, spread_km, count) / KM_PER_DEG_LAT
+    end_lng = center_lng + rng.normal(0, spread_km, count) / km_per_deg_lng
+
+    bearing = rng.uniform(0, 2 * np.pi, count)
+    trip_km = rng.uniform(0.2, 1.0, count) * max_trip_km
+    start_lat = end_lat + trip_km * np.cos(bearing) / KM_PER_DEG_LAT
+    start_lng = end_lng + trip_km * np.sin(bearing) / km_per_deg_lng
+
+    progress = np.linspace(0, 1, steps)
+    # Jitter tapers to zero at both ends so every track starts and finishes exactly
+    taper = np.sin(np.pi * progress)
+    lats = start_lat[:, None] + (end_lat - start_lat)[:, None] * progress + rng.normal(0, jitter_km, (count, steps)) * taper / KM_PER_DEG_LAT
+    lngs = start_lng[:, None] + (end_lng - start_lng)[:, None] * progress + rng.normal(0, jitter_km, (count, steps)) * taper / km_per_deg_lng
+
+    return {
+        'start_lat': start_lat,
+        'start_lng': start_lng,
+        'end_lat': end_lat,
+        'end_lng': end_lng,
+        'lats': lats,
+        'lngs': lngs,
+        'trip_km': equirectangular_km(start_lat, start_lng, end_lat, end_lng)
+    }
@@ -0,0 +1,267 @@
+import glob
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+HEALTH_HISTORY_DIR = os.environ.get("HEALTH_HISTORY_DIR", "data/health_history")
+PARTITION_SECONDS = 7 * 86400
+VALUE_FIELDS = ['engine_health', 'brake_health', 'battery_health', 'tire_health', 'total_km']
+
+ROW_DTYPE = np.dtype([
+    ('vehicle_id', '<i4'),
+    ('timestamp', '<i8'),
+    ('engine_health', '<f4'),
+    ('brake_health', '<f4'),
+    ('battery_health', '<f4'),
+    ('tire_health', '<f4'),
+    ('total_km', '<f8'),
+])
+
+def make_key(vehicle_ids, timestamps) -> np.ndarray:
+    return (np.asarray(vehicle_ids, dtype=np.int64) << 32) | np.asarray(timestamps, dtype=np.int64)
+
+
+class HealthHistoryStore:
+    def __init__(self, base_dir: str = None, chunk_rows: int = 250000):
+        self.base_dir = base_dir or HEALTH_HISTORY_DIR
+        self.chunk_rows = chunk_rows
+        self.chunk_dir = os.path.join(self.base_dir, 'chunks')
+        self.block_dir = os.path.join(self.base_dir, 'blocks')
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._blocks = {}
+        self._block_names = {}
+        self._active_seq = None
+        self._active_rows = 0
+        self._min_live_seq = 1
+
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        os.makedirs(self.block_dir, exist_ok=True)
+        self._open_existing()
+
+    def _chunk_path(self, seq: int) -> str:
+        return os.path.join(self.chunk_dir, f"chunk-{seq:08d}.bin")
+
+    def _chunk_seqs(self) -> list:
+        paths = glob.glob(os.path.join(self.chunk_dir, 'chunk-*.bin'))
+        return sorted(int(os.path.basename(p)[6:14]) for p in paths)
+
+    def _open_existing(self):
+        current = os.path.join(self.base_dir, 'CURRENT')
+        if os.path.exists(current):
+            with open(current) as f:
+                state = json.load(f)
+            self._block_names = {int(p): name for p, name in state['blocks'].items()}
+            self._blocks = {p: self._load_block(name) for p, name in self._block_names.items()}
+            self._min_live_seq = state['min_live_seq']
+
+        self._remove_compacted_files()
+
+        seqs = self._chunk_seqs()
+        self._active_seq = max(seqs[-1] + 1 if seqs else 1, self._min_live_seq)
+        self._active_rows = 0
+
+    def _remove_compacted_files(self):
+        for seq in self._chunk_seqs():
+            if seq < self._min_live_seq:
+                try:
+                    os.remove(self._chunk_path(seq))
+                except FileNotFoundError:
+                    pass
+        live = set(self._block_names.values())
+        for name in os.listdir(self.block_dir):
+            if name not in live:
+                shutil.rmtree(os.path.join(self.block_dir, name), ignore_errors=True)
+
+    def _load_block(self, name: str) -> dict:
+        path = os.path.join(self.block_dir, name)
+        block = {'key': np.load(os.path.join(path, 'key.npy'), mmap_mode='r')}
+        for field in VALUE_FIELDS:
+            block[field] = np.load(os.path.join(path, f"{field}.npy"), mmap_mode='r')
+        return block
+
+    def append_batch(self, batch: dict) -> int:
+        n = len(batch['vehicle_id'])
+        if not n:
+            return 0
+
+        rows = np.empty(n, dtype=ROW_DTYPE)
+        rows['vehicle_id'] = batch['vehicle_id']
+        rows['timestamp'] = batch['timestamp']
+        for field in VALUE_FIELDS:
+            rows[field] = batch[field]
+
+        with self._lock:
+            with open(self._chunk_path(self._active_seq), 'ab') as f:
+                rows.tofile(f)
+            self._active_rows += n
+            if self._active_rows >= self.chunk_rows:
+                self._active_seq += 1
+                self._active_rows = 0
+        return n
+
+    def _live_chunks(self) -> list:
+        # Sizes are taken under the append lock so a half-written batch is never mapped
+        chunks = []
+        for seq in self._chunk_seqs():
+            if self._min_live_seq <= seq <= self._active_seq:
+                size = os.path.getsize(self._chunk_path(seq)) // ROW_DTYPE.itemsize
+                if size:
+                    chunks.append((seq, size))
+        return chunks
+
+    def _map_chunks(self, chunks: list) -> list:
+        return [np.memmap(self._chunk_path(seq), dtype=ROW_DTYPE, mode='r', shape=(size,)) for seq, size in chunks]
+
+    def _write_block(self, keys: np.ndarray, columns: dict, partition: int) -> str:
+        name = f"p{partition:06d}-{time.time_ns()}"
+        tmp_path = os.path.join(self.block_dir, f".{name}")
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, 'key.npy'), keys)
+        for field in VALUE_FIELDS:
+            np.save(os.path.join(tmp_path, f"{field}.npy"), columns[field])
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump({'rows': int(len(keys)), 'partition': partition, 'created_at': time.time()}, f)
+        os.rename(tmp_path, os.path.join(self.block_dir, name))
+        return name
+
+    def compact(self) -> dict:
+        with self._compact_lock:
+            with self._lock:
+                self._remove_compacted_files()
+                chunks = self._live_chunks()
+                if not chunks:
+                    return {"success": True, "compacted_rows": 0}
+                sealed = chunks[-1][0]
+                self._active_seq = sealed + 1
+                self._active_rows = 0
+                blocks = dict(self._blocks)
+                names = dict(self._block_names)
+
+            start = time.perf_counter()
+            rows = np.concatenate(self._map_chunks(chunks))
+            partitions = rows['timestamp'] // PARTITION_SECONDS
+
+            # Only partitions that received new rows are rewritten; older weeks stay untouched
+            merged_rows = 0
+            for partition in np.unique(partitions):
+                new = rows[partitions == partition]
+                keys = make_key(new['vehicle_id'], new['timestamp'])
+                columns = {field: new[field] for field in VALUE_FIELDS}
+                block = blocks.get(int(partition))
+                if block is not None:
+                    keys = np.concatenate([np.asarray(block['key']), keys])
+                    for field in VALUE_FIELDS:
+                        columns[field] = np.concatenate([np.asarray(block[field]), columns[field]])
+
+                order = np.argsort(keys, kind='stable')
+                names[int(partition)] = self._write_block(
+                    keys[order], {field: columns[field][order] for field in VALUE_FIELDS}, int(partition)
+                )
+                merged_rows += len(keys)
+
+            current_tmp = os.path.join(self.base_dir, 'CURRENT.tmp')
+            with open(current_tmp, 'w') as f:
+                json.dump({'blocks': {str(p): name for p, name in names.items()}, 'min_live_seq': sealed + 1}, f)
+            os.replace(current_tmp, os.path.join(self.base_dir, 'CURRENT'))
+
+            with self._lock:
+                for partition, name in names.items():
+                    if self._block_names.get(partition) != name:
+                        self._blocks[partition] = self._load_block(name)
+                        self._block_names[partition] = name
+                self._min_live_seq = sealed + 1
+
+            return {
+                "success": True,
+                "compacted_rows": int(len(rows)),
+                "partitions_rewritten": int(len(np.unique(partitions))),
+                "merged_rows": int(merged_rows),
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+            }
+
+    def read_range(self, vehicle_ids, field: str, start_ts: float, end_ts: float) -> dict:
+        if field not in VALUE_FIELDS:
+            raise ValueError(f"Unknown field: {field}")
+
+        vehicle_ids = np.unique(np.asarray(vehicle_ids, dtype=np.int64))
+        start_ts = int(start_ts)
+        end_ts = int(end_ts)
+
+        with self._lock:
+            blocks = [block for partition, block in self._blocks.items()
+                      if start_ts // PARTITION_SECONDS <= partition <= end_ts // PARTITION_SECONDS]
+            chunks = self._live_chunks()
+
+        keys_parts = []
+        value_parts = []
+
+        for block in blocks:
+            if not len(vehicle_ids):
+                break
+            lo = np.searchsorted(block['key'], make_key(vehicle_ids, start_ts), side='left')
+            hi = np.searchsorted(block['key'], make_key(vehicle_ids, end_ts), side='right')
+            lengths = hi - lo
+            total = int(lengths.sum())
+            if total:
+                offsets = np.repeat(lo - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+                index = np.arange(total) + offsets
+                keys_parts.append(np.asarray(block['key'][index]))
+                value_parts.append(np.asarray(block[field][index], dtype=np.float64))
+
+        for recent in self._map_chunks(chunks):
+            mask = (
+                np.isin(recent['vehicle_id'], vehicle_ids)
+                & (recent['timestamp'] >= start_ts)
+                & (recent['timestamp'] <= end_ts)
+            )
+            if mask.any():
+                selected = recent[mask]
+                keys_parts.append(make_key(selected['vehicle_id'], selected['timestamp']))
+                value_parts.append(selected[field].astype(np.float64))
+
+        if keys_parts:
+            keys = np.concatenate(keys_parts)
+            values = np.concatenate(value_parts)
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+            values = values[order]
+            present = ~np.isnan(values)
+            keys = keys[present]
+            values = values[present]
+        else:
+            keys = np.empty(0, dtype=np.int64)
+            values = np.empty(0, dtype=np.float64)
+
+        return {
+            'vehicle_id': (keys >> 32).astype(np.int64),
+            'timestamp': (keys & 0xFFFFFFFF).astype(np.int64),
+            'value': values
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_health_history_store() -> HealthHistoryStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HealthHistoryStore()
+    return _store
+
+def append_readings(batch: dict) -> int:
+    return get_health_history_store().append_batch(batch)
+
+def compact_health_history() -> dict:
+    return get_health_history_store().compact()
+
+def get_health_history(vehicle_ids: list, field: str, days: int = 90) -> dict:
+    end_ts = time.time()
+    start_ts = end_ts - days * 86400
+    return get_health_history_store().read_range(vehicle_ids, field, start_ts, end_ts)
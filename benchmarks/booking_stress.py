@@ -0,0 +1,175 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError
+
+from backend.agents.scheduling_agent import SchedulingAgent
+from backend.services.garage_catalog import garage_catalog
+from backend.services.garage_load import reconcile_garage_loads
+from backend.services.slot_calendar import claim_slot, slot_calendar
+from database.models import ServiceRequest, ServiceSlot, Vehicle, get_db_session
+
+STRESS_LABEL = "stress-test"
+
+def create_slot(garage_id: int, day: datetime, capacity: int, time_slot: str = STRESS_LABEL) -> int:
+    db = get_db_session()
+    try:
+        slot = ServiceSlot(garage_id=garage_id, date=day, time_slot=time_slot,
+                           is_available=True, max_capacity=capacity, current_bookings=0)
+        db.add(slot)
+        db.commit()
+        return slot.id
+    finally:
+        db.close()
+
+def read_slot(slot_id: int) -> tuple:
+    db = get_db_session()
+    try:
+        row = db.query(ServiceSlot.current_bookings, ServiceSlot.max_capacity, ServiceSlot.is_available).filter(
+            ServiceSlot.id == slot_id
+        ).first()
+        return tuple(row)
+    finally:
+        db.close()
+
+def naive_book(slot_id: int) -> bool:
+    db = get_db_session()
+    try:
+        slot = db.query(ServiceSlot).filter(ServiceSlot.id == slot_id).first()
+        if slot.current_bookings >= slot.max_capacity:
+            return False
+        time.sleep(0.001)
+        slot.current_bookings += 1
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+def conditional_book(slot_id: int) -> bool:
+    db = get_db_session()
+    try:
+        claimed = claim_slot(db, slot_id)
+        db.commit()
+        return claimed
+    finally:
+        db.close()
+
+def hammer(book, slot_id: int, attempts: int, threads: int) -> dict:
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def attempt(_):
+        try:
+            result = 'booked' if book(slot_id) else 'full'
+        except OperationalError:
+            result = 'db_busy'
+        with lock:
+            outcomes[result] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(attempt, range(attempts)))
+    elapsed = time.perf_counter() - start
+
+    bookings, capacity, available = read_slot(slot_id)
+    return {
+        'attempts': attempts,
+        'booked': outcomes['booked'],
+        'full': outcomes['full'],
+        'db_busy': outcomes['db_busy'],
+        'stored_bookings': bookings,
+        'capacity': capacity,
+        'still_available': bool(available),
+        'attempts_per_s': round(attempts / elapsed, 1)
+    }
+
+def hammer_agent(garage_id: int, vehicle_id: int, day: datetime, requests: int, threads: int) -> dict:
+    agent = SchedulingAgent()
+    results = []
+    lock = threading.Lock()
+
+    def book(_):
+        result = agent.execute({'vehicle_id': vehicle_id, 'garage_id': garage_id, 'preferred_date': day,
+                                'service_type': STRESS_LABEL})
+        with lock:
+            results.append(result)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(book, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    db = get_db_session()
+    try:
+        overbooked = db.query(ServiceSlot).filter(
+            ServiceSlot.current_bookings > ServiceSlot.max_capacity
+        ).count()
+        requests_stored = db.query(ServiceRequest).filter(ServiceRequest.service_type == STRESS_LABEL).count()
+        booked_seats = sum(b for (b,) in db.query(ServiceSlot.current_bookings).filter(
+            ServiceSlot.date >= day
+        ).all())
+    finally:
+        db.close()
+
+    return {
+        'requests': requests,
+        'booked': sum(1 for r in results if r.get('slot_found')),
+        'errors': sum(1 for r in results if not r.get('success')),
+        'conflicts_retried': sum(r.get('booking_conflicts', 0) for r in results),
+        'service_requests_stored': requests_stored,
+        'seats_booked': booked_seats,
+        'overbooked_slots': overbooked,
+        'bookings_per_s': round(requests / elapsed, 1)
+    }
+
+def cleanup(day: datetime):
+    db = get_db_session()
+    try:
+        db.query(ServiceRequest).filter(ServiceRequest.service_type == STRESS_LABEL).delete(synchronize_session=False)
+        db.query(ServiceSlot).filter(ServiceSlot.date >= day).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+    slot_calendar.invalidate()
+    reconcile_garage_loads()
+
+def main():
+    threads = int(os.environ.get('STRESS_THREADS', 32))
+    capacity = int(os.environ.get('STRESS_CAPACITY', 50))
+    attempts = capacity * 4
+
+    garage = garage_catalog.active()[0]
+    db = get_db_session()
+    vehicle_id = db.query(Vehicle.id).first()[0]
+    db.close()
+    day = datetime.combine(datetime.now().date() + timedelta(days=400), datetime.min.time())
+
+    try:
+        print(f"One slot with {capacity} seats, {attempts} attempts from {threads} threads\n")
+        for label, book in [("read-modify-write", naive_book), ("conditional UPDATE", conditional_book)]:
+            slot_id = create_slot(garage.id, day, capacity)
+            stats = hammer(book, slot_id, attempts, threads)
+            overbooked = stats['stored_bookings'] > stats['capacity'] or stats['booked'] != stats['stored_bookings']
+            print(f"  {label:20s} booked {stats['booked']:4d}  stored {stats['stored_bookings']:4d}/{stats['capacity']}"
+                  f"  busy {stats['db_busy']:3d}  {stats['attempts_per_s']:8.1f} attempts/s  {'LOST UPDATES' if overbooked else 'ok'}")
+
+        print("\nSchedulingAgent bookings racing for small slots on one day")
+        for i in range(3):
+            create_slot(garage.id, day + timedelta(days=1), 3, STRESS_LABEL)
+        slot_calendar.build()
+        # Each booking holds one pooled connection, so stay below the pool size
+        stats = hammer_agent(garage.id, vehicle_id, day + timedelta(days=1), 40, min(threads, 8))
+        for key, value in stats.items():
+            print(f"  {key:26s} {value}")
+    finally:
+        cleanup(day)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.geo import (
+    haversine_km, haversine_one_to_many, haversine_matrix, equirectangular_km, equirectangular_matrix
+)
+
+def timed(func, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    rng = np.random.default_rng(42)
+    n = 200000
+    lats = rng.uniform(8, 34, n)
+    lngs = rng.uniform(68, 92, n)
+    lat, lng = 28.6139, 77.2090
+
+    print("Throughput (one-to-many, %d points)" % n)
+    loop_seconds = timed(lambda: [haversine_km(lat, lng, a, b) for a, b in zip(lats, lngs)], repeat=1)
+    vector_seconds = timed(lambda: haversine_one_to_many(lat, lng, lats, lngs))
+    approx_seconds = timed(lambda: equirectangular_km(lat, lng, lats, lngs))
+    for label, seconds in [("scalar loop", loop_seconds), ("haversine", vector_seconds), ("equirectangular", approx_seconds)]:
+        print(f"  {label:16s} {seconds * 1000:9.2f} ms  {n / seconds / 1e6:8.2f} M dist/s")
+
+    rows, cols = 2000, 2000
+    matrix_seconds = timed(lambda: haversine_matrix(lats[:rows], lngs[:rows], lats[-cols:], lngs[-cols:]))
+    approx_matrix_seconds = timed(lambda: equirectangular_matrix(lats[:rows], lngs[:rows], lats[-cols:], lngs[-cols:]))
+    print(f"\nMany-to-many ({rows}x{cols})")
+    print(f"  haversine        {matrix_seconds * 1000:9.2f} ms")
+    print(f"  equirectangular  {approx_matrix_seconds * 1000:9.2f} ms")
+
+    print("\nAccuracy vs scalar haversine")
+    exact = np.array([haversine_km(lat, lng, a, b) for a, b in zip(lats[:5000], lngs[:5000])])
+    vector = haversine_one_to_many(lat, lng, lats[:5000], lngs[:5000])
+    print(f"  vectorized haversine max abs error: {np.abs(vector - exact).max():.2e} km")
+
+    for radius in [5, 25, 100, 500]:
+        bearing = rng.uniform(0, 2 * np.pi, 5000)
+        distance = rng.uniform(0, radius, 5000)
+        near_lats = lat + distance * np.cos(bearing) / 111.32
+        near_lngs = lng + distance * np.sin(bearing) / (111.32 * np.cos(np.radians(lat)))
+        exact = haversine_one_to_many(lat, lng, near_lats, near_lngs)
+        approx = equirectangular_km(lat, lng, near_lats, near_lngs)
+        rel = np.abs(approx - exact) / np.maximum(exact, 1e-9)
+        print(f"  equirectangular within {radius:3d} km: max rel error {rel.max() * 100:.4f}%  max abs {np.abs(approx - exact).max() * 1000:.1f} m")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, text
+
+from backend.services.garage_catalog import garage_catalog
+from backend.services.garage_spatial_index import garage_index
+from backend.services.service_request_service import get_available_slots_nearby
+from backend.services.slot_horizon import SLOT_BLOCKS, SLOT_HORIZON_DAYS, extend_slot_horizon
+from database.models import Garage, ServiceSlot, engine, get_db_session, init_db, require_scratch_database
+
+BENCH_TAG = "nearby-slots-bench"
+CENTER = (28.6139, 77.2090)
+
+def seed(target_slots: int, rng) -> list:
+    count = max(1, target_slots // (SLOT_HORIZON_DAYS * len(SLOT_BLOCKS)))
+    lats = CENTER[0] + rng.normal(0, 0.25, count)
+    lngs = CENTER[1] + rng.normal(0, 0.25, count)
+    db = get_db_session()
+    try:
+        db.execute(insert(Garage), [{
+            'name': f"{BENCH_TAG} {i}", 'address': BENCH_TAG, 'city': 'Delhi',
+            'latitude': float(lats[i]), 'longitude': float(lngs[i]),
+            'capacity': 10, 'current_load': 0, 'opening_time': '08:00', 'closing_time': '20:00',
+            'working_days': 'Mon-Sun', 'is_active': True
+        } for i in range(count)])
+        db.commit()
+        garage_ids = [row[0] for row in db.query(Garage.id).filter(Garage.address == BENCH_TAG).all()]
+    finally:
+        db.close()
+
+    extend_slot_horizon(garage_ids=garage_ids)
+    garage_catalog.invalidate()
+    garage_index.build()
+    return garage_ids
+
+def cleanup(garage_ids: list):
+    db = get_db_session()
+    try:
+        db.query(ServiceSlot).filter(ServiceSlot.garage_id.in_(garage_ids)).delete(synchronize_session=False)
+        db.query(Garage).filter(Garage.id.in_(garage_ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+    garage_catalog.invalidate()
+    garage_index.build()
+
+def measure(queries: list, radius_km: float, limit: int) -> np.ndarray:
+    latencies = []
+    for lat, lng, start in queries:
+        began = time.perf_counter()
+        result = get_available_slots_nearby(lat, lng, radius_km, start, 14, limit)
+        latencies.append(time.perf_counter() - began)
+        assert result['success'], result
+    return np.array(latencies) * 1000
+
+def report(label: str, latencies: np.ndarray):
+    print(f"  {label:18s} p50 {np.percentile(latencies, 50):7.2f} ms  p95 {np.percentile(latencies, 95):7.2f} ms"
+          f"  p99 {np.percentile(latencies, 99):7.2f} ms")
+
+def main():
+    # Seeds garages and drops a shared index for the "no index" case, so never against a real database
+    parser = argparse.ArgumentParser(description="Next-k open slots benchmark. Run against a scratch DATABASE_URL.")
+    parser.add_argument('--scratch-db', required=True, help="Must repeat DATABASE_URL to confirm it is a scratch database")
+    require_scratch_database(parser.parse_args().scratch_db)
+
+    target = int(os.environ.get('BENCH_SLOTS', 100000))
+    rng = np.random.default_rng(7)
+    init_db()
+
+    garage_ids = seed(target, rng)
+    try:
+        db = get_db_session()
+        total = db.query(ServiceSlot).count()
+        db.close()
+        print(f"{len(garage_ids)} garages, {total} slots\n")
+
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
+        queries = [
+            (CENTER[0] + rng.normal(0, 0.2), CENTER[1] + rng.normal(0, 0.2),
+             today + timedelta(days=int(rng.integers(0, SLOT_HORIZON_DAYS - 14)), hours=int(rng.integers(0, 24))))
+            for _ in range(500)
+        ]
+
+        print("Next 10 open slots, 14-day window")
+        for radius in [5, 10, 25]:
+            measure(queries[:20], radius, 10)
+            report(f"radius {radius} km", measure(queries, radius, 10))
+
+        with engine.connect() as conn:
+            conn.execute(text("DROP INDEX IF EXISTS ix_service_slots_date_available"))
+            conn.commit()
+        try:
+            report("10 km, no index", measure(queries[:100], 10, 10))
+        finally:
+            init_db()
+    finally:
+        cleanup(garage_ids)
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,13 @@
 from database.models import (
     Base, engine, SessionLocal, init_db, get_db, get_db_session,
-    User, Vehicle, Garage, ServiceSlot, ServiceRequest, 
-    BreakdownEvent, SparePart, Alert, Feedback, AgentLog,
+    User, Vehicle, VehicleUsageWindow, Garage, ServiceSlot, ServiceRequest, 
+    BreakdownEvent, SparePart, Alert, AlertCounter, Feedback, AgentLog,
     UserRole, AlertPriority, ServiceStatus, BreakdownStatus
 )
 
 __all__ = [
     'Base', 'engine', 'SessionLocal', 'init_db', 'get_db', 'get_db_session',
-    'User', 'Vehicle', 'Garage', 'ServiceSlot', 'ServiceRequest',
-    'BreakdownEvent', 'SparePart', 'Alert', 'Feedback', 'AgentLog',
+    'User', 'Vehicle', 'VehicleUsageWindow', 'Garage', 'ServiceSlot', 'ServiceRequest',
+    'BreakdownEvent', 'SparePart', 'Alert', 'AlertCounter', 'Feedback', 'AgentLog',
     'UserRole', 'AlertPriority', 'ServiceStatus', 'BreakdownStatus'
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Enum
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Enum, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 from datetime import datetime
@@ -78,6 +78,18 @@ class Vehicle(Base):
     owner = relationship("User", back_populates="vehicles")
     service_requests = relationship("ServiceRequest", back_populates="vehicle")
     breakdown_events = relationship("BreakdownEvent", back_populates="vehicle")
+    
+    __table_args__ = (
+        Index('ix_vehicles_make_model_year', 'make', 'model', 'year'),
+    )
+
+class VehicleUsageWindow(Base):
+    __tablename__ = 'vehicle_usage_windows'
+    
+    vehicle_id = Column(Integer, ForeignKey('vehicles.id'), primary_key=True)
+    state = Column(Text, nullable=False)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class Garage(Base):
     __tablename__ = 'garages'
@@ -108,6 +120,10 @@ class Garage(Base):
     service_slots = relationship("ServiceSlot", back_populates="garage")
     service_requests = relationship("ServiceRequest", back_populates="garage")
     breakdown_events = relationship("BreakdownEvent", back_populates="garage")
+    
+    __table_args__ = (
+        Index('ix_garages_lat_lng', 'latitude', 'longitude'),
+    )
 
 class ServiceSlot(Base):
     __tablename__ = 'service_slots'
@@ -121,6 +137,10 @@ class ServiceSlot(Base):
     current_bookings = Column(Integer, default=0)
     
     garage = relationship("Garage", back_populates="service_slots")
+    
+    __table_args__ = (
+        Index('ix_service_slots_date_available', 'date', 'is_available'),
+    )
 
 class ServiceRequest(Base):
     __tablename__ = 'service_requests'
@@ -222,9 +242,22 @@ class Alert(Base):
     is_dismissed = Column(Boolean, default=False)
     
     created_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime)
+    expires_at = Column(DateTime, index=True)
     
     user = relationship("User", back_populates="alerts")
+    
+    __table_args__ = (
+        Index('ix_alerts_user_live', 'user_id', 'is_dismissed', 'expires_at'),
+    )
+
+class AlertCounter(Base):
+    __tablename__ = 'alert_counters'
+    
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    priority = Column(String(20), primary_key=True)
+    unread_count = Column(Integer, default=0, nullable=False)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class Feedback(Base):
     __tablename__ = 'feedback'
@@ -267,11 +300,20 @@ class AgentLog(Base):
 
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///autosense.db")
 
+def require_scratch_database(confirmed_url: str):
+    # Load tools write and drop test data, so they only run when the caller names the database
+    # they are pointed at and it was chosen explicitly through DATABASE_URL
+    if "DATABASE_URL" not in os.environ or confirmed_url != DATABASE_URL:
+        raise RuntimeError("Set DATABASE_URL to a scratch database and pass the same URL with --scratch-db")
+
 engine = create_engine(DATABASE_URL, echo=False)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 def get_db():
     db = SessionLocal()
@@ -0,0 +1,47 @@
+import json
+import streamlit.components.v1 as components
+
+ALERT_FEED_TEMPLATE = """
+<div id="alert-feed" style="font-family: sans-serif; font-size: 14px;"></div>
+<script>
+const config = __CONFIG__;
+const state = {unread: config.unread, fresh: []};
+const feed = document.getElementById('alert-feed');
+const colors = {critical: '#c0392b', high: '#e67e22', medium: '#2980b9', low: '#7f8c8d'};
+
+function render() {
+    const badge = state.unread > 0
+        ? '<div style="background: #fff3cd; color: #856404; padding: 8px 12px; border-radius: 6px;">You have ' + state.unread + ' unread alert(s)</div>'
+        : '';
+    const items = state.fresh.map((alert) =>
+        '<div style="padding: 4px 2px;"><b style="color: ' + (colors[alert.priority] || '#7f8c8d') + ';">New: </b>' +
+        alert.title.replace(/</g, '&lt;') + '</div>'
+    ).join('');
+    const hint = state.fresh.length ? '<div style="color: #7f8c8d; padding: 2px;">Refresh alerts to act on new ones</div>' : '';
+    feed.innerHTML = badge + items + hint;
+}
+
+render();
+// EventSource resends the last received id as Last-Event-ID when it reconnects
+const source = new EventSource(config.stream_url);
+source.addEventListener('alert', (e) => {
+    const alert = JSON.parse(e.data);
+    state.fresh.unshift(alert);
+    state.fresh = state.fresh.slice(0, config.max_items);
+    if (!alert.is_read) {
+        state.unread += 1;
+    }
+    render();
+});
+</script>
+"""
+
+def render_live_alerts(api_url: str, token: str, last_alert_id: int, unread: int,
+                       max_items: int = 5, height: int = 120):
+    config = {
+        'stream_url': f"{api_url.rstrip('/')}/api/alerts/stream?token={token}&last_event_id={last_alert_id}",
+        'unread': unread,
+        'max_items': max_items
+    }
+    html = ALERT_FEED_TEMPLATE.replace('__CONFIG__', json.dumps(config).replace('</', '<\\/'))
+    components.html(html, height=height)
@@ -0,0 +1,70 @@
+import json
+import streamlit.components.v1 as components
+
+TRACKING_MAP_TEMPLATE = """
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css"/>
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<div id="tracking-map" style="height: __HEIGHT__px; border-radius: 6px;"></div>
+<div id="tracking-status" style="font-family: sans-serif; font-size: 14px; padding: 6px 2px;"></div>
+<script>
+const config = __CONFIG__;
+const state = config.state;
+const map = L.map('tracking-map').setView([config.vehicle[0], config.vehicle[1]], 13);
+L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+    attribution: '&copy; OpenStreetMap contributors'
+}).addTo(map);
+
+L.circleMarker(config.vehicle, {radius: 9, color: '#e74c3c', fillOpacity: 0.9}).addTo(map).bindPopup('Your Location');
+let garageMarker = null;
+const status = document.getElementById('tracking-status');
+
+function render() {
+    if (state.latitude != null && state.longitude != null) {
+        const position = [state.latitude, state.longitude];
+        if (garageMarker === null) {
+            garageMarker = L.circleMarker(position, {radius: 9, color: '#2980b9', fillOpacity: 0.9}).addTo(map).bindPopup(config.garage_name);
+            map.fitBounds([config.vehicle, position], {padding: [30, 30], maxZoom: 15});
+        } else {
+            garageMarker.setLatLng(position);
+        }
+    }
+    if (state.ended) {
+        status.textContent = 'Live tracking ended';
+    } else if (state.arrived) {
+        status.textContent = config.garage_name + ' has arrived';
+    } else if (state.eta_minutes != null) {
+        const distance = state.remaining_distance_km != null ? ' \\u2022 ' + state.remaining_distance_km + ' km away' : '';
+        status.textContent = config.garage_name + ' arriving in ' + state.eta_minutes + ' min' + distance;
+    } else {
+        status.textContent = 'Waiting for ' + config.garage_name + ' position...';
+    }
+}
+
+render();
+const source = new EventSource(config.stream_url);
+source.addEventListener('position', (e) => {
+    Object.assign(state, JSON.parse(e.data));
+    render();
+});
+source.addEventListener('ended', () => {
+    state.ended = true;
+    render();
+    source.close();
+});
+</script>
+"""
+
+def render_live_tracking_map(breakdown: dict, api_url: str, token: str, height: int = 300):
+    config = {
+        'vehicle': [breakdown['vehicle_latitude'], breakdown['vehicle_longitude']],
+        'garage_name': breakdown.get('garage_name') or 'Garage',
+        'stream_url': f"{api_url.rstrip('/')}/api/breakdowns/{breakdown['id']}/tracking/stream?token={token}",
+        'state': {
+            'latitude': breakdown.get('garage_current_lat'),
+            'longitude': breakdown.get('garage_current_lng'),
+            'eta_minutes': breakdown.get('estimated_arrival_minutes'),
+            'arrived': breakdown.get('garage_arrived_at') is not None
+        }
+    }
+    html = TRACKING_MAP_TEMPLATE.replace('__HEIGHT__', str(height)).replace('__CONFIG__', json.dumps(config).replace('</', '<\\/'))
+    components.html(html, height=height + 40)
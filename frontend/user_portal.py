@@ -5,16 +5,22 @@ import folium
 from streamlit_folium import st_folium
 import plotly.express as px
 import plotly.graph_objects as go
+import os
 
 from database.models import User, Vehicle, Alert, get_db_session
-from utils.auth import hash_password, verify_password, create_access_token, decode_token
+from utils.auth import hash_password, verify_password, create_stream_token
 from backend.services.vehicle_service import get_user_vehicles, get_vehicle_details, get_vehicle_prediction
 from backend.services.service_request_service import schedule_service, get_user_service_requests
 from backend.services.breakdown_service import report_breakdown, get_user_breakdowns, get_breakdown_details
 from backend.services.garage_service import get_nearby_garages
-from backend.services.alert_service import get_user_alerts, mark_alert_read, dismiss_alert, get_unread_count
+from backend.services.alert_service import get_user_alerts, mark_alert_read, dismiss_alert
 from backend.services.analytics_service import get_user_service_history
+from backend.services.event_stream import alert_topic, tracking_topic
 from frontend.components.charts import create_gauge_chart, table_to_chart_widget, create_bar_chart
+from frontend.components.live_alerts import render_live_alerts
+from frontend.components.live_tracking import render_live_tracking_map
+
+API_URL = os.environ.get('AUTOSENSE_API_URL', 'http://localhost:5001')
 
 def authenticate_user(username: str, password: str):
     db = get_db_session()
@@ -55,6 +61,7 @@ def login_page():
                     if user:
                         st.session_state.user = user
                         st.session_state.authenticated = True
+                        st.session_state.alert_cache = None
                         st.rerun()
                     else:
                         st.error("Invalid username or password")
@@ -73,9 +80,8 @@ def dashboard_page():
     
     st.subheader(f"Welcome, {user['full_name']}")
     
-    alert_count = get_unread_count(user['id'])
-    if alert_count > 0:
-        st.warning(f"You have {alert_count} unread alert(s)")
+    cache = load_alert_cache(user['id'])
+    render_live_alerts(API_URL, get_alert_stream_token(user), cache['last_id'], cache['unread'])
     
     vehicles = get_user_vehicles(user['id'])
     
@@ -287,6 +293,26 @@ def schedule_service_page():
     else:
         st.info("No service requests yet")
 
+def load_alert_cache(user_id: int, refresh: bool = False) -> dict:
+    # Alerts are read once per session (and on refresh or after an action); new ones arrive
+    # over the alert stream instead of a query on every rerun
+    cache = st.session_state.get('alert_cache')
+    if refresh or cache is None:
+        alerts = get_user_alerts(user_id, include_read=True)
+        cache = {
+            'alerts': alerts,
+            'unread': sum(1 for a in alerts if not a['is_read']),
+            'last_id': max((a['id'] for a in alerts), default=0)
+        }
+        st.session_state.alert_cache = cache
+    return cache
+
+def get_alert_stream_token(user: dict) -> str:
+    return create_stream_token(user['id'], user['role'], alert_topic(user['id']))
+
+def get_tracking_stream_token(user: dict, breakdown_id: int) -> str:
+    return create_stream_token(user['id'], user['role'], tracking_topic(breakdown_id))
+
 def breakdown_assistance_page():
     user = st.session_state.user
     vehicles = get_user_vehicles(user['id'])
@@ -409,11 +435,19 @@ def breakdown_assistance_page():
             else:
                 st.error(result.get('error', 'Failed to report breakdown'))
     
+    breakdowns = get_user_breakdowns(user['id'])
+    active = next((bd for bd in breakdowns if bd['status'] in ('garage_assigned', 'garage_en_route')), None)
+    
+    if active:
+        details = get_breakdown_details(active['id'])
+        if details and details['vehicle_latitude'] is not None and details['vehicle_longitude'] is not None:
+            st.markdown("---")
+            st.subheader("Live Garage Tracking")
+            render_live_tracking_map(details, API_URL, get_tracking_stream_token(user, details['id']))
+    
     st.markdown("---")
     st.subheader("Your Breakdown History")
     
-    breakdowns = get_user_breakdowns(user['id'])
-    
     if breakdowns:
         for bd in breakdowns[:5]:
             status_emoji = {
@@ -439,8 +473,15 @@ def alerts_page():
     
     st.subheader("Your Alerts")
     
-    show_all = st.checkbox("Show read alerts", value=False)
-    alerts = get_user_alerts(user['id'], include_read=show_all)
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        show_all = st.checkbox("Show read alerts", value=False)
+    with col2:
+        refresh = st.button("Refresh", use_container_width=True)
+    
+    cache = load_alert_cache(user['id'], refresh=refresh)
+    render_live_alerts(API_URL, get_alert_stream_token(user), cache['last_id'], 0, height=80)
+    alerts = [a for a in cache['alerts'] if show_all or not a['is_read']]
     
     if not alerts:
         st.success("No alerts! Your vehicles are in good condition.")
@@ -471,10 +512,12 @@ def alerts_page():
                 if not alert['is_read']:
                     if st.button("Mark Read", key=f"read_{alert['id']}"):
                         mark_alert_read(alert['id'])
+                        st.session_state.alert_cache = None
                         st.rerun()
                 
                 if st.button("Dismiss", key=f"dismiss_{alert['id']}"):
                     dismiss_alert(alert['id'])
+                    st.session_state.alert_cache = None
                     st.rerun()
             
             st.divider()
@@ -545,6 +588,7 @@ def run_user_portal():
         if st.button("Logout", use_container_width=True):
             st.session_state.authenticated = False
             st.session_state.user = None
+            st.session_state.alert_cache = None
             st.rerun()
         
         if st.button("Switch to Admin", use_container_width=True):
@@ -8,6 +8,8 @@ from functools import wraps
 SECRET_KEY = os.environ.get("SESSION_SECRET", "autosense-secret-key-2024")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
+STREAM_TOKEN_EXPIRE_MINUTES = 10
+STREAM_SCOPE = "stream"
 
 def generate_salt() -> str:
     return secrets.token_hex(16)
@@ -36,6 +38,13 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_stream_token(user_id: int, role: str, topic: str) -> str:
+    # Stream URLs carry the token in the query string, so it only opens one topic and expires quickly
+    return create_access_token(
+        {"user_id": user_id, "role": role, "scope": STREAM_SCOPE, "topic": topic},
+        timedelta(minutes=STREAM_TOKEN_EXPIRE_MINUTES)
+    )
+
 def decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -0,0 +1,70 @@
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lng = math.radians(lng2 - lng1)
+
+    a = math.sin(delta_lat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lng / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+def _haversine(lat1, lng1, lat2, lng2) -> np.ndarray:
+    lat1 = np.radians(lat1)
+    lat2 = np.radians(lat2)
+    sin_dlat = np.sin((lat2 - lat1) * 0.5)
+    sin_dlng = np.sin((np.radians(lng2) - np.radians(lng1)) * 0.5)
+
+    a = sin_dlat * sin_dlat + np.cos(lat1) * np.cos(lat2) * sin_dlng * sin_dlng
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def haversine_one_to_many(lat: float, lng: float, lats, lngs) -> np.ndarray:
+    return _haversine(lat, lng, np.asarray(lats, dtype=np.float64), np.asarray(lngs, dtype=np.float64))
+
+def haversine_matrix(lats1, lngs1, lats2, lngs2) -> np.ndarray:
+    lats1 = np.asarray(lats1, dtype=np.float64)[:, None]
+    lngs1 = np.asarray(lngs1, dtype=np.float64)[:, None]
+    lats2 = np.asarray(lats2, dtype=np.float64)[None, :]
+    lngs2 = np.asarray(lngs2, dtype=np.float64)[None, :]
+    return _haversine(lats1, lngs1, lats2, lngs2)
+
+def top_k_nearest(lats, lngs, target_lats, target_lngs, k: int, max_cells: int = 2000000) -> tuple:
+    # Haversine matrix in row chunks of about max_cells entries; returns each row's k nearest
+    # targets (indices and km) in ascending distance
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    n, m = len(lats), len(target_lats)
+    k = min(k, m)
+
+    index = np.empty((n, k), dtype=np.int64)
+    distance = np.empty((n, k))
+    chunk = max(1, max_cells // max(m, 1))
+    for start in range(0, n, chunk):
+        end = min(start + chunk, n)
+        matrix = haversine_matrix(lats[start:end], lngs[start:end], target_lats, target_lngs)
+        if k < m:
+            nearest = np.argpartition(matrix, k - 1, axis=1)[:, :k]
+        else:
+            nearest = np.broadcast_to(np.arange(m), matrix.shape)
+        index[start:end] = nearest
+        distance[start:end] = np.take_along_axis(matrix, nearest, axis=1)
+
+    order = np.argsort(distance, axis=1)
+    return np.take_along_axis(index, order, axis=1), np.take_along_axis(distance, order, axis=1)
+
+def equirectangular_km(lat1, lng1, lat2, lng2) -> np.ndarray:
+    lat1 = np.asarray(lat1, dtype=np.float64)
+    lat2 = np.asarray(lat2, dtype=np.float64)
+    x = np.radians(np.asarray(lng2, dtype=np.float64) - np.asarray(lng1, dtype=np.float64)) * np.cos(np.radians((lat1 + lat2) * 0.5))
+    y = np.radians(lat2 - lat1)
+    return EARTH_RADIUS_KM * np.sqrt(x * x + y * y)
+
+def equirectangular_matrix(lats1, lngs1, lats2, lngs2) -> np.ndarray:
+    return equirectangular_km(
+        np.asarray(lats1, dtype=np.float64)[:, None], np.asarray(lngs1, dtype=np.float64)[:, None],
+        np.asarray(lats2, dtype=np.float64)[None, :], np.asarray(lngs2, dtype=np.float64)[None, :]
+    )